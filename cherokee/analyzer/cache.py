@@ -0,0 +1,188 @@
+"""Persistent cache for block explorer ``tokeninfo`` responses."""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from ..cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+EXPLORER_CACHE_PATH = os.getenv('EXPLORER_CACHE_PATH', 'explorer_cache.db')
+EXPLORER_CACHE_TTL = float(os.getenv('EXPLORER_CACHE_TTL', str(24 * 3600)))
+EXPLORER_CACHE_NEGATIVE_TTL = float(os.getenv('EXPLORER_CACHE_NEGATIVE_TTL', '300'))
+EXPLORER_CACHE_MAX_ENTRIES = int(os.getenv('EXPLORER_CACHE_MAX_ENTRIES', '100000'))
+# hot entries are also kept in memory to avoid touching SQLite at all
+MEMORY_ENTRIES = 4096
+EVICT_EVERY = 256
+# reads record their access time in memory; it is written with the next
+# set()/evict() or once this many reads are pending
+TOUCH_FLUSH_SIZE = 1024
+
+
+def is_negative(payload: Any) -> bool:
+    """Return True for error, rate limit and "not found" explorer responses."""
+    if not isinstance(payload, dict):
+        return True
+    result = payload.get('result')
+    return str(payload.get('status', '1')) != '1' or not isinstance(result, list) or not result
+
+
+class TokenDetailsCache:
+    """SQLite backed TTL/LRU cache keyed by ``(chain, address)``.
+
+    Successful lookups live for ``ttl`` seconds, errors and empty results
+    for ``negative_ttl`` seconds.  When more than ``max_entries`` rows are
+    stored the least recently read ones are evicted.  Reads do not write:
+    access times are batched and flushed with the next write.  Use
+    ``get_async``/``set_async`` from the event loop so SQLite runs in a
+    worker thread.
+    """
+
+    def __init__(self, path: str = EXPLORER_CACHE_PATH, ttl: float = EXPLORER_CACHE_TTL,
+                 negative_ttl: float = EXPLORER_CACHE_NEGATIVE_TTL,
+                 max_entries: int = EXPLORER_CACHE_MAX_ENTRIES):
+        self.path = str(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._memory = TTLCache(maxsize=min(MEMORY_ENTRIES, max_entries), ttl=ttl)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._touched: Dict[Tuple[str, str], float] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_details ("
+                "chain TEXT NOT NULL, address TEXT NOT NULL, payload TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                "PRIMARY KEY (chain, address))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_token_details_accessed "
+                "ON token_details (accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(chain: str, address: str):
+        return chain, address.lower()
+
+    def get(self, chain: str, address: str) -> Any:
+        """Return the cached payload or ``None`` on a miss."""
+        key = self._key(chain, address)
+        payload = self._memory.get(key)
+        if payload is not None:
+            return payload
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT payload, expires_at FROM token_details WHERE chain = ? AND address = ?",
+                key,
+            ).fetchone()
+            # expired rows are left for _evict() or the next set()
+            if row is None or row[1] <= now:
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                self._flush_touched(conn)
+                conn.commit()
+        payload = json.loads(row[0])
+        self._memory.set(key, payload, ttl=row[1] - now)
+        return payload
+
+    async def get_async(self, chain: str, address: str) -> Any:
+        """``get`` that only leaves the event loop on a memory miss."""
+        payload = self._memory.get(self._key(chain, address))
+        if payload is not None:
+            return payload
+        return await asyncio.to_thread(self.get, chain, address)
+
+    async def set_async(self, chain: str, address: str, payload: Any) -> None:
+        await asyncio.to_thread(self.set, chain, address, payload)
+
+    def _flush_touched(self, conn: sqlite3.Connection) -> None:
+        if self._touched:
+            conn.executemany(
+                "UPDATE token_details SET accessed_at = max(accessed_at, ?) "
+                "WHERE chain = ? AND address = ?",
+                [(at, *key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def set(self, chain: str, address: str, payload: Any) -> None:
+        ttl = self.negative_ttl if is_negative(payload) else self.ttl
+        if ttl <= 0:
+            return
+        key = self._key(chain, address)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO token_details "
+                "(chain, address, payload, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (*key, json.dumps(payload), now + ttl, now),
+            )
+            self._touched.pop(key, None)
+            self._flush_touched(conn)
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict(conn, now)
+            conn.commit()
+        self._memory.set(key, payload, ttl=ttl)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM token_details WHERE expires_at <= ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM token_details").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM token_details WHERE rowid IN ("
+                "SELECT rowid FROM token_details ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+    def evict(self) -> None:
+        """Drop expired rows and trim the cache down to ``max_entries``."""
+        with self._lock:
+            conn = self._connect()
+            self._flush_touched(conn)
+            self._evict(conn, time.time())
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touched(self._conn)
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+        self._memory.clear()
+
+
+_default_cache: Optional[TokenDetailsCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[TokenDetailsCache]:
+    """Return the process-wide cache, or ``None`` when caching is disabled."""
+    global _default_cache
+    if EXPLORER_CACHE_TTL <= 0:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = TokenDetailsCache()
+        return _default_cache
@@ -1,35 +1,244 @@
+import asyncio
+import hashlib
+import json
 import os
+from typing import Dict, List, Optional, Set, Tuple
+
 import openai
+from cherokee.cache import TTLCache
 from cherokee.llm_manager import _classify_exception, logger
+from cherokee.metrics import LLM_ERRORS
 
 # Updated for openai-python >= 1.0.0 (client API)
 client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY", ""))
 
-async def evaluate_risk(token_info: dict) -> dict:
-    """Query an LLM to provide a risk score and reasoning."""
-    if not client.api_key:
-        return {"score": 0.5, "reasoning": "No API key provided"}
+LLM_RISK_MODEL = os.getenv("LLM_RISK_MODEL", "gpt-3.5-turbo")
+LLM_RISK_CACHE_TTL = float(os.getenv("LLM_RISK_CACHE_TTL", "3600"))
+LLM_RISK_CACHE_SIZE = int(os.getenv("LLM_RISK_CACHE_SIZE", "10000"))
+# scanner tokens scored per LLM request; 1 disables batching
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "8"))
+LLM_BATCH_WINDOW = float(os.getenv("LLM_BATCH_WINDOW_MS", "250")) / 1000
+
+# successful scores keyed by a hash of (model, normalized prompt)
+_results = TTLCache(maxsize=LLM_RISK_CACHE_SIZE, ttl=LLM_RISK_CACHE_TTL)
+# calls currently awaiting the provider, shared by concurrent callers
+_inflight: Dict[str, asyncio.Task] = {}
+
 
-    prompt = (
+def _normalize(token_info: dict) -> dict:
+    info = {k: token_info[k] for k in sorted(token_info)}
+    if isinstance(info.get("address"), str):
+        info["address"] = info["address"].lower()
+    return info
+
+
+def _build_prompt(token_info: dict) -> str:
+    info = _normalize(token_info)
+    return (
         "Assess the risk of trading the following meme coin. "
         "Return a risk score from 0 (low) to 1 (high) and a short reasoning.\n"
-        f"Token: {token_info.get('name')} ({token_info.get('symbol')})\n"
-        f"Details: {token_info}"
+        f"Token: {info.get('name')} ({info.get('symbol')})\n"
+        f"Details: {info}"
     )
+
+
+def _cache_key(prompt: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\n{prompt}".encode()).hexdigest()
+
+
+async def _complete(prompt: str) -> Tuple[dict, bool]:
+    """Call the provider and return the parsed result and whether to cache it."""
     try:
         response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
+            model=LLM_RISK_MODEL,
             messages=[{"role": "user", "content": prompt}],
         )
     except Exception as exc:  # pragma: no cover - runtime errors
         code = _classify_exception(exc)
+        LLM_ERRORS.inc(code=code)
         logger.error("LLM risk provider failed: %s", exc)
-        return {"score": 0.5, "reasoning": f"{code}: {exc}"}
-    content = response.choices[0].message["content"].strip()
+        return {"score": 0.5, "reasoning": f"{code}: {exc}"}, False
+    content = (response.choices[0].message.content or "").strip()
     try:
         score_str, reason = content.split("\n", 1)
         score = float(score_str.strip())
-    except Exception:  # pragma: no cover - best effort parsing
-        score = 0.5
-        reason = content
-    return {"score": score, "reasoning": reason}
+    except ValueError:
+        # a malformed reply gets the neutral score but is not memoized, so
+        # the next lookup asks again instead of serving it for the full TTL
+        logger.error("Could not parse LLM risk response: %s", content[:200])
+        return {"score": 0.5, "reasoning": content}, False
+    return {"score": score, "reasoning": reason}, True
+
+
+def _finish(key: str, task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if task.cancelled() or task.exception() is not None:
+        return
+    result, cacheable = task.result()
+    if cacheable:
+        _results.set(key, result)
+
+
+async def evaluate_risk(token_info: dict) -> dict:
+    """Query an LLM to provide a risk score and reasoning.
+
+    Results are memoized per prompt and model, and concurrent calls for the
+    same token share a single in-flight request.
+    """
+    if not client.api_key:
+        return {"score": 0.5, "reasoning": "No API key provided"}
+
+    prompt = _build_prompt(token_info)
+    key = _cache_key(prompt, LLM_RISK_MODEL)
+    cached = _results.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(key)
+    if task is None or task.get_loop() is not loop:
+        task = loop.create_task(_complete(prompt))
+        _inflight[key] = task
+        task.add_done_callback(lambda t, key=key: _finish(key, t))
+    # shield so one caller being cancelled does not abort the shared call
+    result, _ = await asyncio.shield(task)
+    return dict(result)
+
+
+def _build_batch_prompt(tokens: List[dict]) -> str:
+    lines = [f"{i}: {_normalize(t)}" for i, t in enumerate(tokens)]
+    return (
+        "Assess the risk of trading each of the following meme coins. "
+        "For every token return a risk score from 0 (low) to 1 (high) and a short reasoning. "
+        'Respond with JSON only, in the form {"results": [{"id": <token id>, '
+        '"score": <number>, "reasoning": "<text>"}]}.\n'
+        + "\n".join(lines)
+    )
+
+
+def _parse_batch(content: str, size: int) -> Dict[int, dict]:
+    """Return the well-formed per-token results of a batch response by id."""
+    try:
+        items = json.loads(content).get("results", [])
+    except (ValueError, AttributeError):
+        logger.error("Could not parse batched LLM risk response: %s", content[:200])
+        return {}
+    parsed = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            idx = int(item["id"])
+            score = float(item["score"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= idx < size and 0.0 <= score <= 1.0:
+            parsed[idx] = {"score": score, "reasoning": str(item.get("reasoning", ""))}
+    return parsed
+
+
+async def _complete_batch(tokens: List[dict]) -> Tuple[Dict[int, dict], Optional[dict]]:
+    """Score ``tokens`` in one request, returning parsed results and any provider error."""
+    try:
+        response = await client.chat.completions.create(
+            model=LLM_RISK_MODEL,
+            messages=[{"role": "user", "content": _build_batch_prompt(tokens)}],
+            response_format={"type": "json_object"},
+        )
+    except Exception as exc:  # pragma: no cover - runtime errors
+        code = _classify_exception(exc)
+        LLM_ERRORS.inc(code=code)
+        logger.error("LLM batch risk provider failed: %s", exc)
+        return {}, {"score": 0.5, "reasoning": f"{code}: {exc}"}
+    return _parse_batch(response.choices[0].message.content or "", len(tokens)), None
+
+
+async def evaluate_risk_batch(tokens: List[dict]) -> List[dict]:
+    """Score several tokens with a single structured LLM request.
+
+    Cached tokens are answered without a request, and any token missing
+    from or malformed in the batch response is scored individually.
+    """
+    if not client.api_key:
+        return [{"score": 0.5, "reasoning": "No API key provided"} for _ in tokens]
+
+    results: List[Optional[dict]] = [None] * len(tokens)
+    keys = [_cache_key(_build_prompt(t), LLM_RISK_MODEL) for t in tokens]
+    pending = []
+    for i, key in enumerate(keys):
+        cached = _results.get(key)
+        if cached is not None:
+            results[i] = dict(cached)
+        else:
+            pending.append(i)
+
+    fallback = pending
+    if len(pending) > 1:
+        parsed, error = await _complete_batch([tokens[i] for i in pending])
+        if error is not None:
+            # a provider outage would fail every single retry as well
+            for i in pending:
+                results[i] = dict(error)
+            fallback = []
+        else:
+            fallback = []
+            for j, i in enumerate(pending):
+                if j in parsed:
+                    results[i] = parsed[j]
+                    _results.set(keys[i], parsed[j])
+                else:
+                    fallback.append(i)
+    if fallback:
+        singles = await asyncio.gather(*(evaluate_risk(tokens[i]) for i in fallback))
+        for i, result in zip(fallback, singles):
+            results[i] = result
+    return results
+
+
+class RiskBatcher:
+    """Collect concurrent risk evaluations into batched LLM requests.
+
+    A batch is sent once ``max_batch`` tokens are waiting or ``window``
+    seconds after the first token arrived, whichever comes first.
+    """
+
+    def __init__(self, max_batch: int = LLM_BATCH_SIZE, window: float = LLM_BATCH_WINDOW):
+        self.max_batch = max(1, max_batch)
+        self.window = window
+        self.batches = 0
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, token_info: dict) -> dict:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((token_info, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        try:
+            results = await evaluate_risk_batch([token for token, _ in batch])
+        except Exception as exc:  # pragma: no cover - defensive
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,58 @@
+"""Token-bucket rate limiting for block explorer APIs."""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Tuple
+
+
+class TokenBucket:
+    """Allow ``rate`` requests per second with bursts of up to ``capacity``.
+
+    Callers that exceed the budget are queued by sleeping until their slot
+    is due rather than being rejected.  The bucket does not hold any
+    event-loop bound primitives so it can be shared between loops and threads.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(endpoint: str, api_key: str, rate: float, capacity: float | None = None) -> TokenBucket:
+    """Return the shared bucket for an explorer endpoint/API key pair.
+
+    Explorer limits apply per key, so every analyzer using the same key in
+    this process draws from the same bucket.
+    """
+    with _buckets_lock:
+        bucket = _buckets.get((endpoint, api_key))
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity)
+            _buckets[(endpoint, api_key)] = bucket
+        return bucket
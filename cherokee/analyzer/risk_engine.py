@@ -1,17 +1,120 @@
+"""Feature based heuristic risk scoring for explorer token data."""
+
+import json
+import os
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FEATURES = ('holders', 'supply', 'verified', 'age', 'liquidity', 'socials')
+# every feature is a safety signal in [0, 1] that lowers the base risk
+DEFAULT_WEIGHTS = {
+    'holders': 0.2,
+    'supply': 0.05,
+    'verified': 0.15,
+    'age': 0.1,
+    'liquidity': 0.15,
+    'socials': 0.05,
+}
+BASE_RISK = float(os.getenv('RISK_BASE', '0.7'))
+LEVEL_THRESHOLDS = (0.3, 0.6, 0.9)
+LEVELS = ('Low', 'Medium', 'High', 'Critical')
+SOCIAL_FIELDS = ('website', 'twitter', 'telegram', 'discord', 'github', 'reddit', 'whitepaper')
+
+
+def _first_value(info: dict, *keys) -> float:
+    for key in keys:
+        value = info.get(key)
+        if value in (None, ''):
+            continue
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            return 1.0 if value.lower() == 'true' else 0.0
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            continue
+    return np.nan
+
+
+def _token_info(details) -> dict:
+    if isinstance(details, dict):
+        result = details.get('result')
+        if isinstance(result, list) and result and isinstance(result[0], dict):
+            return result[0]
+    return {}
+
+
+def raw_features(details, now: Optional[float] = None) -> List[float]:
+    """Return unscaled feature values for one explorer payload (NaN if missing)."""
+    info = _token_info(details)
+    now = time.time() if now is None else now
+    created = _first_value(info, 'createdAt', 'creationTimestamp')
+    age_days = _first_value(info, 'ageDays')
+    if np.isnan(age_days) and not np.isnan(created):
+        age_days = (now - created) / 86400
+    return [
+        _first_value(info, 'holdersCount', 'holders'),
+        _first_value(info, 'totalSupply'),
+        _first_value(info, 'blueCheckmark', 'verified', 'isVerified'),
+        age_days,
+        _first_value(info, 'liquidityUSD', 'liquidity'),
+        float(sum(1 for field in SOCIAL_FIELDS if info.get(field))),
+    ]
+
+
+def feature_matrix(details_list: Sequence, now: Optional[float] = None) -> np.ndarray:
+    """Scale the features of many payloads into an ``(n, len(FEATURES))`` array."""
+    raw = np.array([raw_features(d, now) for d in details_list], dtype=float).reshape(-1, len(FEATURES))
+    with np.errstate(invalid='ignore'):
+        scaled = np.column_stack([
+            np.log10(1 + np.clip(raw[:, 0], 0, None)) / 4,   # 10k holders -> 1
+            (raw[:, 1] > 0).astype(float),
+            raw[:, 2],
+            raw[:, 3] / 30,                                   # a month old -> 1
+            np.log10(1 + np.clip(raw[:, 4], 0, None)) / 6,   # $1M liquidity -> 1
+            raw[:, 5] / 3,
+        ])
+    scaled[np.isnan(raw)] = 0.0
+    return np.clip(scaled, 0.0, 1.0)
+
+
+def _load_weights() -> Dict[str, float]:
+    weights = dict(DEFAULT_WEIGHTS)
+    weights.update(json.loads(os.getenv('RISK_WEIGHTS', '{}')))
+    return weights
+
+
 class RiskEngine:
+    def __init__(self, weights: Optional[Dict[str, float]] = None, base: float = BASE_RISK):
+        weights = weights if weights is not None else _load_weights()
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"unknown risk features: {', '.join(sorted(unknown))}")
+        self.weights = np.array([weights.get(f, 0.0) for f in FEATURES], dtype=float)
+        self.base = base
+
     def score(self, token_details: dict):
-        # Simplified scoring based on available data
-        risk_score = 0.5  # Placeholder constant
-        if not token_details:
-            risk_score = 1.0
-        risk_level = self._to_level(risk_score)
-        return risk_score, risk_level
+        scores, levels = self.score_batch([token_details])
+        return float(scores[0]), levels[0]
+
+    def score_batch(self, details_list: Sequence, now: Optional[float] = None) -> Tuple[np.ndarray, List[str]]:
+        """Score many explorer payloads at once.
+
+        Returns an array of risk scores and the matching risk levels.  Empty
+        payloads are treated as maximum risk.
+        """
+        scores = np.clip(self.base - feature_matrix(details_list, now) @ self.weights, 0.0, 1.0)
+        empty = np.array([not d for d in details_list], dtype=bool)
+        scores[empty] = 1.0
+        return scores, self.to_levels(scores)
+
+    @staticmethod
+    def to_levels(scores: np.ndarray) -> List[str]:
+        indices = np.digitize(scores, LEVEL_THRESHOLDS)
+        return [LEVELS[i] for i in indices]
 
     def _to_level(self, score: float) -> str:
-        if score < 0.3:
-            return 'Low'
-        if score < 0.6:
-            return 'Medium'
-        if score < 0.9:
-            return 'High'
-        return 'Critical'
+        # same bucketing as np.digitize in the batch path
+        return LEVELS[bisect_right(LEVEL_THRESHOLDS, score)]
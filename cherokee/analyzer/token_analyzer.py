@@ -1,40 +1,145 @@
 import aiohttp
+import asyncio
 import json
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+from ..metrics import STAGE_LATENCY
+from ..tracing import span
+from .cache import get_default_cache
+from .rate_limit import get_bucket
 from .risk_engine import RiskEngine
 from .llm_risk import evaluate_risk
 
+EXPLORER_URLS = {
+    'ethereum': 'https://api.etherscan.io',
+    'bsc': 'https://api.bscscan.com',
+}
+# free explorer tiers allow 5 requests per second per API key
+EXPLORER_RATE_LIMIT = float(os.getenv('EXPLORER_RATE_LIMIT', '5'))
+EXPLORER_MAX_CONNECTIONS = int(os.getenv('EXPLORER_MAX_CONNECTIONS', '20'))
+EXPLORER_TIMEOUT = float(os.getenv('EXPLORER_TIMEOUT', '10'))
+MAX_RATE_LIMIT_RETRIES = 3
+# tiered mode only asks the LLM about tokens whose heuristic score falls in
+# [RISK_UNCERTAIN_LOW, RISK_UNCERTAIN_HIGH); the defaults match the Low and
+# Critical cut-offs of RiskEngine._to_level
+RISK_TIERED = os.getenv('RISK_TIERED', '0') == '1'
+RISK_UNCERTAIN_LOW = float(os.getenv('RISK_UNCERTAIN_LOW', '0.3'))
+RISK_UNCERTAIN_HIGH = float(os.getenv('RISK_UNCERTAIN_HIGH', '0.9'))
+
+
+class ExplorerError(RuntimeError):
+    """The explorer answered with an error instead of token data."""
+
+
+def _explorer_error(details) -> str:
+    """Why ``details`` is not a usable explorer reply, or ``''``.
+
+    A reply with an empty ``result`` list is a valid "no such token"
+    answer; an error page, an invalid key or a ``NOTOK`` reply is not.
+    """
+    if not isinstance(details, dict):
+        return 'unreadable explorer response'
+    result = details.get('result')
+    if not isinstance(result, list) or details.get('message') == 'NOTOK':
+        return f"{details.get('message', 'error')}: {str(result)[:200]}"
+    return ''
+
+
+def _is_rate_limited(status: int, data) -> bool:
+    if status == 429:
+        return True
+    return isinstance(data, dict) and 'rate limit' in str(data.get('result', '')).lower()
+
+
 class TokenAnalyzer:
-    def __init__(self, session, etherscan_api_key: str = '', bscscan_api_key: str = ''):
+    def __init__(self, session, etherscan_api_key: str = '', bscscan_api_key: str = '',
+                 rate_limit: float = EXPLORER_RATE_LIMIT, cache=None, llm_batcher=None,
+                 tiered: bool = RISK_TIERED, uncertain_low: float = RISK_UNCERTAIN_LOW,
+                 uncertain_high: float = RISK_UNCERTAIN_HIGH):
         self.session = session
+        self.llm_batcher = llm_batcher
+        self.tiered = tiered
+        self.uncertain_low = uncertain_low
+        self.uncertain_high = uncertain_high
+        # number of tokens decided by each tier: no explorer data, local
+        # heuristic only, or heuristic combined with the LLM
+        self.tier_counts = {'no_data': 0, 'heuristic': 0, 'llm': 0}
+        self.cache = cache if cache is not None else get_default_cache()
         self.etherscan_api_key = etherscan_api_key
         self.bscscan_api_key = bscscan_api_key
+        self.rate_limit = rate_limit
         self.risk_engine = RiskEngine()
+        self._client = None
+        self._client_loop = None
+
+    def _get_client(self) -> aiohttp.ClientSession:
+        """Return the pooled HTTP session, creating it on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.closed or self._client_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=EXPLORER_MAX_CONNECTIONS,
+                limit_per_host=EXPLORER_MAX_CONNECTIONS,
+                keepalive_timeout=30,
+                ttl_dns_cache=300,
+            )
+            self._client = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=EXPLORER_TIMEOUT, connect=5),
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def close(self):
+        """Close the pooled HTTP session."""
+        if self._client is not None and not self._client.closed:
+            await self._client.close()
+        self._client = None
+        self._client_loop = None
 
     async def fetch_token_details(self, address: str, chain: str):
+        """Return explorer ``tokeninfo`` data, served from cache when possible."""
+        with span('fetch_token_details', chain=chain):
+            if self.cache is not None:
+                cached = await self.cache.get_async(chain, address)
+                if cached is not None:
+                    return cached
+            with span('explorer_request', chain=chain):
+                data = await self._fetch_remote(address, chain)
+            if self.cache is not None and not _is_rate_limited(200, data):
+                await self.cache.set_async(chain, address, data)
+            return data
+
+    async def _fetch_remote(self, address: str, chain: str):
         if chain == 'bsc':
             key = self.bscscan_api_key
-            base = 'https://api.bscscan.com'
         else:
             key = self.etherscan_api_key
-            base = 'https://api.etherscan.io'
+        base = EXPLORER_URLS.get(chain, EXPLORER_URLS['ethereum'])
         url = f'{base}/api?module=token&action=tokeninfo&contractaddress={address}&apikey={key}'
-        async with aiohttp.ClientSession() as client:
+        bucket = get_bucket(base, key, self.rate_limit)
+        client = self._get_client()
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            await bucket.acquire()
             async with client.get(url) as resp:
                 try:
                     data = await resp.json(content_type=None)
                 except Exception:
-                    text = await resp.text()
-                    logger.error("Unexpected response from etherscan: %s", text[:200])
-                    return text
-                return data
+                    data = await resp.text()
+            if _is_rate_limited(resp.status, data) and attempt < MAX_RATE_LIMIT_RETRIES:
+                logger.warning("Explorer rate limit hit for %s, retrying", chain)
+                await asyncio.sleep(2 ** attempt / self.rate_limit)
+                continue
+            if isinstance(data, str):
+                logger.error("Unexpected response from etherscan: %s", data[:200])
+            return data
 
     async def analyze(self, address: str, chain: str = 'ethereum'):
         """Return token information enriched with heuristic and LLM risk."""
-        details = await self.fetch_token_details(address, chain)
+        with STAGE_LATENCY.time(stage='explorer_fetch'):
+            details = await self.fetch_token_details(address, chain)
         logger.debug("Token details type=%s content=%s", type(details), str(details)[:200])
 
         # Handle string responses (e.g. errors or HTML)
@@ -47,6 +152,7 @@ class TokenAnalyzer:
 
         name = 'Unknown'
         symbol = 'UNK'
+        first = None
         if isinstance(details, dict):
             result = details.get('result')
             if isinstance(result, list) and result:
@@ -54,13 +160,34 @@ class TokenAnalyzer:
                 name = first.get('tokenName', 'Unknown')
                 symbol = first.get('symbol', 'UNK')
 
+        if self.tiered and not first:
+            error = _explorer_error(details)
+            if error:
+                # raising lets the scanner forget the token and retry it
+                # instead of scoring an outage as "no data"
+                raise ExplorerError(f"{chain} explorer failed for {address}: {error}")
+            risk_score, risk_level = self.risk_engine.score({})
+            return self._local_result(address, chain, name, symbol, risk_score, 'no_data',
+                                      'No explorer data available')
+
         risk_score, risk_level = self.risk_engine.score(details)
-        llm = await evaluate_risk({
+        if self.tiered and not self.uncertain_low <= risk_score < self.uncertain_high:
+            return self._local_result(address, chain, name, symbol, risk_score, 'heuristic',
+                                      f'Heuristic score {risk_score:.2f} is outside the uncertainty band')
+
+        self.tier_counts['llm'] += 1
+        token_info = {
             'address': address,
             'name': name,
             'symbol': symbol,
             'chain': chain,
-        })
+        }
+        with STAGE_LATENCY.time(stage='llm_scoring'), \
+                span('evaluate_risk', batched=self.llm_batcher is not None):
+            if self.llm_batcher is not None:
+                llm = await self.llm_batcher.submit(token_info)
+            else:
+                llm = await evaluate_risk(token_info)
         combined_score = (risk_score + llm['score']) / 2
         combined_level = self.risk_engine._to_level(combined_score)
         return {
@@ -72,3 +199,16 @@ class TokenAnalyzer:
             'risk_level': combined_level,
             'llm_reasoning': llm['reasoning'],
         }
+
+    def _local_result(self, address, chain, name, symbol, risk_score, tier, reasoning):
+        """Build an analysis result decided without consulting the LLM."""
+        self.tier_counts[tier] += 1
+        return {
+            'address': address,
+            'chain': chain,
+            'name': name,
+            'symbol': symbol,
+            'risk_score': risk_score,
+            'risk_level': self.risk_engine._to_level(risk_score),
+            'llm_reasoning': reasoning,
+        }
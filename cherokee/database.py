@@ -1,25 +1,70 @@
-from sqlalchemy import create_engine, text
+import os
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = 'sqlite:///cherokee.db'
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///cherokee.db')
+# how long a SQLite writer waits for a lock held by another process
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
-Base = declarative_base()
 
+def make_engine(url: str):
+    """Create an engine; SQLite files use WAL so several processes can share them."""
+    engine = create_engine(url)
+    if engine.dialect.name == 'sqlite' and ':memory:' not in url:
+        @event.listens_for(engine, 'connect')
+        def _configure_sqlite(dbapi_conn, _record):
+            cursor = dbapi_conn.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+            cursor.close()
+    return engine
 
-def ensure_schema():
-    """Add missing columns if the database was created with an older version."""
-    with engine.begin() as conn:
-        res = conn.execute(text("PRAGMA table_info(tokens)")).fetchall()
-        columns = [r[1] for r in res]
-        if "llm_reasoning" not in columns:
-            conn.execute(text("ALTER TABLE tokens ADD COLUMN llm_reasoning TEXT"))
+
+engine = make_engine(DATABASE_URL)
+SessionLocal = sessionmaker(bind=engine)
+Base = declarative_base()
 
 
 def init_db():
+    """Create missing tables and apply pending schema migrations."""
+    from . import models  # noqa: F401  registers the tables on Base
+    from .migrations import run_migrations
+
     Base.metadata.create_all(bind=engine)
-    ensure_schema()
+    run_migrations(engine)
+
+
+def upsert_tokens(rows):
+    """Insert or update token rows by address in a single transaction."""
+    from .models import Token
+
+    if engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = Token.__table__
+    columns = {c.name for c in table.columns} - {'id'}
+    # later results for the same address win; SQLite refuses to update the
+    # same row twice within one statement
+    latest = {}
+    for row in rows:
+        latest[row['address']] = {k: v for k, v in row.items() if k in columns}
+    groups = {}
+    for row in latest.values():
+        groups.setdefault(frozenset(row), []).append(row)
+    with engine.begin() as conn:
+        for keys, values in groups.items():
+            stmt = insert(table)
+            updates = {k: stmt.excluded[k] for k in keys if k not in ('address', 'detected_at')}
+            if updates:
+                stmt = stmt.on_conflict_do_update(index_elements=['address'], set_=updates)
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=['address'])
+            conn.execute(stmt, values)
+    return len(latest)
 
 
 def populate_sample_data():
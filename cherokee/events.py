@@ -0,0 +1,122 @@
+"""In-process event bus fanning token, trade and bot state deltas out to SSE clients.
+
+Every event gets an increasing id and the last ``replay_size`` events are
+kept, so a client reconnecting with ``Last-Event-ID`` receives what it
+missed.  Each subscriber has a bounded queue; a subscriber that falls too
+far behind is disconnected and catches up from the replay buffer when it
+reconnects.
+
+Other processes publish through ``POST /api/events/publish`` by sending the
+shared ``EVENTS_TOKEN`` in the ``X-Events-Token`` header; without a token
+configured the endpoint accepts nothing.
+"""
+
+import itertools
+import json
+import os
+import queue
+import threading
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+EVENTS_REPLAY_SIZE = int(os.getenv('EVENTS_REPLAY_SIZE', '1000'))
+SUBSCRIBER_QUEUE_SIZE = 1000
+HEARTBEAT_INTERVAL = 15.0
+# shared secret for /api/events/publish; empty disables the endpoint
+EVENTS_TOKEN = os.getenv('EVENTS_TOKEN', '')
+EVENTS_TOKEN_HEADER = 'X-Events-Token'
+
+Event = Dict[str, Any]
+
+
+class EventBus:
+    def __init__(self, replay_size: int = EVENTS_REPLAY_SIZE):
+        self._ids = itertools.count(1)
+        self._history: deque = deque(maxlen=replay_size)
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def publish(self, event_type: str, data: Any) -> int:
+        with self._lock:
+            event = {'id': next(self._ids), 'type': event_type, 'data': data}
+            self._history.append(event)
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                self._disconnect(subscriber)
+        return event['id']
+
+    def _disconnect(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+                self.dropped_subscribers += 1
+        # wake the stream so it ends; the client reconnects and replays
+        while True:
+            try:
+                subscriber.put_nowait(None)
+                return
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def subscribe(self, last_id: Optional[int] = None) -> Tuple[List[Event], queue.Queue]:
+        """Register a subscriber and return the events it missed after ``last_id``."""
+        subscriber: queue.Queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            if last_id is None:
+                replay = []
+            elif self._history and last_id > self._history[-1]['id']:
+                # ids restarted with the API process: everything is new
+                replay = list(self._history)
+            else:
+                replay = [e for e in self._history if e['id'] > last_id]
+            self._subscribers.append(subscriber)
+        return replay, subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def stream(self, last_id: Optional[int] = None, heartbeat: float = HEARTBEAT_INTERVAL) -> Iterator[str]:
+        """Yield Server-Sent Events text, starting with the replay."""
+        replay, subscriber = self.subscribe(last_id)
+        try:
+            yield 'retry: 3000\n\n'
+            for event in replay:
+                yield format_sse(event)
+            while True:
+                try:
+                    event = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    # keeps proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                if event is None:
+                    return
+                yield format_sse(event)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'published': self.published,
+            'subscribers': len(self._subscribers),
+            'dropped_subscribers': self.dropped_subscribers,
+        }
+
+
+def format_sse(event: Event) -> str:
+    data = json.dumps(event['data'], default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+EVENT_BUS = EventBus()
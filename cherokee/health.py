@@ -0,0 +1,177 @@
+"""Background health probes for the services the API depends on.
+
+A daemon thread checks each target on its own interval and keeps the last
+known status, when it was checked, when it was last healthy and a short
+latency history.  ``/api/service-status`` answers from that snapshot, so a
+status poll never waits on a service that is down.
+
+The scanner is always probed.  The LLM provider and the block explorers are
+external, rate limited APIs; they are only probed when
+``HEALTH_PROBE_EXTERNAL=1`` and their API key is configured.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+SCANNER_HEALTH_URL = os.getenv('SCANNER_HEALTH_URL', 'http://127.0.0.1:5001/healthz')
+HEALTH_PROBE_INTERVAL = float(os.getenv('HEALTH_PROBE_INTERVAL', '5'))
+HEALTH_PROBE_EXTERNAL = os.getenv('HEALTH_PROBE_EXTERNAL', '0') == '1'
+HEALTH_PROBE_EXTERNAL_INTERVAL = float(os.getenv('HEALTH_PROBE_EXTERNAL_INTERVAL', '60'))
+HEALTH_PROBE_TIMEOUT = 2.0
+LATENCY_HISTORY = 60
+
+
+@dataclass
+class Target:
+    """A named check; ``check`` raises or returns False when unhealthy."""
+
+    name: str
+    check: Callable[[], Optional[bool]]
+    interval: float = HEALTH_PROBE_INTERVAL
+
+
+class ServiceStatus:
+    def __init__(self, name: str):
+        self.name = name
+        self.status = 'unknown'
+        self.checked_at: Optional[float] = None
+        self.last_ok_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.history: deque = deque(maxlen=LATENCY_HISTORY)
+
+    def record(self, ok: bool, latency_ms: float, error: Optional[str], now: float) -> None:
+        self.status = 'ok' if ok else 'down'
+        self.checked_at = now
+        self.latency_ms = latency_ms
+        self.error = error
+        if ok:
+            self.last_ok_at = now
+        self.history.append((now, round(latency_ms, 2), ok))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'status': self.status,
+            'checked_at': self.checked_at,
+            'last_ok_at': self.last_ok_at,
+            'latency_ms': self.latency_ms,
+            'error': self.error,
+            'history': [
+                {'at': at, 'latency_ms': latency, 'ok': ok} for at, latency, ok in self.history
+            ],
+        }
+
+
+class HealthProber:
+    """Run ``targets`` on their intervals in a daemon thread."""
+
+    def __init__(self, targets: List[Target]):
+        self.targets = targets
+        self._status = {t.name: ServiceStatus(t.name) for t in targets}
+        self._due = {t.name: 0.0 for t in targets}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=HEALTH_PROBE_TIMEOUT + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.probe_due()
+            wait = min(self._due.values(), default=time.monotonic() + 1) - time.monotonic()
+            self._stop.wait(max(0.05, wait))
+
+    def probe_due(self) -> None:
+        """Run every target whose interval has elapsed."""
+        for target in self.targets:
+            if time.monotonic() >= self._due[target.name]:
+                self.probe(target)
+
+    def probe(self, target: Target) -> None:
+        start = time.perf_counter()
+        try:
+            ok = target.check() is not False
+            error = None if ok else 'unhealthy'
+        except Exception as exc:
+            ok, error = False, f'{type(exc).__name__}: {exc}'
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._status[target.name].record(ok, latency_ms, error, time.time())
+        self._due[target.name] = time.monotonic() + target.interval
+        if not ok:
+            logger.debug('Health check %s failed: %s', target.name, error)
+
+    def status(self, name: str) -> str:
+        with self._lock:
+            return self._status[name].status if name in self._status else 'unknown'
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: status.to_dict() for name, status in self._status.items()}
+
+
+def _http_check(url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                expect: Optional[Callable[[Any], bool]] = None) -> Callable[[], bool]:
+    def check() -> bool:
+        resp = requests.get(url, params=params, headers=headers, timeout=HEALTH_PROBE_TIMEOUT)
+        resp.raise_for_status()
+        return expect(resp.json()) if expect else True
+    return check
+
+
+def default_targets() -> List[Target]:
+    from .analyzer.token_analyzer import EXPLORER_URLS
+
+    targets = [Target('scanner', _http_check(
+        SCANNER_HEALTH_URL, expect=lambda body: body.get('status') == 'ok'))]
+    if not HEALTH_PROBE_EXTERNAL:
+        return targets
+    openai_key = os.getenv('OPENAI_API_KEY')
+    if openai_key:
+        targets.append(Target('openai', _http_check(
+            'https://api.openai.com/v1/models',
+            headers={'Authorization': f'Bearer {openai_key}'},
+        ), HEALTH_PROBE_EXTERNAL_INTERVAL))
+    keys = {'ethereum': 'ETHERSCAN_API_KEY', 'bsc': 'BSC_SCAN_API_KEY'}
+    for chain, url in EXPLORER_URLS.items():
+        api_key = os.getenv(keys.get(chain, ''))
+        if api_key:
+            targets.append(Target(f'explorer_{chain}', _http_check(
+                f'{url}/api',
+                params={'module': 'proxy', 'action': 'eth_blockNumber', 'apikey': api_key},
+                expect=lambda body: 'result' in body and body.get('status') != '0',
+            ), HEALTH_PROBE_EXTERNAL_INTERVAL))
+    return targets
+
+
+_PROBER: Optional[HealthProber] = None
+_PROBER_LOCK = threading.Lock()
+
+
+def get_prober() -> HealthProber:
+    """Return the process-wide prober, starting it if it is not running yet."""
+    global _PROBER
+    with _PROBER_LOCK:
+        if _PROBER is None:
+            _PROBER = HealthProber(default_targets())
+            _PROBER.start()
+        return _PROBER
@@ -1 +1,4 @@
 from .base_listener import BaseListener
+from .registry import LISTENER_TYPES, create_listeners, load_listener_config, register_listener
+from .supervisor import ListenerSupervisor
+from . import file_listener, http_push, polling, replay  # noqa: F401 - register built-in listeners
@@ -1,17 +1,43 @@
 import asyncio
 import random
+import time
+
+from ..scanner.stats import RateCounter
+
 
 class BaseListener:
-    def __init__(self, queue):
+    """Token detection source.
+
+    Subclasses override :meth:`start` and call :meth:`emit` for every
+    detected token.  The base implementation simulates a detection every
+    ``interval`` seconds.
+    """
+
+    source = 'synthetic'
+
+    def __init__(self, queue, name: str | None = None, interval: float = 5.0):
         self.queue = queue
+        self.name = name or self.source
+        self.interval = interval
+        self.emitted = 0
+        self._rate = RateCounter()
+
+    async def emit(self, token: dict):
+        """Tag ``token`` with this source and hand it to the scanner queue."""
+        token.setdefault('chain', 'ethereum')
+        token.setdefault('detected_at', time.time())
+        token['source'] = self.name
+        await self.queue.put(token)
+        self.emitted += 1
+        self._rate.add()
+
+    def rate(self) -> float:
+        """Return events per second emitted over the last minute."""
+        return self._rate.rate()
 
     async def start(self):
         while True:
             # Simulate detection of new token every few seconds
-            await asyncio.sleep(5)
+            await asyncio.sleep(self.interval)
             address = hex(random.getrandbits(160))
-            token = {
-                'address': address,
-                'chain': 'ethereum'
-            }
-            await self.queue.put(token)
+            await self.emit({'address': address, 'chain': 'ethereum'})
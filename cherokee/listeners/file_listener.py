@@ -0,0 +1,49 @@
+import asyncio
+import json
+import logging
+
+from .base_listener import BaseListener
+from .registry import register_listener
+
+logger = logging.getLogger(__name__)
+
+
+@register_listener('file')
+class FileListener(BaseListener):
+    """Read JSONL detection events from a file, optionally following appends."""
+
+    source = 'file'
+
+    def __init__(self, queue, name: str | None = None, path: str = '', follow: bool = True,
+                 interval: float = 1.0):
+        super().__init__(queue, name=name, interval=interval)
+        if not path:
+            raise ValueError("file listener requires a path")
+        self.path = path
+        self.follow = follow
+        self.offset = 0
+
+    async def start(self):
+        while True:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                for line in f:
+                    if not line.endswith(b'\n') and self.follow:
+                        break  # partially written line, re-read it later
+                    self.offset += len(line)
+                    await self._emit_line(line.decode('utf-8', errors='replace'))
+            if not self.follow:
+                return
+            await asyncio.sleep(self.interval)
+
+    async def _emit_line(self, line: str):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning("Skipping malformed event in %s: %s", self.path, line[:200])
+            return
+        if isinstance(event, dict) and event.get('address'):
+            await self.emit({'address': event['address'], 'chain': event.get('chain', 'ethereum')})
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+
+from aiohttp import web
+
+from .base_listener import BaseListener
+from .registry import register_listener
+
+logger = logging.getLogger(__name__)
+
+
+@register_listener('http')
+class HttpPushListener(BaseListener):
+    """Accept detection events pushed to ``POST /events`` as an object or list."""
+
+    source = 'http'
+
+    def __init__(self, queue, name: str | None = None, host: str = '127.0.0.1', port: int = 5002):
+        super().__init__(queue, name=name)
+        self.host = host
+        self.port = port
+
+    async def handle_events(self, request):
+        try:
+            payload = await request.json()
+        except Exception:
+            return web.json_response({'error': 'invalid json'}, status=400)
+        events = payload if isinstance(payload, list) else [payload]
+        accepted = 0
+        for event in events:
+            if isinstance(event, dict) and event.get('address'):
+                await self.emit({'address': event['address'], 'chain': event.get('chain', 'ethereum')})
+                accepted += 1
+        return web.json_response({'accepted': accepted})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post('/events', self.handle_events)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
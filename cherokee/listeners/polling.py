@@ -0,0 +1,43 @@
+import asyncio
+import logging
+
+import aiohttp
+
+from .base_listener import BaseListener
+from .registry import register_listener
+
+logger = logging.getLogger(__name__)
+
+
+@register_listener('polling')
+class PollingListener(BaseListener):
+    """Poll an HTTP endpoint returning a JSON list of ``{address, chain}`` events."""
+
+    source = 'polling'
+
+    def __init__(self, queue, name: str | None = None, url: str = '', interval: float = 10.0,
+                 chain: str = 'ethereum'):
+        super().__init__(queue, name=name, interval=interval)
+        if not url:
+            raise ValueError("polling listener requires a url")
+        self.url = url
+        self.chain = chain
+        self._seen = set()
+
+    async def start(self):
+        timeout = aiohttp.ClientTimeout(total=max(self.interval, 5))
+        async with aiohttp.ClientSession(timeout=timeout) as client:
+            while True:
+                async with client.get(self.url) as resp:
+                    resp.raise_for_status()
+                    events = await resp.json(content_type=None)
+                for event in events if isinstance(events, list) else []:
+                    address = event.get('address') if isinstance(event, dict) else None
+                    # feeds usually return a sliding window of recent events
+                    if not address or address in self._seen:
+                        continue
+                    self._seen.add(address)
+                    await self.emit({'address': address, 'chain': event.get('chain', self.chain)})
+                if len(self._seen) > 100_000:
+                    self._seen.clear()
+                await asyncio.sleep(self.interval)
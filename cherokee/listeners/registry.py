@@ -0,0 +1,46 @@
+"""Registry mapping listener config ``type`` names to listener classes."""
+
+import json
+import os
+from typing import Dict, List, Type
+
+from .base_listener import BaseListener
+
+LISTENER_TYPES: Dict[str, Type[BaseListener]] = {'synthetic': BaseListener}
+
+DEFAULT_LISTENERS = '[{"type": "synthetic"}]'
+
+
+def register_listener(name: str):
+    """Class decorator registering a listener under ``name``."""
+    def decorator(cls):
+        LISTENER_TYPES[name] = cls
+        return cls
+    return decorator
+
+
+def load_listener_config() -> List[dict]:
+    """Return listener configs from ``SCANNER_LISTENERS`` (a JSON list)."""
+    return json.loads(os.getenv('SCANNER_LISTENERS', DEFAULT_LISTENERS))
+
+
+def create_listeners(queue, configs: List[dict]) -> List[BaseListener]:
+    """Instantiate one listener per config entry.
+
+    Every entry needs a registered ``type``; ``name`` (defaulting to the
+    type) tags emitted events and the remaining keys are passed to the
+    listener's constructor.
+    """
+    listeners = []
+    names = set()
+    for config in configs:
+        options = dict(config)
+        kind = options.pop('type', None)
+        if kind not in LISTENER_TYPES:
+            raise ValueError(f"unknown listener type: {kind}")
+        name = options.pop('name', kind)
+        if name in names:
+            raise ValueError(f"duplicate listener name: {name}")
+        names.add(name)
+        listeners.append(LISTENER_TYPES[kind](queue, name=name, **options))
+    return listeners
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from .base_listener import BaseListener
+from .registry import register_listener
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_timestamp(value) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+@register_listener('replay')
+class ReplayListener(BaseListener):
+    """Replay a recorded JSONL stream of ``{timestamp, address, chain}`` events.
+
+    ``speed`` scales the recorded gaps between events: ``1`` replays in
+    real time, ``10`` ten times faster and ``0`` as fast as possible.
+    Emitted events get a fresh ``detected_at`` so scanner latency is
+    measured from the replayed detection; the original time is kept as
+    ``recorded_at``.
+    """
+
+    source = 'replay'
+
+    def __init__(self, queue, name: str | None = None, path: str = '', speed: float = 1.0):
+        super().__init__(queue, name=name)
+        if not path:
+            raise ValueError("replay listener requires a path")
+        if speed < 0:
+            raise ValueError("speed must be >= 0")
+        self.path = path
+        self.speed = speed
+        self.finished_at: float | None = None
+
+    async def start(self):
+        started = time.monotonic()
+        first_recorded = None
+        with open(self.path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                    recorded = _parse_timestamp(event.get('timestamp'))
+                except (ValueError, AttributeError):
+                    logger.warning("Skipping malformed replay event: %s", line[:200])
+                    continue
+                if not event.get('address'):
+                    continue
+                if self.speed > 0 and recorded is not None:
+                    if first_recorded is None:
+                        first_recorded = recorded
+                    due = started + (recorded - first_recorded) / self.speed
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await self.emit({
+                    'address': event['address'],
+                    'chain': event.get('chain', 'ethereum'),
+                    'recorded_at': recorded,
+                })
+        self.finished_at = time.time()
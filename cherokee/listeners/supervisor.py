@@ -0,0 +1,75 @@
+"""Run several listeners side by side, restarting any that crash."""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+from .base_listener import BaseListener
+
+logger = logging.getLogger(__name__)
+
+
+class ListenerSupervisor:
+    """Fan detection events from many listeners into one scanner queue.
+
+    Each listener runs in its own task.  A listener that raises is logged
+    and restarted with exponential backoff without affecting the others;
+    the backoff starts over once a listener ran longer than ``max_backoff``.
+    One that returns normally (e.g. a finite replay) is left stopped.
+    """
+
+    def __init__(self, listeners: List[BaseListener], max_backoff: float = 60.0,
+                 min_backoff: float = 1.0):
+        self.listeners = listeners
+        self.max_backoff = max_backoff
+        self.min_backoff = min_backoff
+        self.restarts: Dict[str, int] = {l.name: 0 for l in listeners}
+        self.backoff: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    async def _run(self, listener: BaseListener) -> None:
+        backoff = self.min_backoff
+        while True:
+            started = time.monotonic()
+            try:
+                await listener.start()
+                logger.info("Listener %s finished", listener.name)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if time.monotonic() - started > self.max_backoff:
+                    # a crash after a healthy run is not part of a crash loop
+                    backoff = self.min_backoff
+                self.restarts[listener.name] += 1
+                self.errors[listener.name] = f"{type(exc).__name__}: {exc}"
+                self.backoff[listener.name] = backoff
+                logger.exception("Listener %s crashed, restarting in %.0fs", listener.name, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def run(self) -> None:
+        """Run every listener until all of them have finished."""
+        self._tasks = [
+            asyncio.create_task(self._run(l), name=f"listener-{l.name}") for l in self.listeners
+        ]
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            l.name: {
+                'events': l.emitted,
+                'rate_per_s': round(l.rate(), 3),
+                'restarts': self.restarts[l.name],
+                'backoff_s': self.backoff.get(l.name),
+                'last_error': self.errors.get(l.name),
+            }
+            for l in self.listeners
+        }
@@ -0,0 +1,169 @@
+"""Read the end of growing log files without loading them into memory.
+
+``tail`` seeks to the end of a file and reads backwards in blocks until it
+has enough lines, so its cost depends on the lines returned, not the size
+of the file.  ``follow`` returns the complete lines appended after a
+cursor.  A cursor is ``"<inode>:<offset>"``: when the inode changes (the
+file was rotated) or the file shrank below the offset (it was truncated)
+reading restarts at the beginning of the new file.
+"""
+
+import json
+import os
+import re
+import time
+from typing import Iterator, List, Optional, Tuple
+
+BLOCK_SIZE = 8192
+# upper bound on bytes scanned backwards when a filter matches rarely
+MAX_SCAN_BYTES = 8 * 1024 * 1024
+# upper bound on bytes returned by one follow read
+MAX_FOLLOW_BYTES = 1024 * 1024
+# seconds between checks for new lines in stream mode
+FOLLOW_INTERVAL = 0.5
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+_LEVEL = re.compile(r'\b(DEBUG|INFO|WARNING|WARN|ERROR|CRITICAL|FATAL)\b')
+_ALIASES = {'WARN': 'WARNING', 'FATAL': 'CRITICAL'}
+
+
+class LineFilter:
+    """Keep lines at or above ``level`` that contain ``text`` (case-insensitive).
+
+    Lines without a level name, such as traceback lines, take the level of
+    the line before them.
+    """
+
+    def __init__(self, level: Optional[str] = None, text: Optional[str] = None):
+        level = _ALIASES.get(level.upper(), level.upper()) if level else None
+        if level is not None and level not in LEVELS:
+            raise ValueError(f"level must be one of: {', '.join(LEVELS)}")
+        self.min_level = LEVELS.index(level) if level else None
+        self.text = text.lower() if text else None
+
+    @property
+    def active(self) -> bool:
+        return self.min_level is not None or self.text is not None
+
+    @staticmethod
+    def level_of(line: str) -> Optional[int]:
+        match = _LEVEL.search(line)
+        if match is None:
+            return None
+        return LEVELS.index(_ALIASES.get(match.group(1), match.group(1)))
+
+    def apply(self, lines: List[str], level: Optional[int] = None) -> List[str]:
+        """Filter ``lines`` in file order; ``level`` is the level before the first line."""
+        if not self.active:
+            return lines
+        kept = []
+        for line in lines:
+            found = self.level_of(line)
+            if found is not None:
+                level = found
+            if self.min_level is not None and (level is None or level < self.min_level):
+                continue
+            if self.text is not None and self.text not in line.lower():
+                continue
+            kept.append(line)
+        return kept
+
+
+def make_cursor(stat: os.stat_result, offset: int) -> str:
+    return f'{stat.st_ino}:{offset}'
+
+
+def parse_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        inode, offset = cursor.split(':')
+        return int(inode), int(offset)
+    except ValueError:
+        raise ValueError('invalid cursor')
+
+
+def tail(path: str, lines: int = 50, line_filter: Optional[LineFilter] = None) -> Tuple[List[str], str]:
+    """Return the last ``lines`` (matching) lines of ``path`` and a follow cursor."""
+    line_filter = line_filter or LineFilter()
+    found: List[str] = []
+    # lines at the start of the region read so far whose level is only known
+    # once older lines have been read
+    head: List[str] = []
+    carry = b''
+    # the file's last line (unterminated, or '' after the final newline)
+    # arrives with the first region that has any lines, which is not the
+    # first block read when that line is longer than a block
+    last_pending = True
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        end = position = stat.st_size
+        while lines > 0 and position > 0 and end - position < MAX_SCAN_BYTES:
+            step = min(BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            parts = (f.read(step) + carry).split(b'\n')
+            carry = parts.pop(0) if position > 0 else b''
+            region = [p.decode('utf-8', 'replace') + '\n' for p in parts]
+            if last_pending and region:
+                # the last line has no newline yet (or is the empty string after it)
+                last = region.pop()[:-1]
+                if last:
+                    region.append(last)
+                last_pending = False
+            region += head
+            head = []
+            if line_filter.min_level is not None:
+                first = next((i for i, line in enumerate(region)
+                              if line_filter.level_of(line) is not None), len(region))
+                head, region = region[:first], region[first:]
+            found = line_filter.apply(region) + found
+            if len(found) >= lines:
+                break
+        else:
+            found = line_filter.apply(head) + found
+    return found[max(0, len(found) - lines):], make_cursor(stat, end)
+
+
+def follow(path: str, cursor: str, line_filter: Optional[LineFilter] = None,
+           max_bytes: int = MAX_FOLLOW_BYTES) -> Tuple[List[str], str]:
+    """Return complete lines appended after ``cursor`` and the cursor after them."""
+    inode, offset = parse_cursor(cursor)
+    line_filter = line_filter or LineFilter()
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_ino != inode or stat.st_size < offset:
+            offset = 0  # rotated or truncated: read the new file from the start
+        f.seek(offset)
+        data = f.read(max_bytes)
+    # hold back a trailing partial line until it is complete
+    complete = data[:data.rfind(b'\n') + 1]
+    if not complete and len(data) == max_bytes:
+        complete = data  # a single huge line
+    lines = [line + '\n' for line in complete.decode('utf-8', 'replace').split('\n')[:-1]]
+    return line_filter.apply(lines), make_cursor(stat, offset + len(complete))
+
+
+def stream_follow(path: str, cursor: str, line_filter: Optional[LineFilter] = None,
+                  interval: float = FOLLOW_INTERVAL, heartbeat: float = 15.0) -> Iterator[str]:
+    """Yield Server-Sent Events with the lines appended to ``path`` after ``cursor``.
+
+    Each ``lines`` event carries ``{"lines": [...], "cursor": ...}`` and uses
+    the cursor as its id, so a reconnecting client resumes with
+    ``Last-Event-ID``.
+    """
+    yield 'retry: 3000\n\n'
+    idle = 0.0
+    while True:
+        try:
+            lines, cursor = follow(path, cursor, line_filter)
+        except FileNotFoundError:
+            lines = []  # between rotation and the new file being created
+        if lines:
+            idle = 0.0
+            data = json.dumps({'lines': lines, 'cursor': cursor})
+            yield f'id: {cursor}\nevent: lines\ndata: {data}\n\n'
+            continue
+        if idle >= heartbeat:
+            idle = 0.0
+            yield ': keep-alive\n\n'
+        time.sleep(interval)
+        idle += interval
@@ -0,0 +1,112 @@
+"""Versioned schema migrations run by ``init_db()``.
+
+Applied versions are recorded in the ``schema_version`` table and every
+pending migration runs once, in order, in its own transaction.  Each
+transaction takes the database write lock first and re-reads the applied
+versions inside it, so the API and the scanner can start at the same
+time without both applying a migration.  New
+databases get their tables from ``Base.metadata.create_all`` first, so
+migrations must tolerate objects that already exist.
+"""
+
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+Migration = Tuple[int, str, Callable]
+
+# pg_advisory_xact_lock key serializing migration runners on PostgreSQL
+MIGRATION_LOCK_KEY = 0x636865726F6B6565
+
+
+def _add_llm_reasoning(conn) -> None:
+    columns = [c['name'] for c in inspect(conn).get_columns('tokens')]
+    if 'llm_reasoning' not in columns:
+        conn.execute(text("ALTER TABLE tokens ADD COLUMN llm_reasoning TEXT"))
+
+
+# (name, table, columns) of the indexes serving the list endpoints; they
+# are also declared on the models for new databases
+HOT_PATH_INDEXES = (
+    ('ix_tokens_detected_at', 'tokens', 'detected_at'),
+    ('ix_tokens_risk_level_detected_at', 'tokens', 'risk_level, detected_at'),
+    ('ix_tokens_risk_score', 'tokens', 'risk_score'),
+    ('ix_trades_timestamp', 'trades', 'timestamp'),
+    ('ix_trades_token_address_timestamp', 'trades', 'token_address, timestamp'),
+)
+
+
+def _add_hot_path_indexes(conn) -> None:
+    for name, table, columns in HOT_PATH_INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _add_search_index(conn) -> None:
+    from .search import ensure_search_index
+
+    ensure_search_index(conn)
+
+
+MIGRATIONS: List[Migration] = [
+    (1, 'add tokens.llm_reasoning', _add_llm_reasoning),
+    (2, 'add hot path indexes', _add_hot_path_indexes),
+    (3, 'add token search index', _add_search_index),
+    (4, 'add token trigram index', _add_search_index),
+]
+
+
+def applied_versions(conn) -> List[int]:
+    return [row[0] for row in conn.execute(text("SELECT version FROM schema_version ORDER BY version"))]
+
+
+@contextmanager
+def _exclusive(engine):
+    """Yield a connection in a transaction that holds the migration lock."""
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            # pysqlite defers BEGIN until the first write; take the write
+            # lock up front so reads inside the transaction stay current
+            conn.execution_options(isolation_level='AUTOCOMMIT')
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.exec_driver_sql('ROLLBACK')
+                raise
+            conn.exec_driver_sql('COMMIT')
+            return
+        with conn.begin():
+            if engine.dialect.name == 'postgresql':
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+            yield conn
+
+
+def run_migrations(engine, migrations: List[Migration] = MIGRATIONS) -> List[int]:
+    """Apply pending migrations and return the versions that were run."""
+    with _exclusive(engine) as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+        done = set(applied_versions(conn))
+    ran = []
+    for version, name, migrate in sorted(migrations, key=lambda m: m[0]):
+        if version in done:
+            continue
+        with _exclusive(engine) as conn:
+            if version in applied_versions(conn):
+                # another process (e.g. the API next to the scanner) applied it first
+                continue
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {'v': version, 'n': name, 't': datetime.utcnow()},
+            )
+        logger.info("Applied schema migration %s: %s", version, name)
+        ran.append(version)
+    return ran
@@ -1,10 +1,16 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index
 from .database import Base
 import logging
 
 class Token(Base):
     __tablename__ = 'tokens'
+    # kept in step with migrations.HOT_PATH_INDEXES
+    __table_args__ = (
+        Index('ix_tokens_detected_at', 'detected_at'),
+        Index('ix_tokens_risk_level_detected_at', 'risk_level', 'detected_at'),
+        Index('ix_tokens_risk_score', 'risk_score'),
+    )
 
     id = Column(Integer, primary_key=True)
     address = Column(String, unique=True, index=True)
@@ -51,6 +57,10 @@ class Trade(Base):
     """Database model representing both paper and live trades."""
 
     __tablename__ = 'trades'
+    __table_args__ = (
+        Index('ix_trades_timestamp', 'timestamp'),
+        Index('ix_trades_token_address_timestamp', 'token_address', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True)
     token_address = Column(String, index=True)
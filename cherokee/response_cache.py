@@ -0,0 +1,95 @@
+"""In-process cache of serialized responses with ETags and conditional GET.
+
+Bodies are serialized and gzip-compressed once per version of their
+source and served as-is afterwards.  Clients sending a matching
+``If-None-Match`` get an empty ``304 Not Modified``.  ``json_file_response``
+versions a JSON file by its mtime and size; other read-mostly endpoints
+can call ``RESPONSE_CACHE.response`` with any version token that changes
+when their data does.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from flask import Response, current_app, request
+
+# bodies smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+
+
+class CachedBody:
+    __slots__ = ('body', 'gzipped', 'etag', 'mimetype')
+
+    def __init__(self, body: bytes, mimetype: str):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        compressed = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= GZIP_MIN_SIZE else None
+        self.gzipped = compressed if compressed is not None and len(compressed) < len(body) else None
+
+
+class ResponseCache:
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Hashable, CachedBody]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable, producer: Callable[[], Any],
+            mimetype: str = 'application/json') -> CachedBody:
+        """Return the cached body for ``key``, rebuilding it when ``version`` changed.
+
+        ``producer`` returns bytes, or data that is serialized like ``jsonify``.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        data = producer()
+        body = data if isinstance(data, bytes) else current_app.json.dumps(data).encode() + b'\n'
+        cached = CachedBody(body, mimetype)
+        with self._lock:
+            self._entries[key] = (version, cached)
+        return cached
+
+    def response(self, key: Hashable, version: Hashable, producer: Callable[[], Any],
+                 mimetype: str = 'application/json') -> Response:
+        return conditional_response(self.get(key, version, producer, mimetype))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def conditional_response(cached: CachedBody) -> Response:
+    """Serve ``cached`` gzip-encoded when accepted, or 304 when the ETag matches."""
+    use_gzip = cached.gzipped is not None and request.accept_encodings['gzip'] > 0
+    # each encoding is a separate representation with its own strong ETag
+    etag = f'{cached.etag}-gzip' if use_gzip else cached.etag
+    if request.if_none_match.contains_weak(cached.etag) or request.if_none_match.contains_weak(f'{cached.etag}-gzip'):
+        resp = Response(status=304)
+    else:
+        resp = Response(cached.gzipped if use_gzip else cached.body, mimetype=cached.mimetype)
+        if use_gzip:
+            resp.headers['Content-Encoding'] = 'gzip'
+    resp.set_etag(etag)
+    resp.headers['Vary'] = 'Accept-Encoding'
+    # browsers may keep the body but must revalidate it on every use
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def json_file_response(path) -> Response:
+    """Serve a JSON file, re-reading it only after it changes on disk."""
+    path = os.fspath(path)
+    stat = os.stat(path)
+
+    def load():
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    return RESPONSE_CACHE.response(('file', path), (stat.st_mtime_ns, stat.st_size), load)
@@ -1,55 +1,224 @@
+import argparse
 import asyncio
+import json
+import math
 import os
+import signal
 from aiohttp import web
-from .listeners import BaseListener
+from .listeners import ListenerSupervisor, create_listeners, load_listener_config
+from .analyzer.llm_risk import LLM_BATCH_SIZE, RiskBatcher
 from .analyzer.token_analyzer import TokenAnalyzer
-from .database import SessionLocal, init_db
-from .models import Token
+from . import database, tracing
+from .database import DATABASE_URL, init_db
+from .events import EVENTS_TOKEN
+from .metrics import CONTENT_TYPE, QUEUE_DEPTH, REGISTRY, TOKENS_PER_SECOND
+from .scanner.journal import SCANNER_QUEUE_PATH, open_journal
+from .scanner.dedup import SeenFilter, recent_tokens
+from .scanner.pipeline import ScannerPipeline
+from .scanner.publisher import EVENTS_URL, EventPublisher
+from .scanner.scheduler import PriorityScheduler
+from .scanner.sharding import SCANNER_SHARDS, InboxListener, run_sharded
+from .scanner.workers import WorkerPool, DEFAULT_WORKERS, DEFAULT_QUEUE_SIZE
+from .scanner.writer import TokenWriter
 from .trading import PaperTrader
 
-async def main():
+# replays write their synthetic tokens here, never to DATABASE_URL
+REPLAY_DATABASE_URL = os.getenv('REPLAY_DATABASE_URL', 'sqlite:///cherokee_replay.db')
+
+
+async def start_health_server(port: int = 5001, stats=None, host: str = '0.0.0.0'):
+    async def health(request):
+        return web.json_response({'status': 'ok'})
+
+    async def stats_view(request):
+        return web.json_response(stats() if stats else {})
+
+    async def metrics_view(request):
+        return web.Response(body=REGISTRY.render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get('/healthz', health)
+    app.router.add_get('/stats', stats_view)
+    app.router.add_get('/metrics', metrics_view)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Cherokee token scanner.")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="replay recorded JSONL detection events instead of the configured listeners")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="replay speed multiplier, 0 replays as fast as possible (default: 1)")
+    parser.add_argument('--replay-db', metavar='URL', default=REPLAY_DATABASE_URL,
+                        help="database a replay writes to (default: REPLAY_DATABASE_URL or "
+                             "sqlite:///cherokee_replay.db)")
+    parser.add_argument('--shards', type=int, default=SCANNER_SHARDS,
+                        help="number of scanner worker processes (default: SCANNER_SHARDS or 1)")
+    args = parser.parse_args(argv)
+    if args.replay and args.replay_db == DATABASE_URL:
+        parser.error("--replay-db must not be DATABASE_URL; replays write synthetic tokens")
+    return args
+
+
+def listener_config_for(args):
+    if args.replay:
+        return [{'type': 'replay', 'path': args.replay, 'speed': args.speed}]
+    return load_listener_config()
+
+
+def worker_count(batch_size: int = LLM_BATCH_SIZE, workers: int = DEFAULT_WORKERS) -> int:
+    """Workers needed to keep LLM batches full.
+
+    Each worker waits on one token's score, so a batch can only hold as many
+    tokens as there are workers waiting.  Two batches' worth lets the next
+    batch fill while the previous one is with the provider.
+    """
+    return max(workers, 2 * batch_size) if batch_size > 1 else workers
+
+
+def make_scheduler(args, journal=None):
+    """Bounded scheduler; a replay never sheds so every recorded event is measured."""
+    if args.replay:
+        # full queue blocks the replay listener (backpressure) and no event
+        # is old enough to be shed as stale
+        return PriorityScheduler(maxsize=DEFAULT_QUEUE_SIZE, deadline=math.inf,
+                                 shed_on_full=False, journal=journal)
+    # bounded: SCANNER_SHED_ON_FULL chooses between shedding the stalest
+    # event and blocking the listeners when full
+    return PriorityScheduler(maxsize=DEFAULT_QUEUE_SIZE, journal=journal)
+
+
+def make_seen_filter(args):
+    """Seen filter warmed from the database, except for repeatable replays."""
+    seen = SeenFilter()
+    if not args.replay:
+        seen.warm(recent_tokens(seen.interval))
+    return seen
+
+
+def use_database(url: str) -> None:
+    """Point this process's engine and sessions at ``url``."""
+    database.engine = database.make_engine(url)
+    database.SessionLocal.configure(bind=database.engine)
+
+
+def make_trader_and_publisher(args):
+    """Paper trader and event publisher; a replay gets neither.
+
+    Replayed tokens are synthetic, so they are not traded and not pushed
+    to the UI.
+    """
+    if args.replay:
+        return None, None
+    # new tokens and trades are pushed to the API for its /api/events stream
+    publisher = EventPublisher() if EVENTS_URL and EVENTS_TOKEN else None
+    trader = PaperTrader(on_trade=(lambda trade: publisher.publish('trade', trade)) if publisher else None)
+    return trader, publisher
+
+
+def journal_path(shard=None):
+    """Each shard keeps its own work queue journal next to the default one."""
+    if not SCANNER_QUEUE_PATH or shard is None:
+        return SCANNER_QUEUE_PATH
+    root, ext = os.path.splitext(SCANNER_QUEUE_PATH)
+    return f"{root}.shard{shard}{ext}"
+
+
+async def main(args=None, inbox=None, port: int = 5001, host: str = '0.0.0.0', shard=None):
+    """Run the scanner; ``inbox`` makes this process shard ``shard`` of a sharded scanner."""
+    args = args or parse_args([])
+    if args.replay:
+        use_database(args.replay_db)
+    if shard is not None:
+        tracing.set_shard(shard)
     init_db()
-    queue = asyncio.Queue()
-    listener = BaseListener(queue)
-    session = SessionLocal()
+    # replays are one-off measurements and are not journaled
+    journal = None if args.replay else open_journal(journal_path(shard))
+    queue = make_scheduler(args, journal)
+    if inbox is not None:
+        listeners = [InboxListener(queue, inbox)]
+    else:
+        listeners = create_listeners(queue, listener_config_for(args))
+    supervisor = ListenerSupervisor(listeners)
     analyzer = TokenAnalyzer(
-        session,
+        None,
         etherscan_api_key=os.getenv('ETHERSCAN_API_KEY', ''),
-        bscscan_api_key=os.getenv('BSC_SCAN_API_KEY', '')
+        bscscan_api_key=os.getenv('BSC_SCAN_API_KEY', ''),
+        # the pool is sized by worker_count so batches can fill
+        llm_batcher=RiskBatcher() if LLM_BATCH_SIZE > 1 else None,
     )
-    trader = PaperTrader()
-
-    async def start_health_server():
-        async def health(request):
-            return web.json_response({'status': 'ok'})
-
-        app = web.Application()
-        app.router.add_get('/healthz', health)
-        runner = web.AppRunner(app)
-        await runner.setup()
-        site = web.TCPSite(runner, '0.0.0.0', 5001)
-        await site.start()
-
-    async def consume():
-        while True:
-            token_info = await queue.get()
-            result = await analyzer.analyze(token_info['address'], token_info['chain'])
-            existing = session.query(Token).filter_by(address=token_info['address']).first()
-            if existing:
-                for k, v in result.items():
-                    setattr(existing, k, v)
-            else:
-                existing = Token.from_dict(result)
-                session.add(existing)
-            session.commit()
-            token = existing
-            print(f"Detected token {token.address} with risk {token.risk_level}")
-
-            if token.risk_level in ['Low', 'Medium']:
-                # buy a minimal amount for paper trading
-                await trader.buy(token.address, quantity=1, price=1.0, reasoning=token.risk_level)
-
-    await asyncio.gather(listener.start(), consume(), start_health_server())
+    trader, publisher = make_trader_and_publisher(args)
+    writer = TokenWriter()
+    seen = make_seen_filter(args)
+    pipeline = ScannerPipeline(analyzer, trader, writer, seen, publisher=publisher)
+    pool = WorkerPool(queue, pipeline.process, size=worker_count())
+    QUEUE_DEPTH.set_function(queue.qsize)
+    TOKENS_PER_SECOND.set_function(pipeline.stats.recent_rate)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # pragma: no cover - e.g. Windows
+            pass
+
+    def stats():
+        return {
+            'queue_depth': queue.qsize(),
+            'scheduler': queue.stats(),
+            'processed': pool.processed,
+            'failed': pool.failed,
+            'pipeline': pipeline.stats.summary(),
+            'listeners': supervisor.stats(),
+            'dedup': seen.stats(),
+            'risk_tiers': analyzer.tier_counts,
+            'events': publisher.stats() if publisher else None,
+        }
+
+    runner = await start_health_server(port, stats=stats, host=host)
+    writer.start()
+    if publisher is not None:
+        publisher.start()
+    pool.start()
+    recovered = await queue.recover()
+    if recovered:
+        print(f"Redelivering {recovered} tokens left unprocessed by the previous run")
+    # stops the scanner once every listener has finished, e.g. a file source
+    listener_task = asyncio.create_task(supervisor.run())
+    listener_task.add_done_callback(lambda _: stop.set())
+    try:
+        await stop.wait()
+    finally:
+        listener_task.cancel()
+        await asyncio.gather(listener_task, return_exceptions=True)
+        # a replay is only measured once every event has been processed
+        await pool.stop(timeout=None if args.replay else 30.0)
+        await writer.stop()
+        if publisher is not None:
+            await publisher.stop()
+        if journal is not None:
+            # tokens still queued after the drain timeout stay unacknowledged
+            # and are redelivered on the next start
+            journal.close()
+        await runner.cleanup()
+        await analyzer.close()
+        if trader is not None:
+            trader.close()
+        print(f"Scanner summary: {json.dumps(pipeline.stats.summary())}")
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    if args.shards > 1:
+        init_db()  # create the schema once before the shards race to do it
+        asyncio.run(run_sharded(args, args.shards, listener_config_for(args)))
+    else:
+        asyncio.run(main(args))
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    run()
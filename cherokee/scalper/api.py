@@ -7,6 +7,8 @@ from typing import Dict, Any
 
 from flask import Blueprint, request, jsonify
 
+from ..response_cache import json_file_response
+
 bp = Blueprint("scalper", __name__, url_prefix="/api/scalper")
 
 ROOT = Path(__file__).resolve().parents[2]
@@ -21,9 +23,7 @@ _active: Dict[str, Dict[str, Any]] = {}
 @bp.get("/spec")
 def scalper_spec():
     """Return the canonical scalper JSON specification."""
-    with open(SPEC_PATH, "r") as f:
-        data = json.load(f)
-    return jsonify(data)
+    return json_file_response(SPEC_PATH)
 
 
 @bp.get("/feed")
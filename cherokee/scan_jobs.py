@@ -0,0 +1,247 @@
+"""Run token analyses as jobs on a long-lived background event loop.
+
+``/api/scan/jobs`` submits one address or a batch and returns job ids at
+once.  Every job runs on the same event loop with one shared
+``TokenAnalyzer``, so analyses reuse its pooled HTTP session and run up to
+``SCAN_JOB_CONCURRENCY`` at a time while the explorer rate limiter keeps
+them inside the API budget.  Results are upserted in micro-batches by a
+``TokenWriter`` and published as ``token`` events.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCAN_JOB_CONCURRENCY = int(os.getenv('SCAN_JOB_CONCURRENCY', '20'))
+SCAN_JOB_MAX_BATCH = int(os.getenv('SCAN_JOB_MAX_BATCH', '5000'))
+# finished jobs and batches kept for polling; the oldest are forgotten first
+SCAN_JOB_HISTORY = int(os.getenv('SCAN_JOB_HISTORY', '10000'))
+HEARTBEAT_INTERVAL = 15.0
+
+
+class Job:
+    def __init__(self, address: str, chain: str):
+        self.id = uuid.uuid4().hex
+        self.address = address
+        self.chain = chain
+        self.status = 'queued'
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Future = Future()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Block until the job finishes and return its result (or raise its error)."""
+        return self.future.result(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'address': self.address,
+            'chain': self.chain,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class Batch:
+    def __init__(self, jobs: List[Job]):
+        self.id = uuid.uuid4().hex
+        self.jobs = jobs
+        # jobs in the order they finished, for streaming
+        self.finished: List[Job] = []
+
+    def to_dict(self, include_jobs: bool = True) -> Dict[str, Any]:
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        for job in self.jobs:
+            counts[job.status] += 1
+        data = {'id': self.id, 'total': len(self.jobs), **counts}
+        if include_jobs:
+            data['jobs'] = [job.to_dict() for job in self.jobs]
+        return data
+
+
+def _default_analyzer():
+    from .analyzer.token_analyzer import TokenAnalyzer
+
+    return TokenAnalyzer(None)
+
+
+class ScanJobManager:
+    """Queue scan jobs onto an event loop running in a daemon thread."""
+
+    def __init__(self, analyzer_factory: Callable[[], Any] = _default_analyzer,
+                 concurrency: int = SCAN_JOB_CONCURRENCY, history: int = SCAN_JOB_HISTORY,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.analyzer_factory = analyzer_factory
+        self.concurrency = max(1, concurrency)
+        self.history = history
+        self.on_result = on_result
+        self.analyzer = None
+        self._writer = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._batches: 'OrderedDict[str, Batch]' = OrderedDict()
+        self._job_batch: Dict[str, Batch] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name='scan-jobs', daemon=True)
+            self._thread.start()
+        ready.wait()
+
+    def _run(self, ready: threading.Event) -> None:
+        from .scanner.writer import TokenWriter
+
+        asyncio.set_event_loop(self._loop)
+        self.analyzer = self.analyzer_factory()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._writer = TokenWriter()
+        self._loop.call_soon(self._writer.start)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, loop = self._thread, self._loop
+            self._thread = None
+        if thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+        loop.close()
+
+    async def _shutdown(self) -> None:
+        await self._writer.stop()
+        if hasattr(self.analyzer, 'close'):
+            await self.analyzer.close()
+
+    def submit(self, tokens: Iterable[Tuple[str, str]]) -> Batch:
+        """Queue an analysis job per ``(address, chain)`` and return their batch."""
+        self.start()
+        batch = Batch([Job(address, chain) for address, chain in tokens])
+        with self._lock:
+            self._batches[batch.id] = batch
+            for job in batch.jobs:
+                self._jobs[job.id] = job
+                self._job_batch[job.id] = batch
+            self._evict()
+        # read at submit time so keys changed through /api/config apply
+        self.analyzer.etherscan_api_key = os.getenv('ETHERSCAN_API_KEY', '')
+        self.analyzer.bscscan_api_key = os.getenv('BSC_SCAN_API_KEY', '')
+        for job in batch.jobs:
+            asyncio.run_coroutine_threadsafe(self._execute(job), self._loop)
+        return batch
+
+    def _evict(self) -> None:
+        while len(self._jobs) > self.history:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.finished:
+                break
+            del self._jobs[oldest.id]
+            self._job_batch.pop(oldest.id, None)
+        while len(self._batches) > self.history:
+            oldest = next(iter(self._batches.values()))
+            if len(oldest.finished) < len(oldest.jobs):
+                break
+            del self._batches[oldest.id]
+
+    async def _execute(self, job: Job) -> None:
+        async with self._semaphore:
+            job.status = 'running'
+            job.started_at = time.time()
+            try:
+                result = await self.analyzer.analyze(job.address, job.chain)
+                await self._writer.submit(result)
+            except Exception as exc:
+                logger.warning('Scan job for %s failed: %s', job.address, exc)
+                self._finish(job, 'failed', error=f'{type(exc).__name__}: {exc}')
+                job.future.set_exception(exc)
+                return
+        self._finish(job, 'done', result=result)
+        if self.on_result is not None:
+            self.on_result(result)
+        job.future.set_result(result)
+
+    def _finish(self, job: Job, status: str, result=None, error=None) -> None:
+        with self._changed:
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            job.status = status
+            batch = self._job_batch.get(job.id)
+            if batch is not None:
+                batch.finished.append(job)
+            self._changed.notify_all()
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_batch(self, batch_id: str) -> Optional[Batch]:
+        with self._lock:
+            return self._batches.get(batch_id)
+
+    def stream(self, batch: Batch, heartbeat: float = HEARTBEAT_INTERVAL) -> Iterator[str]:
+        """Yield Server-Sent Events for each job of ``batch`` as it finishes."""
+        ids = itertools.count(1)
+        sent = 0
+        yield 'retry: 3000\n\n'
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: len(batch.finished) > sent, timeout=heartbeat)
+                new = batch.finished[sent:]
+            if not new:
+                yield ': keep-alive\n\n'
+                continue
+            sent += len(new)
+            for job in new:
+                yield f'id: {next(ids)}\nevent: job\ndata: {json.dumps(job.to_dict(), default=str)}\n\n'
+            if sent == len(batch.jobs):
+                summary = json.dumps(batch.to_dict(include_jobs=False))
+                yield f'id: {next(ids)}\nevent: done\ndata: {summary}\n\n'
+                return
+
+
+_MANAGER: Optional[ScanJobManager] = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_manager() -> ScanJobManager:
+    """Return the process-wide job manager, publishing results as token events."""
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            from .events import EVENT_BUS
+
+            _MANAGER = ScanJobManager(on_result=lambda result: EVENT_BUS.publish('token', result))
+        return _MANAGER
@@ -0,0 +1,4 @@
+from .pipeline import ScannerPipeline
+from .stats import PipelineStats
+from .workers import WorkerPool
+from .writer import TokenWriter
@@ -0,0 +1,155 @@
+"""Seen-token filter that skips re-analysis of recently scored addresses."""
+
+import hashlib
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from .. import database
+
+SCANNER_REANALYZE_INTERVAL = float(os.getenv("SCANNER_REANALYZE_INTERVAL", "3600"))
+SCANNER_DEDUP_BLOOM = os.getenv("SCANNER_DEDUP_BLOOM", "0") == "1"
+SCANNER_DEDUP_CAPACITY = int(os.getenv("SCANNER_DEDUP_CAPACITY", "1000000"))
+
+
+class BloomFilter:
+    """Fixed size Bloom filter sized for ``capacity`` items at ``error_rate``."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class SeenFilter:
+    """Remember which addresses were analyzed within the last ``interval`` seconds.
+
+    The default mode keeps an exact address -> timestamp map.  With
+    ``bloom=True`` two Bloom filter generations are rotated every
+    ``interval`` seconds instead, so memory stays fixed for large address
+    volumes; an address is then skipped for between one and two intervals
+    and may rarely be skipped as a false positive.  Bloom filters cannot
+    delete, so ``forget`` keeps forgotten addresses in a small exception set
+    until the generations that contained them have rotated out.
+    """
+
+    def __init__(self, interval: float = SCANNER_REANALYZE_INTERVAL, bloom: bool = SCANNER_DEDUP_BLOOM,
+                 capacity: int = SCANNER_DEDUP_CAPACITY):
+        self.interval = interval
+        self.bloom = bloom
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._recent: "OrderedDict[str, float]" = OrderedDict()
+        self._current: Optional[BloomFilter] = None
+        self._previous: Optional[BloomFilter] = None
+        self._rotated_at = time.time()
+        # bloom mode: forgotten address -> when it was forgotten
+        self._forgotten: Dict[str, float] = {}
+        if bloom:
+            self._current = BloomFilter(capacity)
+
+    def _rotate(self, now: float) -> None:
+        if now - self._rotated_at >= self.interval:
+            self._previous = self._current
+            self._current = BloomFilter(self.capacity)
+            self._rotated_at = now
+            # an address is in at most the last two generations
+            cutoff = now - 2 * self.interval
+            self._forgotten = {k: t for k, t in self._forgotten.items() if t > cutoff}
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.interval
+        while self._recent:
+            if next(iter(self._recent.values())) > cutoff:
+                break
+            self._recent.popitem(last=False)
+
+    def _contains(self, key: str, now: float) -> bool:
+        if self.bloom:
+            self._rotate(now)
+            if key in self._forgotten:
+                return False
+            return key in self._current or (self._previous is not None and key in self._previous)
+        seen_at = self._recent.get(key)
+        return seen_at is not None and now - seen_at < self.interval
+
+    def mark(self, address: str, when: Optional[float] = None) -> None:
+        now = time.time() if when is None else when
+        key = address.lower()
+        if self.bloom:
+            self._rotate(time.time())
+            self._forgotten.pop(key, None)
+            self._current.add(key)
+            return
+        self._recent[key] = max(now, self._recent.get(key, now))
+        self._recent.move_to_end(key)
+        self._prune(time.time())
+
+    def forget(self, address: str) -> None:
+        """Allow ``address`` to be analyzed again, e.g. after a failed analysis."""
+        key = address.lower()
+        if self.bloom:
+            self._forgotten[key] = time.time()
+            return
+        self._recent.pop(key, None)
+
+    def seen(self, address: str) -> bool:
+        """Return True if ``address`` is a recent duplicate, otherwise mark it."""
+        now = time.time()
+        if self._contains(address.lower(), now):
+            self.hits += 1
+            return True
+        self.misses += 1
+        self.mark(address, now)
+        return False
+
+    def warm(self, rows: Iterable[Tuple[str, float]]) -> int:
+        """Mark ``(address, unix_timestamp)`` rows that fall inside the window."""
+        cutoff = time.time() - self.interval
+        count = 0
+        for address, seen_at in sorted(rows, key=lambda r: r[1]):
+            if seen_at > cutoff:
+                self.mark(address, seen_at)
+                count += 1
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "tracked": len(self._recent),
+            "forgotten": len(self._forgotten),
+        }
+
+
+def recent_tokens(interval: float = SCANNER_REANALYZE_INTERVAL) -> List[Tuple[str, float]]:
+    """Return ``(address, detected_at)`` for tokens detected within ``interval``."""
+    from ..models import Token
+
+    cutoff = datetime.utcnow() - timedelta(seconds=interval)
+    stmt = select(Token.address, Token.detected_at).where(Token.detected_at >= cutoff)
+    with database.engine.connect() as conn:
+        return [
+            (address, detected_at.replace(tzinfo=timezone.utc).timestamp())
+            for address, detected_at in conn.execute(stmt)
+        ]
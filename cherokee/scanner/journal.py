@@ -0,0 +1,192 @@
+"""Durable SQLite journal backing the scanner work queue.
+
+Every detected token is journaled when it is queued and acknowledged
+once a worker has finished with it (or it was deliberately dropped), so
+tokens queued or mid-analysis when the scanner crashes are redelivered on
+the next start.  A token whose analysis raised is not retried in a loop:
+it is moved to the ``dead_letters`` table with its error, and is analyzed
+again when a listener detects it again.  Delivery is at-least-once;
+``SeenFilter`` skips the rare token that was processed but not yet
+acknowledged.
+
+Enqueues made during one event loop tick are written in one transaction
+at the end of the tick; a crash within that tick loses them.  In a
+sharded scanner the journal starts at each shard's scheduler: tokens
+still waiting in a shard's inter-process inbox (up to
+``SCANNER_SHARD_QUEUE_SIZE`` each) are not journaled and are lost if the
+supervisor or the shard crashes.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# empty disables the journal
+SCANNER_QUEUE_PATH = os.getenv("SCANNER_QUEUE_PATH", "scanner_queue.db")
+# acknowledgements are written in batches; an ack lost in a crash only
+# causes a redelivery
+ACK_BATCH_SIZE = 100
+ACK_MAX_DELAY = 0.5
+COMPACT_EVERY = 10000
+
+
+class WorkJournal:
+    """Append-only ``work_queue`` table with enqueue/ack and redelivery.
+
+    ``enqueue`` assigns the id right away and buffers the row; inside an
+    event loop the buffer is written once per loop tick, otherwise
+    immediately (WAL with ``synchronous=NORMAL`` survives a process crash
+    without an fsync per commit).  Acked rows are only flagged and deleted
+    in bulk by ``compact``.
+    """
+
+    def __init__(self, path: str = SCANNER_QUEUE_PATH, ack_batch_size: int = ACK_BATCH_SIZE,
+                 ack_max_delay: float = ACK_MAX_DELAY, compact_every: int = COMPACT_EVERY):
+        self.path = str(path)
+        self.ack_batch_size = ack_batch_size
+        self.ack_max_delay = ack_max_delay
+        self.compact_every = compact_every
+        self.enqueued = 0
+        self.acked = 0
+        self.redelivered = 0
+        self.dead_lettered = 0
+        self._pending_acks: List[int] = []
+        self._pending_enqueues: List[Tuple[int, str, float]] = []
+        self._last_flush = time.monotonic()
+        self._since_compact = 0
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS work_queue ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, "
+            "enqueued_at REAL NOT NULL, acked INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letters ("
+            "id INTEGER PRIMARY KEY, payload TEXT NOT NULL, error TEXT, failed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        # ids are handed out before the rows are written; never reuse one,
+        # dead letters keep the id of their work_queue row
+        (last_id,) = self._conn.execute(
+            "SELECT max(coalesce((SELECT seq FROM sqlite_sequence WHERE name = 'work_queue'), 0), "
+            "coalesce((SELECT max(id) FROM work_queue), 0), "
+            "coalesce((SELECT max(id) FROM dead_letters), 0))"
+        ).fetchone()
+        self._next_id = last_id + 1
+
+    def enqueue(self, item: Dict[str, Any]) -> int:
+        """Persist ``item`` and return its queue id."""
+        qid, self._next_id = self._next_id, self._next_id + 1
+        self._pending_enqueues.append((qid, json.dumps(item), time.time()))
+        self.enqueued += 1
+        if len(self._pending_enqueues) == 1:
+            try:
+                asyncio.get_running_loop().call_soon(self.write_enqueued)
+            except RuntimeError:
+                self.write_enqueued()
+        return qid
+
+    def write_enqueued(self) -> None:
+        """Write buffered enqueues in one transaction."""
+        if not self._pending_enqueues:
+            return
+        rows, self._pending_enqueues = self._pending_enqueues, []
+        self._conn.executemany(
+            "INSERT INTO work_queue (id, payload, enqueued_at) VALUES (?, ?, ?)", rows)
+        self._conn.commit()
+
+    def ack(self, qid: int) -> None:
+        """Mark ``qid`` as done; flushed in batches."""
+        self._pending_acks.append(qid)
+        if (len(self._pending_acks) >= self.ack_batch_size
+                or time.monotonic() - self._last_flush >= self.ack_max_delay):
+            self.flush()
+
+    def flush(self) -> None:
+        self.write_enqueued()
+        self._last_flush = time.monotonic()
+        if not self._pending_acks:
+            return
+        acks, self._pending_acks = self._pending_acks, []
+        self._conn.executemany("UPDATE work_queue SET acked = 1 WHERE id = ?", [(q,) for q in acks])
+        self._conn.commit()
+        self.acked += len(acks)
+        self._since_compact += len(acks)
+        if self._since_compact >= self.compact_every:
+            self.compact()
+
+    def dead_letter(self, qid: int, error: str) -> None:
+        """Move ``qid`` to ``dead_letters`` so it is not redelivered."""
+        self.write_enqueued()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dead_letters (id, payload, error, failed_at) "
+            "SELECT id, payload, ?, ? FROM work_queue WHERE id = ?",
+            (error, time.time(), qid),
+        )
+        self._conn.execute("UPDATE work_queue SET acked = 1 WHERE id = ?", (qid,))
+        self._conn.commit()
+        self.dead_lettered += 1
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return the most recent failed items with their error."""
+        rows = self._conn.execute(
+            "SELECT id, payload, error, failed_at FROM dead_letters ORDER BY id DESC LIMIT ?",
+            (limit,),
+        )
+        return [
+            {"_qid": qid, "item": json.loads(payload), "error": error, "failed_at": failed_at}
+            for qid, payload, error, failed_at in rows
+        ]
+
+    def compact(self) -> int:
+        """Delete acknowledged rows and return how many were removed."""
+        self.write_enqueued()
+        removed = self._conn.execute("DELETE FROM work_queue WHERE acked = 1").rowcount
+        self._conn.commit()
+        # keep the WAL file from growing without bound
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._since_compact = 0
+        return removed
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Return unacknowledged items, oldest first, tagged with their ``_qid``."""
+        self.write_enqueued()
+        items = []
+        for qid, payload in self._conn.execute(
+                "SELECT id, payload FROM work_queue WHERE acked = 0 ORDER BY id"):
+            try:
+                item = json.loads(payload)
+            except ValueError:
+                logger.warning("Dropping unreadable journal entry %s", qid)
+                self.ack(qid)
+                continue
+            item["_qid"] = qid
+            items.append(item)
+        self.redelivered += len(items)
+        return items
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "enqueued": self.enqueued,
+            "acked": self.acked + len(self._pending_acks),
+            "redelivered": self.redelivered,
+            "dead_lettered": self.dead_lettered,
+        }
+
+    def close(self) -> None:
+        self.flush()
+        self.compact()
+        self._conn.close()
+
+
+def open_journal(path: Optional[str] = SCANNER_QUEUE_PATH) -> Optional[WorkJournal]:
+    """Return a journal at ``path`` or ``None`` when journaling is disabled."""
+    return WorkJournal(path) if path else None
@@ -0,0 +1,56 @@
+"""Per-token processing steps run by the scanner workers."""
+
+import logging
+from typing import Any, Dict, Optional
+
+from ..metrics import STAGE_LATENCY, TOKENS_PROCESSED
+from ..tracing import span, start_trace
+from .dedup import SeenFilter
+from .stats import PipelineStats
+from .writer import TokenWriter
+
+logger = logging.getLogger(__name__)
+
+
+class ScannerPipeline:
+    """Analyze a detected token, store the result and paper trade it."""
+
+    def __init__(self, analyzer, trader, writer: TokenWriter, seen: Optional[SeenFilter] = None,
+                 stats: Optional[PipelineStats] = None, publisher=None):
+        self.analyzer = analyzer
+        self.trader = trader
+        self.writer = writer
+        self.seen = seen
+        self.stats = stats or PipelineStats()
+        self.publisher = publisher
+
+    async def process(self, token_info: Dict[str, Any]) -> None:
+        address = token_info['address']
+        if self.seen is not None and self.seen.seen(address):
+            self.stats.record_skip()
+            return
+        with start_trace('token', address=address, chain=token_info['chain'],
+                         source=token_info.get('source')):
+            await self._process(token_info)
+
+    async def _process(self, token_info: Dict[str, Any]) -> None:
+        address = token_info['address']
+        try:
+            result = await self.analyzer.analyze(address, token_info['chain'])
+            with STAGE_LATENCY.time(stage='db_commit'), span('db_upsert'):
+                await self.writer.submit(result)
+        except Exception:
+            if self.seen is not None:
+                self.seen.forget(address)
+            raise
+        if self.publisher is not None:
+            self.publisher.publish('token', result)
+        print(f"Detected token {result['address']} with risk {result['risk_level']}")
+
+        if self.trader is not None and result['risk_level'] in ['Low', 'Medium']:
+            # buy a minimal amount for paper trading
+            with STAGE_LATENCY.time(stage='trade'):
+                await self.trader.buy(result['address'], quantity=1, price=1.0,
+                                      reasoning=result['risk_level'])
+        self.stats.record(token_info)
+        TOKENS_PROCESSED.inc()
@@ -0,0 +1,79 @@
+"""Forward scanner events to the API's event bus in batched HTTP requests."""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, Optional
+
+import aiohttp
+
+from ..events import EVENTS_TOKEN, EVENTS_TOKEN_HEADER
+
+logger = logging.getLogger(__name__)
+
+# empty disables publishing
+EVENTS_URL = os.getenv("EVENTS_URL", "http://127.0.0.1:5000/api/events/publish")
+EVENTS_BATCH_SIZE = 100
+EVENTS_FLUSH_INTERVAL = 0.2
+# events waiting while the API is unreachable; the oldest are dropped, the
+# database stays the source of truth
+EVENTS_MAX_PENDING = 10000
+
+
+class EventPublisher:
+    """Buffer events and POST them to ``url`` every ``interval`` seconds.
+
+    Each request carries ``token`` in the ``X-Events-Token`` header.
+    """
+
+    def __init__(self, url: str = EVENTS_URL, batch_size: int = EVENTS_BATCH_SIZE,
+                 interval: float = EVENTS_FLUSH_INTERVAL, max_pending: int = EVENTS_MAX_PENDING,
+                 token: str = EVENTS_TOKEN):
+        self.url = url
+        self.token = token
+        self.batch_size = batch_size
+        self.interval = interval
+        self.sent = 0
+        self.failed = 0
+        self._pending: deque = deque(maxlen=max_pending)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, event_type: str, data: Any) -> None:
+        self._pending.append({"type": event_type, "data": data})
+
+    def start(self) -> None:
+        if self._task is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5),
+                                                  headers={EVENTS_TOKEN_HEADER: self.token})
+            self._task = asyncio.create_task(self._run(), name="scanner-event-publisher")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            try:
+                async with self._session.post(self.url, json=batch) as resp:
+                    resp.raise_for_status()
+                self.sent += len(batch)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                self.failed += len(batch)
+                logger.debug("Could not publish %s events: %s", len(batch), exc)
+                return
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+        await self._session.close()
+        self._task = None
+
+    def stats(self):
+        return {"sent": self.sent, "failed": self.failed, "pending": len(self._pending)}
@@ -0,0 +1,167 @@
+"""Freshness-first priority scheduling for detected tokens."""
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+from .journal import WorkJournal
+
+SCANNER_DEADLINE = float(os.getenv("SCANNER_DEADLINE_S", "120"))
+# what happens to events older than the deadline: "backfill" or "drop"
+SCANNER_STALE_POLICY = os.getenv("SCANNER_STALE_POLICY", "backfill")
+SCANNER_BACKFILL_SIZE = int(os.getenv("SCANNER_BACKFILL_SIZE", "1000"))
+SCANNER_SHED_ON_FULL = os.getenv("SCANNER_SHED_ON_FULL", "0") == "1"
+# priority boosts in seconds of freshness, e.g. {"ethereum": 30}
+SCANNER_CHAIN_PRIORITY = json.loads(os.getenv("SCANNER_CHAIN_PRIORITY", "{}"))
+SCANNER_SOURCE_PRIORITY = json.loads(os.getenv("SCANNER_SOURCE_PRIORITY", "{}"))
+
+
+class PriorityScheduler(asyncio.Queue):
+    """Drop-in replacement for ``asyncio.Queue`` that serves the freshest events first.
+
+    Events are ordered by ``detected_at`` plus per-chain and per-source
+    boosts.  Events older than ``deadline`` seconds when they reach the
+    front are shed: dropped, or moved to a bounded backfill lane that is
+    only served while no fresh events are waiting.  A full queue blocks
+    the listeners (backpressure); with ``shed_on_full`` it evicts its
+    stalest event instead, found through a second heap ordered lowest
+    priority first.  Both heaps delete lazily: an entry taken through one is
+    skipped when it surfaces in the other, and they are rebuilt once stale
+    entries outnumber live ones.  With a ``journal`` every event is journaled as it is
+    queued and acknowledged once processed or dropped, and ``recover``
+    re-queues what an earlier run left unacknowledged.
+    """
+
+    def __init__(self, maxsize: int = 0, deadline: float = SCANNER_DEADLINE,
+                 stale_policy: str = SCANNER_STALE_POLICY, backfill_size: int = SCANNER_BACKFILL_SIZE,
+                 shed_on_full: bool = SCANNER_SHED_ON_FULL,
+                 chain_priority: Optional[Dict[str, float]] = None,
+                 source_priority: Optional[Dict[str, float]] = None,
+                 journal: Optional[WorkJournal] = None):
+        if stale_policy not in ("backfill", "drop"):
+            raise ValueError("stale_policy must be 'backfill' or 'drop'")
+        self.deadline = deadline
+        self.stale_policy = stale_policy
+        self.backfill_size = backfill_size
+        self.shed_on_full = shed_on_full
+        self.chain_priority = SCANNER_CHAIN_PRIORITY if chain_priority is None else chain_priority
+        self.source_priority = SCANNER_SOURCE_PRIORITY if source_priority is None else source_priority
+        self.journal = journal
+        self.shed = {"stale": 0, "evicted": 0, "backfilled": 0, "dropped": 0}
+        super().__init__(maxsize)
+
+    # asyncio.Queue storage hooks
+    def _init(self, maxsize):
+        self._heap = []  # (-priority, seq), highest priority first
+        self._lowest = []  # (priority, -seq), eviction candidates first
+        self._entries: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._backfill = deque()
+        self._seq = itertools.count()
+        self._last_lane = "main"
+
+    def qsize(self) -> int:
+        return len(self._entries) + len(self._backfill)
+
+    def empty(self) -> bool:
+        return not self._entries and not self._backfill
+
+    def _put(self, item):
+        item.setdefault("detected_at", time.time())
+        if self.journal is not None and "_qid" not in item:
+            item["_qid"] = self.journal.enqueue(item)
+        seq, priority = next(self._seq), self.priority(item)
+        self._entries[seq] = (priority, item)
+        heapq.heappush(self._heap, (-priority, seq))
+        if self._maxsize > 0 and self.shed_on_full:
+            heapq.heappush(self._lowest, (priority, -seq))
+            if len(self._entries) > self._maxsize:
+                # over capacity: the lowest priority event makes room
+                self.shed["evicted"] += 1
+                self._shed(self._pop(self._lowest, lambda key: -key[1]))
+
+    def _get(self):
+        if self._entries:
+            self._last_lane = "main"
+            return self._pop(self._heap, lambda key: key[1])
+        self._last_lane = "backfill"
+        return self._backfill.popleft()
+
+    def _pop(self, heap, seq_of) -> Dict[str, Any]:
+        while True:
+            entry = self._entries.pop(seq_of(heapq.heappop(heap)), None)
+            if entry is not None:
+                break
+        if len(self._heap) + len(self._lowest) > 4 * len(self._entries) + 64:
+            self._rebuild()
+        return entry[1]
+
+    def _rebuild(self) -> None:
+        """Drop entries already taken through the other heap."""
+        self._heap = [(-priority, seq) for seq, (priority, _) in self._entries.items()]
+        heapq.heapify(self._heap)
+        if self._lowest:
+            self._lowest = [(priority, -seq) for seq, (priority, _) in self._entries.items()]
+            heapq.heapify(self._lowest)
+
+    def full(self) -> bool:
+        if self._maxsize <= 0 or self.shed_on_full:
+            return False
+        return len(self._entries) >= self._maxsize
+
+    def priority(self, item: Dict[str, Any]) -> float:
+        return (
+            item["detected_at"]
+            + self.chain_priority.get(item.get("chain"), 0)
+            + self.source_priority.get(item.get("source"), 0)
+        )
+
+    def _shed(self, item: Dict[str, Any]) -> None:
+        if self.stale_policy == "backfill" and self.backfill_size > 0:
+            if len(self._backfill) >= self.backfill_size:
+                self.ack(self._backfill.popleft())
+                self.shed["dropped"] += 1
+                self.task_done()
+            self._backfill.append(item)
+            self.shed["backfilled"] += 1
+        else:
+            self.ack(item)
+            self.shed["dropped"] += 1
+            self.task_done()
+
+    def ack(self, item: Dict[str, Any]) -> None:
+        """Acknowledge a processed or dropped event so it is not redelivered."""
+        if self.journal is not None and "_qid" in item:
+            self.journal.ack(item["_qid"])
+
+    def dead_letter(self, item: Dict[str, Any], error: str) -> None:
+        """Move an event whose processing failed out of the redelivery set."""
+        if self.journal is not None and "_qid" in item:
+            self.journal.dead_letter(item["_qid"], error)
+
+    async def recover(self) -> int:
+        """Re-queue events a previous run journaled but never acknowledged."""
+        if self.journal is None:
+            return 0
+        items = self.journal.pending()
+        for item in items:
+            await self.put(item)
+        return len(items)
+
+    async def get(self):
+        while True:
+            item = await super().get()
+            if self._last_lane == "backfill" or time.time() - item["detected_at"] <= self.deadline:
+                return item
+            self.shed["stale"] += 1
+            self._shed(item)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"queued": len(self._entries), "backfill": len(self._backfill), "shed": dict(self.shed)}
+        if self.journal is not None:
+            stats["journal"] = self.journal.stats()
+        return stats
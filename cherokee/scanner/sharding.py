@@ -0,0 +1,309 @@
+"""Multi-process scanner: a supervisor routes detections to N shard workers.
+
+Listeners run in the supervisor and every detected address is routed by a
+stable hash to exactly one worker process, which runs the normal scanner
+pipeline on its own event loop.  The supervisor's health server on port
+5001 combines ``/healthz``, ``/stats`` and ``/metrics`` from all workers.
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue as queue_module
+import re
+import signal
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+from ..listeners import BaseListener, ListenerSupervisor, create_listeners
+from ..metrics import CONTENT_TYPE
+
+logger = logging.getLogger(__name__)
+
+SCANNER_SHARDS = int(os.getenv("SCANNER_SHARDS", "1"))
+# shard i serves its own health/metrics on 127.0.0.1:(SHARD_PORT_BASE + i)
+SHARD_PORT_BASE = int(os.getenv("SCANNER_SHARD_PORT_BASE", "5101"))
+SHARD_QUEUE_SIZE = int(os.getenv("SCANNER_SHARD_QUEUE_SIZE", "1000"))
+# consecutive crashes after which the whole sharded run fails
+SHARD_MAX_RESTARTS = int(os.getenv("SCANNER_SHARD_MAX_RESTARTS", "5"))
+SHARD_RESTART_DELAY = 1.0
+SHARD_RESTART_MAX_DELAY = 60.0
+# a shard that stayed up this long is healthy again and its count resets
+SHARD_STABLE_AFTER = 300.0
+# seconds a blocked router waits on a full inbox before re-checking the shard
+ROUTER_PUT_TIMEOUT = 0.5
+
+
+class ShardFailed(RuntimeError):
+    """Raised when a shard keeps crashing after ``SHARD_MAX_RESTARTS`` restarts."""
+
+
+class RestartPolicy:
+    """Exponential backoff between restarts of crashing shards, with a cap."""
+
+    def __init__(self, max_restarts: int = SHARD_MAX_RESTARTS, delay: float = SHARD_RESTART_DELAY,
+                 max_delay: float = SHARD_RESTART_MAX_DELAY, stable_after: float = SHARD_STABLE_AFTER):
+        self.max_restarts = max_restarts
+        self.delay = delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.restarts: Dict[int, int] = {}
+        self._started: Dict[int, float] = {}
+
+    def started(self, index: int, now: float) -> None:
+        self._started[index] = now
+
+    def next_delay(self, index: int, now: float) -> Optional[float]:
+        """Seconds to wait before restarting ``index``, or None to give up."""
+        if now - self._started.get(index, now) >= self.stable_after:
+            self.restarts[index] = 0
+        count = self.restarts.get(index, 0) + 1
+        if count > self.max_restarts:
+            return None
+        self.restarts[index] = count
+        return min(self.max_delay, self.delay * 2 ** (count - 1))
+
+
+def shard_for(address: str, shards: int) -> int:
+    """Return the shard owning ``address``; stable across processes and restarts."""
+    digest = hashlib.blake2b(address.lower().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+class ShardRouter:
+    """Queue-like fan-out that listeners ``put`` into, routing by address hash.
+
+    ``available(index)`` tells whether a shard is still running or being
+    restarted; tokens for a shard that is gone are logged and dropped
+    instead of waiting on its full inbox forever.
+    """
+
+    def __init__(self, inboxes: List, available: Optional[Callable[[int], bool]] = None):
+        self.inboxes = inboxes
+        self.available = available or (lambda index: True)
+        self.routed = [0] * len(inboxes)
+        self.dropped = [0] * len(inboxes)
+
+    @staticmethod
+    def _put(inbox, token: dict) -> bool:
+        try:
+            inbox.put(token, True, ROUTER_PUT_TIMEOUT)
+            return True
+        except queue_module.Full:
+            return False
+
+    async def put(self, token: dict) -> None:
+        index = shard_for(token["address"], len(self.inboxes))
+        inbox = self.inboxes[index]
+        try:
+            inbox.put_nowait(token)
+        except queue_module.Full:
+            # backpressure: wait for the shard without blocking the loop, in
+            # short steps so no executor thread outlives a stopped shard
+            while not await asyncio.to_thread(self._put, inbox, token):
+                if not self.available(index):
+                    self.dropped[index] += 1
+                    logger.error("Shard %s is gone, dropping %s", index, token["address"])
+                    return
+        self.routed[index] += 1
+
+    def qsize(self) -> int:
+        total = 0
+        for inbox in self.inboxes:
+            try:
+                total += inbox.qsize()
+            except NotImplementedError:  # pragma: no cover - macOS
+                pass
+        return total
+
+
+class InboxListener(BaseListener):
+    """Feed a shard worker from its inter-process inbox until a ``None`` sentinel."""
+
+    source = "inbox"
+
+    def __init__(self, queue, inbox, name: Optional[str] = None):
+        super().__init__(queue, name=name)
+        self.inbox = inbox
+
+    async def start(self):
+        while True:
+            try:
+                token = await asyncio.to_thread(self.inbox.get, True, 0.5)
+            except queue_module.Empty:
+                continue
+            if token is None:
+                return
+            # keep the original source tag for scheduling priorities
+            await self.queue.put(token)
+            self.emitted += 1
+
+
+_LABELS = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?(\s.*)$")
+
+
+def merge_metrics(texts: Dict[int, str]) -> str:
+    """Combine Prometheus text from several shards, adding a ``shard`` label."""
+    families: Dict[str, dict] = {}
+    for shard, text in sorted(texts.items()):
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                _, kind, name, rest = line.split(" ", 3)
+                family = families.setdefault(name, {"HELP": None, "TYPE": None, "samples": []})
+                family[kind] = family[kind] or rest
+                continue
+            match = _LABELS.match(line)
+            if not match or family is None:
+                continue
+            name, labels, value = match.groups()
+            shard_label = f'shard="{shard}"'
+            labels = "{" + shard_label + ("," + labels[1:] if labels and labels != "{}" else "}")
+            family["samples"].append(f"{name}{labels}{value}")
+    lines = []
+    for name, family in families.items():
+        if family["HELP"]:
+            lines.append(f"# HELP {name} {family['HELP']}")
+        if family["TYPE"]:
+            lines.append(f"# TYPE {name} {family['TYPE']}")
+        lines.extend(family["samples"])
+    return "\n".join(lines) + "\n"
+
+
+def _shard_main(index: int, inbox, port: int, args) -> None:
+    from .. import run_scanner
+
+    asyncio.run(run_scanner.main(args, inbox=inbox, port=port, host="127.0.0.1", shard=index))
+
+
+async def _fetch_all(ports: Dict[int, int], path: str, as_json: bool):
+    timeout = aiohttp.ClientTimeout(total=2)
+    async with aiohttp.ClientSession(timeout=timeout) as client:
+        async def fetch(port):
+            try:
+                async with client.get(f"http://127.0.0.1:{port}{path}") as resp:
+                    if resp.status != 200:
+                        return None
+                    return await resp.json() if as_json else await resp.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return None
+
+        results = await asyncio.gather(*(fetch(p) for p in ports.values()))
+    return dict(zip(ports, results))
+
+
+async def run_sharded(args, shards: int, listener_config: List[dict], port: int = 5001,
+                      port_base: int = SHARD_PORT_BASE) -> None:
+    """Run ``shards`` scanner worker processes behind one supervisor."""
+    ctx = multiprocessing.get_context("spawn")
+    inboxes = [ctx.Queue(maxsize=SHARD_QUEUE_SIZE) for _ in range(shards)]
+    ports = {i: port_base + i for i in range(shards)}
+    processes: Dict[int, multiprocessing.Process] = {}
+    stopping = False
+    loop = asyncio.get_running_loop()
+    policy = RestartPolicy()
+    failure: Optional[ShardFailed] = None
+    given_up = set()
+
+    def spawn(index: int) -> None:
+        process = ctx.Process(
+            target=_shard_main, args=(index, inboxes[index], ports[index], args),
+            name=f"scanner-shard-{index}",
+        )
+        process.start()
+        processes[index] = process
+        policy.started(index, loop.time())
+
+    for i in range(shards):
+        spawn(i)
+
+    router = ShardRouter(inboxes, available=lambda index: not stopping and index not in given_up)
+    supervisor = ListenerSupervisor(create_listeners(router, listener_config))
+
+    async def health(request):
+        results = await _fetch_all(ports, "/healthz", as_json=True)
+        states = {i: "ok" if r and r.get("status") == "ok" else "down" for i, r in results.items()}
+        status = "ok" if all(s == "ok" for s in states.values()) else "degraded"
+        return web.json_response({"status": status, "shards": states})
+
+    async def stats(request):
+        results = await _fetch_all(ports, "/stats", as_json=True)
+        return web.json_response({
+            "routed": router.routed,
+            "dropped": router.dropped,
+            "listeners": supervisor.stats(),
+            "shards": results,
+        })
+
+    async def metrics(request):
+        results = await _fetch_all(ports, "/metrics", as_json=False)
+        body = merge_metrics({i: text for i, text in results.items() if text})
+        return web.Response(body=body.encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/healthz", health)
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # pragma: no cover - e.g. Windows
+            pass
+
+    async def monitor():
+        nonlocal failure
+        restart_at: Dict[int, float] = {}
+        while not stopping:
+            await asyncio.sleep(min(1.0, policy.delay))
+            for index, process in list(processes.items()):
+                if stopping or process.is_alive():
+                    continue
+                if index not in restart_at:
+                    delay = policy.next_delay(index, loop.time())
+                    if delay is None:
+                        given_up.add(index)
+                        failure = ShardFailed(
+                            f"shard {index} crashed {policy.max_restarts + 1} times in a row "
+                            f"(last exit code {process.exitcode})")
+                        logger.error("%s, stopping", failure)
+                        stop.set()
+                        return
+                    logger.error("Shard %s exited with %s, restarting in %.0fs",
+                                 index, process.exitcode, delay)
+                    restart_at[index] = loop.time() + delay
+                if loop.time() >= restart_at[index]:
+                    del restart_at[index]
+                    spawn(index)
+
+    monitor_task = asyncio.create_task(monitor())
+    listener_task = asyncio.create_task(supervisor.run())
+    listener_task.add_done_callback(lambda _: stop.set())
+    try:
+        await stop.wait()
+    finally:
+        stopping = True
+        monitor_task.cancel()
+        listener_task.cancel()
+        await asyncio.gather(monitor_task, listener_task, return_exceptions=True)
+        for inbox in inboxes:
+            try:
+                await asyncio.to_thread(inbox.put, None, True, 5)
+            except queue_module.Full:
+                logger.warning("Shard inbox still full at shutdown")
+        drain_timeout = None if args.replay else 60
+        for process in processes.values():
+            await asyncio.to_thread(process.join, drain_timeout)
+            if process.is_alive():
+                process.terminate()
+        await runner.cleanup()
+    if failure is not None:
+        raise failure
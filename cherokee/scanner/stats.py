@@ -0,0 +1,93 @@
+"""End-to-end throughput and latency tracking for the scanner pipeline."""
+
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class RateCounter:
+    """Events per second over the last ``window`` seconds.
+
+    Counts go into a ring of one-second buckets, so the rate has no upper
+    bound and reading it costs ``window`` additions however busy it is.
+    """
+
+    def __init__(self, window: int = 60):
+        self.window = window
+        self._counts = [0] * window
+        self._seconds = [-1] * window
+
+    def add(self, count: int = 1, now: Optional[float] = None) -> None:
+        second = int(time.time() if now is None else now)
+        index = second % self.window
+        if self._seconds[index] != second:
+            self._seconds[index] = second
+            self._counts[index] = 0
+        self._counts[index] += count
+
+    def rate(self, now: Optional[float] = None) -> float:
+        second = int(time.time() if now is None else now)
+        total = sum(count for count, at in zip(self._counts, self._seconds)
+                    if second - self.window < at <= second)
+        return total / self.window
+
+
+class PipelineStats:
+    """Record when detected events finish processing.
+
+    Latency is measured from an event's ``detected_at`` to completion and
+    kept for the most recent ``window`` events; the recent rate covers the
+    last ``rate_window`` seconds.
+    """
+
+    def __init__(self, window: int = 10000, rate_window: int = 60):
+        self.completed = 0
+        self.skipped = 0
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+        self._latencies = deque(maxlen=window)
+        self._rate = RateCounter(rate_window)
+
+    def record(self, event: Dict[str, Any], now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        if self.first_at is None:
+            self.first_at = now
+        self.last_at = now
+        self.completed += 1
+        self._rate.add(now=now)
+        detected_at = event.get('detected_at')
+        if detected_at is not None:
+            self._latencies.append(max(0.0, now - detected_at))
+
+    def record_skip(self) -> None:
+        self.skipped += 1
+
+    def throughput(self) -> float:
+        """Completed events per second between the first and last completion."""
+        if self.completed < 2 or self.last_at == self.first_at:
+            return 0.0
+        return (self.completed - 1) / (self.last_at - self.first_at)
+
+    def recent_rate(self, now: Optional[float] = None) -> float:
+        """Completed events per second over the last ``rate_window`` seconds."""
+        return self._rate.rate(now)
+
+    def summary(self) -> Dict[str, Any]:
+        result = {
+            'completed': self.completed,
+            'skipped': self.skipped,
+            'throughput_per_s': round(self.throughput(), 3),
+        }
+        if self._latencies:
+            latencies = np.fromiter(self._latencies, dtype=float)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            result['latency_s'] = {
+                'mean': round(float(latencies.mean()), 4),
+                'p50': round(float(p50), 4),
+                'p95': round(float(p95), 4),
+                'p99': round(float(p99), 4),
+                'max': round(float(latencies.max()), 4),
+            }
+        return result
@@ -0,0 +1,84 @@
+"""Concurrent analysis workers for the token scanner."""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = int(os.getenv("SCANNER_WORKERS", "4"))
+DEFAULT_QUEUE_SIZE = int(os.getenv("SCANNER_QUEUE_SIZE", "1000"))
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class WorkerPool:
+    """Run ``handler`` for every queued token on ``size`` concurrent workers.
+
+    The queue should be bounded so that listeners block on ``put`` while the
+    workers are saturated instead of buffering an unbounded backlog.
+    """
+
+    def __init__(self, queue: asyncio.Queue, handler: Handler, size: int = DEFAULT_WORKERS):
+        if size < 1:
+            raise ValueError("worker pool size must be at least 1")
+        self.queue = queue
+        self.handler = handler
+        self.size = size
+        self.processed = 0
+        self.failed = 0
+        self._tasks: List[asyncio.Task] = []
+        # durable queues acknowledge tokens that were handled and dead-letter
+        # tokens whose handler failed; a cancelled token is left unacknowledged
+        # so it is redelivered on the next start
+        self._ack = getattr(queue, "ack", None)
+        self._dead_letter = getattr(queue, "dead_letter", None)
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        for i in range(self.size):
+            task = asyncio.create_task(self._worker(i), name=f"scanner-worker-{i}")
+            self._tasks.append(task)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            token_info = await self.queue.get()
+            try:
+                await self.handler(token_info)
+            except Exception as exc:
+                self.failed += 1
+                logger.exception(
+                    "Worker %s failed to process token %s", index, token_info.get("address")
+                )
+                if self._dead_letter is not None:
+                    self._dead_letter(token_info, f"{type(exc).__name__}: {exc}")
+            else:
+                self.processed += 1
+                if self._ack is not None:
+                    self._ack(token_info)
+            finally:
+                self.queue.task_done()
+
+    async def stop(self, timeout: Optional[float] = 30.0) -> None:
+        """Drain the queue, then cancel the workers.
+
+        Tokens still queued or being handled after ``timeout`` seconds are
+        abandoned; a durable queue redelivers them on the next start.
+        """
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Worker pool stopped with %s tokens still queued", self.queue.qsize()
+                )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
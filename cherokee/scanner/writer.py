@@ -0,0 +1,90 @@
+"""Batched database writer for scanner analysis results."""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .. import database
+
+logger = logging.getLogger(__name__)
+
+WRITER_BATCH_SIZE = int(os.getenv("SCANNER_WRITER_BATCH_SIZE", "100"))
+WRITER_MAX_DELAY = float(os.getenv("SCANNER_WRITER_MAX_DELAY_MS", "50")) / 1000
+
+_STOP = object()
+
+
+class TokenWriter:
+    """Collect analysis results and upsert them in micro-batches.
+
+    A batch is committed once ``batch_size`` results are waiting or
+    ``max_delay`` seconds after its first result arrived.  Commits run on a
+    worker thread so the event loop never blocks on SQLite.
+    """
+
+    def __init__(self, batch_size: int = WRITER_BATCH_SIZE, max_delay: float = WRITER_MAX_DELAY):
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.batches = 0
+        self.written = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="scanner-writer")
+
+    async def submit(self, result: Dict[str, Any]) -> None:
+        """Queue ``result`` and wait until its batch is committed."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((result, future))
+        await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            await asyncio.to_thread(database.upsert_tokens, [result for result, _ in batch])
+        except Exception as exc:
+            logger.exception("Failed to write %s token results", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.batches += 1
+        self.written += len(batch)
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+
+    async def stop(self) -> None:
+        """Commit everything already queued, then stop the writer."""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
@@ -0,0 +1,259 @@
+"""Full-text and address-prefix search over the ``tokens`` table.
+
+On SQLite an FTS5 index ``tokens_fts`` over name, symbol and address is
+kept in sync with ``tokens`` by triggers, and an expression index on
+``lower(address)`` serves address-prefix lookups.  ``0x`` input only uses
+that address range.  FTS5 words only match by prefix, so a second,
+trigram-tokenized index ``tokens_trigram`` finds fragments from the middle
+of an address, name or symbol when the word index has no hit; it needs
+SQLite 3.34 or later and terms of at least three characters.  Other
+databases, or SQLite builds without FTS5, fall back to ``LIKE`` filtering.
+
+Rebuild the indexes of an existing database with::
+
+    python -m cherokee.search rebuild
+"""
+
+import argparse
+import logging
+import re
+import weakref
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from sqlalchemy import func, literal, select, text
+from sqlalchemy.sql import column, table
+from sqlalchemy.exc import OperationalError
+
+from . import database
+
+logger = logging.getLogger(__name__)
+
+# bm25 column weights for (name, symbol, address)
+RANK_WEIGHTS = (10.0, 10.0, 1.0)
+SEARCH_MAX_LIMIT = 100
+# only the newest matches of a term are ranked, so a term found in most
+# tokens (e.g. "token") does not score the whole table
+SEARCH_WINDOW = 500
+# trigram queries need terms of at least this many characters
+TRIGRAM_MIN_TERM = 3
+
+
+def _fts_schema(name: str, options: str):
+    return (
+        f"CREATE VIRTUAL TABLE {name} USING fts5("
+        f"name, symbol, address, content='tokens', content_rowid='id', {options})",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON tokens BEGIN "
+        f"INSERT INTO {name}(rowid, name, symbol, address) "
+        "VALUES (new.id, new.name, new.symbol, new.address); END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON tokens BEGIN "
+        f"INSERT INTO {name}({name}, rowid, name, symbol, address) "
+        "VALUES ('delete', old.id, old.name, old.symbol, old.address); END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF name, symbol, address ON tokens BEGIN "
+        f"INSERT INTO {name}({name}, rowid, name, symbol, address) "
+        "VALUES ('delete', old.id, old.name, old.symbol, old.address); "
+        f"INSERT INTO {name}(rowid, name, symbol, address) "
+        "VALUES (new.id, new.name, new.symbol, new.address); END",
+    )
+
+
+# index table -> statements creating it and its triggers
+_INDEXES = {
+    'tokens_fts': _fts_schema('tokens_fts', "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'"),
+    'tokens_trigram': _fts_schema('tokens_trigram', "tokenize='trigram'"),
+}
+ADDRESS_INDEX = "CREATE INDEX IF NOT EXISTS ix_tokens_address_lower ON tokens (lower(address))"
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def _has_table(conn, name: str) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': name}).first() is not None
+
+
+# engine -> search index tables it has; dropped when ensure_search_index
+# may have created more
+_engine_indexes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _indexes(engine=None) -> FrozenSet[str]:
+    engine = engine or database.engine
+    found = _engine_indexes.get(engine)
+    if found is None:
+        found = frozenset()
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as conn:
+                found = frozenset(name for name in _INDEXES if _has_table(conn, name))
+        _engine_indexes[engine] = found
+    return found
+
+
+def fts_enabled(engine=None) -> bool:
+    return 'tokens_fts' in _indexes(engine)
+
+
+def trigram_enabled(engine=None) -> bool:
+    return 'tokens_trigram' in _indexes(engine)
+
+
+def ensure_search_index(conn) -> None:
+    """Create the search indexes on ``conn`` if missing, indexing existing rows."""
+    if conn.dialect.name != 'sqlite':
+        return
+    _engine_indexes.pop(conn.engine, None)
+    conn.execute(text(ADDRESS_INDEX))
+    for name, schema in _INDEXES.items():
+        if _has_table(conn, name):
+            continue
+        try:
+            for statement in schema:
+                conn.execute(text(statement))
+        except OperationalError:
+            # SQLite without FTS5 (searches use LIKE) or before 3.34 (no trigram tokenizer)
+            logger.warning("Could not create search index %s, token search is limited", name)
+            continue
+        conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+
+
+def rebuild_search_index() -> None:
+    """Rebuild ``tokens_fts`` and ``tokens_trigram`` from the ``tokens`` table."""
+    with database.engine.begin() as conn:
+        ensure_search_index(conn)
+        for name in _INDEXES:
+            if _has_table(conn, name):
+                conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+                conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('optimize')"))
+
+
+def fts_query(q: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching every term as a prefix."""
+    terms = _TERM.findall(q.lower())
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def trigram_query(q: str) -> Optional[str]:
+    """Turn free text into a trigram query matching every term as a substring."""
+    terms = _TERM.findall(q.lower())
+    if not terms or any(len(term) < TRIGRAM_MIN_TERM for term in terms):
+        return None
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def _prefix_range(prefix: str):
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _address_prefix(model, q: str):
+    low, high = _prefix_range(q.lower())
+    address = func.lower(model.address)
+    return (address >= low) & (address < high)
+
+
+def _like_filter(model, q: str):
+    pattern = f"%{q}%"
+    return model.address.like(pattern) | model.name.like(pattern) | model.symbol.like(pattern)
+
+
+def _matches(name: str, query: str):
+    index = table(name, column('rowid'))
+    return select(index.c.rowid).where(text(f'{name} MATCH :match').bindparams(match=query))
+
+
+def token_filter(q: str, engine=None):
+    """SQL condition restricting ``tokens`` to rows matching ``q``."""
+    from .models import Token
+
+    q = q.strip()
+    if q.lower().startswith('0x'):
+        return _address_prefix(Token, q)
+    indexes = _indexes(engine)
+    query = fts_query(q)
+    if query is None or 'tokens_fts' not in indexes:
+        return _like_filter(Token, q)
+    matches = _matches('tokens_fts', query)
+    substring = trigram_query(q)
+    if substring is not None and 'tokens_trigram' in indexes:
+        matches = matches.union(_matches('tokens_trigram', substring))
+    return Token.id.in_(matches)
+
+
+def _row_dict(row) -> Dict[str, Any]:
+    item = dict(row)
+    if isinstance(item.get('detected_at'), datetime):
+        item['detected_at'] = item['detected_at'].isoformat()
+    return item
+
+
+def _like_rows(session, q: str, limit: int) -> List[Dict[str, Any]]:
+    from .models import Token
+
+    rows = session.execute(
+        select(Token.__table__, literal(None).label('rank')).where(_like_filter(Token, q)).limit(limit)
+    ).mappings()
+    return [_row_dict(row) for row in rows]
+
+
+def _ranked(session, name: str, query: str, limit: int) -> List[Dict[str, Any]]:
+    """Rows of the newest ``SEARCH_WINDOW`` matches in index ``name``, best first."""
+    from .models import Token
+
+    tokens = Token.__table__
+    weights = ', '.join(str(w) for w in RANK_WEIGHTS)
+    ranked = session.execute(text(
+        f"SELECT rowid, bm25({name}, {weights}) AS rank FROM {name} "
+        f"WHERE {name} MATCH :match AND rowid >= ("
+        f"SELECT min(rowid) FROM (SELECT rowid FROM {name} WHERE {name} MATCH :match "
+        "ORDER BY rowid DESC LIMIT :window)) ORDER BY rank LIMIT :limit"),
+        {'match': query, 'window': SEARCH_WINDOW, 'limit': limit}).all()
+    ranks = dict(ranked)
+    rows = session.execute(select(tokens).where(tokens.c.id.in_(ranks))).mappings()
+    by_id = {row['id']: dict(_row_dict(row), rank=ranks[row['id']]) for row in rows}
+    return [by_id[row_id] for row_id in ranks if row_id in by_id]
+
+
+def search_tokens(session, q: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Return tokens matching ``q``, best matches first.
+
+    ``0x`` input returns address-prefix matches.  Other input is ranked by
+    bm25 over the word index with name and symbol weighted above the
+    address, or over the trigram index when no word starts with a term.
+    """
+    from .models import Token
+
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    q = q.strip()
+    query = fts_query(q)
+    if query is None:
+        return []
+    tokens = Token.__table__
+    if q.lower().startswith('0x'):
+        rows = session.execute(
+            select(tokens, literal(0.0).label('rank'))
+            .where(_address_prefix(tokens.c, q)).order_by(func.lower(tokens.c.address)).limit(limit)
+        ).mappings()
+        return [_row_dict(row) for row in rows]
+    indexes = _indexes(session.get_bind())
+    if 'tokens_fts' not in indexes:
+        return _like_rows(session, q, limit)
+    results = _ranked(session, 'tokens_fts', query, limit)
+    substring = trigram_query(q)
+    if not results and substring is not None and 'tokens_trigram' in indexes:
+        results = _ranked(session, 'tokens_trigram', substring, limit)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the Cherokee token search index.")
+    parser.add_argument('command', choices=['rebuild'])
+    parser.parse_args(argv)
+    database.init_db()
+    rebuild_search_index()
+    print("Token search index rebuilt")
+
+
+if __name__ == '__main__':
+    main()
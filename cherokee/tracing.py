@@ -0,0 +1,179 @@
+"""Sampled per-token tracing of the scanner pipeline.
+
+A trace is started for each sampled token and timed spans recorded while
+it is processed are attached to it through a context variable, so they
+follow the token across ``await`` points.  Finished traces are written as
+one JSON line each to a size-rotated file that the API reads back.  Size
+rotation is not safe across processes, so each scanner shard writes its
+own ``traces-shard{N}.jsonl`` next to ``TRACE_PATH``.  When a token is not
+sampled ``span`` returns a shared no-op context manager.
+"""
+
+import glob
+import heapq
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from contextlib import nullcontext
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+TRACE_PATH = os.getenv('TRACE_PATH', os.path.join('logs', 'traces.jsonl'))
+TRACE_MAX_BYTES = int(os.getenv('TRACE_MAX_BYTES', str(10 * 1024 * 1024)))
+TRACE_BACKUPS = int(os.getenv('TRACE_BACKUPS', '3'))
+
+_current: ContextVar[Optional['Trace']] = ContextVar('cherokee_trace', default=None)
+_NOOP = nullcontext()
+_exporter: Optional[logging.Logger] = None
+# this process's trace file when it differs from TRACE_PATH
+_export_path: Optional[str] = None
+
+
+class Trace:
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': round((time.perf_counter() - self._t0) * 1000, 3),
+            'attrs': self.attrs,
+            'error': self.error,
+            'spans': self.spans,
+        }
+
+
+class _Span:
+    __slots__ = ('trace', 'name', 'attrs', '_t0')
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.trace.spans.append({
+            'name': self.name,
+            'offset_ms': round((self._t0 - self.trace._t0) * 1000, 3),
+            'duration_ms': round((end - self._t0) * 1000, 3),
+            'attrs': self.attrs,
+            'error': repr(exc) if exc is not None else None,
+        })
+        return False
+
+
+class _TraceContext:
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.trace = Trace(name, attrs)
+
+    def __enter__(self) -> Trace:
+        self._token = _current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        if exc is not None:
+            self.trace.error = repr(exc)
+        export(self.trace.to_dict())
+        return False
+
+
+def start_trace(name: str, sample_rate: Optional[float] = None, **attrs):
+    """Begin a trace for one unit of work if it is sampled."""
+    rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return _NOOP
+    return _TraceContext(name, attrs)
+
+
+def span(name: str, **attrs):
+    """Time a block as a span of the current trace, if there is one."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, attrs)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def shard_trace_path(shard: int, path: Optional[str] = None) -> str:
+    root, ext = os.path.splitext(path or TRACE_PATH)
+    return f'{root}-shard{shard}{ext}'
+
+
+def set_shard(shard: int) -> None:
+    """Write this process's traces to the file of scanner shard ``shard``."""
+    global _export_path
+    _export_path = shard_trace_path(shard)
+
+
+def _get_exporter() -> logging.Logger:
+    global _exporter
+    if _exporter is None:
+        path = _export_path or TRACE_PATH
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        exporter = logging.getLogger('cherokee.traces')
+        exporter.setLevel(logging.INFO)
+        exporter.propagate = False
+        exporter.addHandler(handler)
+        _exporter = exporter
+    return _exporter
+
+
+def export(trace: Dict[str, Any]) -> None:
+    _get_exporter().info(json.dumps(trace, default=str))
+
+
+def _trace_files(path: str) -> List[Path]:
+    root, ext = os.path.splitext(path)
+    bases = [path] + sorted(glob.glob(f'{glob.escape(root)}-shard*{ext}'))
+    return [Path(f'{base}{suffix}') for base in bases
+            for suffix in [''] + [f'.{i}' for i in range(1, TRACE_BACKUPS + 1)]]
+
+
+def _read_traces(files: List[Path], cutoff: float) -> Iterator[Dict[str, Any]]:
+    for file in files:
+        if not file.exists():
+            continue
+        with file.open() as fh:
+            for line in fh:
+                try:
+                    trace = json.loads(line)
+                except ValueError:  # partially written line
+                    continue
+                if trace.get('start', 0) >= cutoff:
+                    yield trace
+
+
+def slowest_traces(limit: int = 20, since: Optional[float] = None,
+                   path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return the slowest traces from the current, rotated and shard trace files.
+
+    ``since`` limits the result to traces started in the last ``since`` seconds.
+    """
+    cutoff = time.time() - since if since else 0
+    traces = _read_traces(_trace_files(path or TRACE_PATH), cutoff)
+    return heapq.nlargest(limit, traces, key=lambda t: t.get('duration_ms', 0))
@@ -1,30 +1,38 @@
 import asyncio
 from datetime import datetime
-from typing import Dict
+from typing import Callable, Dict, Optional
 
 from .database import SessionLocal
+from .metrics import PAPER_TRADES
 from .models import Trade
+from .tracing import span
 
 
 class PaperTrader:
     """Simple paper trading engine that keeps track of a virtual balance."""
 
-    def __init__(self, starting_balance: float = 10000.0):
+    def __init__(self, starting_balance: float = 10000.0,
+                 on_trade: Optional[Callable[[dict], None]] = None):
         self.balance = starting_balance
         self.positions: Dict[str, float] = {}  # token_address -> quantity
         self.session = SessionLocal()
+        # called with the committed trade, e.g. to publish it to the UI
+        self.on_trade = on_trade
 
     async def buy(self, token_address: str, quantity: float, price: float, reasoning: str = ""):
-        cost = quantity * price
-        if self.balance < cost:
-            return False
-        self.balance -= cost
-        self.positions[token_address] = self.positions.get(token_address, 0) + quantity
-        trade = Trade(token_address=token_address, action="BUY", quantity=quantity, price=price,
-                      reasoning=reasoning, is_live=0)
-        self.session.add(trade)
-        self.session.commit()
-        return True
+        with span("paper_trade", action="buy"):
+            cost = quantity * price
+            if self.balance < cost:
+                return False
+            self.balance -= cost
+            self.positions[token_address] = self.positions.get(token_address, 0) + quantity
+            trade = Trade(token_address=token_address, action="BUY", quantity=quantity, price=price,
+                          reasoning=reasoning, is_live=0)
+            self.session.add(trade)
+            self.session.commit()
+            PAPER_TRADES.inc(action="buy")
+            self._notify(trade)
+            return True
 
     async def sell(self, token_address: str, quantity: float, price: float, reasoning: str = ""):
         held = self.positions.get(token_address, 0)
@@ -37,7 +45,13 @@ class PaperTrader:
                       reasoning=reasoning, is_live=0)
         self.session.add(trade)
         self.session.commit()
+        PAPER_TRADES.inc(action="sell")
+        self._notify(trade)
         return True
 
+    def _notify(self, trade: Trade) -> None:
+        if self.on_trade is not None:
+            self.on_trade(trade.to_dict())
+
     def close(self):
         self.session.close()
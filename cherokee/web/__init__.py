@@ -2,17 +2,21 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 from .api import bp
+from .pagination import CURSOR_HEADER
 from ..logic_playground.api import bp as logic_bp
 from ..scalper import bp as scalper_bp
 from backend.llm.routes import bp as llm_bp
 from backend.strategies.routes import bp as strategies_bp
 from ..database import init_db, populate_sample_data
+from ..health import get_prober
 import os
 
-def create_app():
+def create_app(testing=False):
     load_dotenv()
     app = Flask(__name__)
-    CORS(app)
+    app.config["TESTING"] = testing
+    # the frontend is cross-origin and needs the header to page
+    CORS(app, expose_headers=[CURSOR_HEADER])
     init_db()
     app.register_blueprint(logic_bp)
     app.register_blueprint(scalper_bp)
@@ -21,6 +25,9 @@ def create_app():
     if os.getenv("CHEROKEE_AUTO_SAMPLE", "1") == "1" and not app.config.get("TESTING"):
         populate_sample_data()
     app.register_blueprint(bp)
+    if not app.config["TESTING"]:
+        # status is known by the time the UI first asks for it
+        get_prober()
 
     @app.route('/')
     def index():
@@ -1,19 +1,36 @@
 """Flask blueprint exposing Cherokee API endpoints."""
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+import hmac
 import os
-import json
+import re
+from concurrent.futures import TimeoutError as FutureTimeout
 from pathlib import Path
-import requests
 from ..database import SessionLocal
+from ..events import EVENT_BUS, EVENTS_TOKEN, EVENTS_TOKEN_HEADER
+from ..health import get_prober
+from ..scan_jobs import SCAN_JOB_MAX_BATCH, get_manager
+from .. import logtail
 from ..models import Token, Trade
 from ..trading import PaperTrader
+from ..search import search_tokens, token_filter
+from .pagination import PaginationError, page_response, paginate
+from ..response_cache import json_file_response
+from .streaming import stream_export
 import asyncio
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
+TOKEN_SORTS = ('id', 'detected_at', 'risk_score')
+TRADE_SORTS = ('id', 'timestamp')
+TRADE_CONVERTERS = {'is_live': bool}
+LOG_NAME = re.compile(r'[\w-]+')
+MAX_LOG_LINES = 5000
+# how long /scan and /reanalyze wait for their job before answering 202
+SCAN_WAIT_TIMEOUT = 60
+
 # single PaperTrader instance used for the /trade endpoint
-trader = PaperTrader()
+trader = PaperTrader(on_trade=lambda trade: EVENT_BUS.publish('trade', trade))
 
 # simple runtime state for new UI endpoints
 SESSIONS = {}
@@ -43,15 +60,16 @@ def healthz():
 
 @bp.get('/service-status')
 def service_status():
-    """Return status for backend and scanner services."""
-    scanner_ok = False
-    try:
-        r = requests.get('http://127.0.0.1:5001/healthz', timeout=2)
-        if r.status_code == 200 and r.json().get('status') == 'ok':
-            scanner_ok = True
-    except Exception:
-        scanner_ok = False
-    return jsonify({'backend': 'ok', 'scanner': 'ok' if scanner_ok else 'down'})
+    """Return status for backend and scanner services.
+
+    Answers from the background health prober; ``services`` holds the last
+    check, last healthy time and latency history of every probed service.
+    """
+    prober = get_prober()
+    # 'unknown' until the first probe finished, so a restart does not
+    # report a healthy scanner as down
+    return jsonify({'backend': 'ok', 'scanner': prober.status('scanner'),
+                    'services': prober.snapshot()})
 
 
 @bp.get('/config')
@@ -72,32 +90,86 @@ def update_config():
 
 @bp.get('/logs')
 def get_logs():
-    """Return the last lines of a log file (server or scanner)."""
+    """Return the last lines of a log file (server or scanner).
+
+    ``lines`` sets how many (default 50), ``level`` keeps lines at or above
+    a level and ``q`` lines containing a text.  The response carries a
+    ``cursor``; passing it back returns only the lines written since, and
+    ``stream=1`` keeps the connection open as Server-Sent Events.
+    """
     name = request.args.get('file', 'scanner')
+    if not LOG_NAME.fullmatch(name):
+        return jsonify({'error': 'invalid log name'}), 400
     path = os.path.join('logs', f'{name}.log')
     if not os.path.exists(path):
         return jsonify({'error': 'log not found'}), 404
-    with open(path, 'r') as f:
-        lines = f.readlines()[-50:]
-    return jsonify({'file': name, 'lines': lines})
+    try:
+        line_filter = logtail.LineFilter(request.args.get('level'), request.args.get('q'))
+        count = max(1, min(request.args.get('lines', 50, type=int), MAX_LOG_LINES))
+        cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+        if cursor:
+            logtail.parse_cursor(cursor)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    if request.args.get('stream') == '1':
+        if not cursor:
+            _, cursor = logtail.tail(path, 0)
+        resp = Response(stream_with_context(logtail.stream_follow(path, cursor, line_filter)),
+                        mimetype='text/event-stream')
+        resp.headers['Cache-Control'] = 'no-cache'
+        resp.headers['X-Accel-Buffering'] = 'no'
+        return resp
+    if cursor:
+        lines, cursor = logtail.follow(path, cursor, line_filter)
+    else:
+        lines, cursor = logtail.tail(path, count, line_filter)
+    return jsonify({'file': name, 'lines': lines, 'cursor': cursor})
+
+@bp.get('/traces/slowest')
+def slowest_traces():
+    """Return the slowest recently sampled scanner traces with their spans."""
+    from ..tracing import slowest_traces as load_slowest
+
+    limit = request.args.get('limit', 20, type=int)
+    since = request.args.get('since', type=float)
+    return jsonify(load_slowest(limit=max(1, min(limit, 500)), since=since))
+
+@bp.errorhandler(PaginationError)
+def pagination_error(exc):
+    return jsonify({'error': str(exc)}), 400
+
 
 @bp.route('/tokens')
 def list_tokens():
-    """Return all known tokens or filter by query string."""
+    """Return a page of known tokens, optionally filtered by query string."""
     q = request.args.get('q')
     session = SessionLocal()
-    query = session.query(Token)
-    if q:
-        pattern = f"%{q}%"
-        query = query.filter(
-            (Token.address.like(pattern)) |
-            (Token.name.like(pattern)) |
-            (Token.symbol.like(pattern))
-        )
-    tokens = query.all()
-    data = [t.to_dict() for t in tokens]
-    session.close()
-    return jsonify(data)
+    filters = [token_filter(q, session.get_bind())] if q else []
+    try:
+        data, cursor = paginate(session, Token, request.args, TOKEN_SORTS, 'id', filters)
+    finally:
+        session.close()
+    return page_response(data, cursor)
+
+@bp.get('/tokens/export')
+def export_tokens():
+    """Stream all tokens (optionally filtered by ``q``) as NDJSON, JSON or CSV."""
+    q = request.args.get('q')
+    filters = [token_filter(q)] if q else []
+    return stream_export(SessionLocal, Token, request.args, filters)
+
+
+@bp.get('/tokens/search')
+def token_search():
+    """Return tokens matching ``q`` ranked by relevance, address prefixes first."""
+    q = request.args.get('q', '')
+    limit = request.args.get('limit', 20, type=int)
+    session = SessionLocal()
+    try:
+        return jsonify(search_tokens(session, q, limit))
+    finally:
+        session.close()
 
 @bp.route('/tokens/<address>')
 def token_detail(address):
@@ -113,43 +185,30 @@ def token_detail(address):
 @bp.post('/tokens/<address>/reanalyze')
 def reanalyze_token(address):
     """Re-run analysis for a token and update the database."""
-    from ..analyzer.token_analyzer import TokenAnalyzer
-    session = SessionLocal()
-    analyzer = TokenAnalyzer(
-        session,
-        etherscan_api_key=os.getenv('ETHERSCAN_API_KEY', ''),
-        bscscan_api_key=os.getenv('BSC_SCAN_API_KEY', '')
-    )
-    result = asyncio.run(analyzer.analyze(address))
-    existing = session.query(Token).filter_by(address=address).first()
-    if existing:
-        for k, v in result.items():
-            setattr(existing, k, v)
-    else:
-        existing = Token.from_dict(result)
-        session.add(existing)
-    session.commit()
-    session.close()
-    return jsonify(result)
+    return _run_scan_job(address, 'ethereum')
 
 @bp.route('/high-risk')
 def high_risk():
-    """List tokens flagged as High or Critical risk."""
+    """List tokens flagged as High or Critical risk, newest first."""
     session = SessionLocal()
-    tokens = session.query(Token).filter(Token.risk_level.in_(['High','Critical'])).all()
-    data = [t.to_dict() for t in tokens]
-    session.close()
-    return jsonify(data)
+    try:
+        data, cursor = paginate(session, Token, request.args, TOKEN_SORTS, '-detected_at',
+                                [Token.risk_level.in_(['High', 'Critical'])])
+    finally:
+        session.close()
+    return page_response(data, cursor)
 
 
 @bp.route('/trades')
 def list_trades():
-    """Return all recorded paper and live trades."""
+    """Return recorded paper and live trades, newest first."""
     session = SessionLocal()
-    trades = session.query(Trade).order_by(Trade.timestamp.desc()).all()
-    data = [t.to_dict() for t in trades]
-    session.close()
-    return jsonify(data)
+    try:
+        data, cursor = paginate(session, Trade, request.args, TRADE_SORTS, '-timestamp',
+                                converters=TRADE_CONVERTERS)
+    finally:
+        session.close()
+    return page_response(data, cursor)
 
 
 @bp.route('/trade', methods=['POST'])
@@ -180,37 +239,116 @@ def scan_token():
     chain = data.get('chain', 'ethereum')
     if not address:
         return jsonify({'error': 'missing address'}), 400
+    return _run_scan_job(address, chain)
 
-    from ..analyzer.token_analyzer import TokenAnalyzer
 
-    session = SessionLocal()
-    analyzer = TokenAnalyzer(
-        session,
-        etherscan_api_key=os.getenv('ETHERSCAN_API_KEY', ''),
-        bscscan_api_key=os.getenv('BSC_SCAN_API_KEY', '')
-    )
-    result = asyncio.run(analyzer.analyze(address, chain))
-    existing = session.query(Token).filter_by(address=address).first()
-    if existing:
-        for k, v in result.items():
-            setattr(existing, k, v)
-    else:
-        existing = Token.from_dict(result)
-        session.add(existing)
-    session.commit()
-    session.close()
-    return jsonify(result)
+def _run_scan_job(address, chain):
+    """Submit a scan job and answer with its result once it finishes."""
+    job = get_manager().submit([(address, chain)]).jobs[0]
+    try:
+        return jsonify(job.wait(SCAN_WAIT_TIMEOUT))
+    except FutureTimeout:
+        # still running: the client can poll the job instead
+        return jsonify(job.to_dict()), 202
+    except Exception:
+        return jsonify({'error': 'analysis failed', 'job': job.to_dict()}), 502
+
+
+@bp.post('/scan/jobs')
+def submit_scan_jobs():
+    """Queue analyses and return their job ids without waiting.
+
+    The body is ``{"address": ..., "chain": ...}`` for one token or
+    ``{"addresses": [...], "chain": ...}`` for a batch.  Jobs run
+    concurrently in the background; poll ``/scan/jobs/<id>`` or
+    ``/scan/batches/<id>`` (``?stream=1`` for Server-Sent Events).
+    """
+    data = request.get_json(silent=True) or {}
+    chain = data.get('chain', 'ethereum')
+    addresses = data.get('addresses')
+    if addresses is None and data.get('address'):
+        addresses = [data['address']]
+    if not isinstance(addresses, list) or not addresses:
+        return jsonify({'error': 'missing address or addresses'}), 400
+    if not all(isinstance(a, str) and a for a in addresses):
+        return jsonify({'error': 'addresses must be non-empty strings'}), 400
+    if len(addresses) > SCAN_JOB_MAX_BATCH:
+        return jsonify({'error': f'at most {SCAN_JOB_MAX_BATCH} addresses per batch'}), 400
+    batch = get_manager().submit((address, chain) for address in addresses)
+    return jsonify({
+        'batch': batch.id,
+        'jobs': [{'id': job.id, 'address': job.address} for job in batch.jobs],
+    }), 202
+
+
+@bp.get('/scan/jobs/<job_id>')
+def get_scan_job(job_id):
+    """Return the status and, once finished, the result of a scan job."""
+    job = get_manager().get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+@bp.get('/scan/batches/<batch_id>')
+def get_scan_batch(batch_id):
+    """Return job counts and jobs of a batch, or stream them with ``stream=1``."""
+    manager = get_manager()
+    batch = manager.get_batch(batch_id)
+    if batch is None:
+        return jsonify({'error': 'batch not found'}), 404
+    if request.args.get('stream') == '1':
+        resp = Response(stream_with_context(manager.stream(batch)), mimetype='text/event-stream')
+        resp.headers['Cache-Control'] = 'no-cache'
+        resp.headers['X-Accel-Buffering'] = 'no'
+        return resp
+    return jsonify(batch.to_dict())
 
 
 # ------------------ New UI Endpoints ------------------
 
+@bp.get('/events')
+def event_stream():
+    """Server-Sent Events stream of token, trade and bot_state deltas.
+
+    Reconnecting clients send ``Last-Event-ID`` (or ``?last_event_id=``)
+    and first receive the buffered events they missed.
+    """
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+    resp = Response(stream_with_context(EVENT_BUS.stream(last_id)), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+
+@bp.post('/events/publish')
+def publish_events():
+    """Accept a batch of ``{type, data}`` events from the scanner.
+
+    Callers must send ``EVENTS_TOKEN`` in the ``X-Events-Token`` header; the
+    remote address is not trusted since a local reverse proxy makes every
+    client look like localhost.
+    """
+    token = request.headers.get(EVENTS_TOKEN_HEADER, '')
+    if not EVENTS_TOKEN or not hmac.compare_digest(token.encode(), EVENTS_TOKEN.encode()):
+        return jsonify({'error': 'forbidden'}), 403
+    events = request.get_json(silent=True)
+    if not isinstance(events, list):
+        return jsonify({'error': 'expected a list of events'}), 400
+    ids = [EVENT_BUS.publish(e['type'], e.get('data')) for e in events
+           if isinstance(e, dict) and e.get('type') in ('token', 'trade', 'bot_state')]
+    return jsonify({'published': len(ids)})
+
+
 @bp.get('/ui-spec')
 def ui_spec():
     """Return the UI design specification JSON."""
     spec_path = Path(__file__).resolve().parents[2] / 'design.json'
-    with open(spec_path, 'r') as f:
-        data = json.load(f)
-    return jsonify(data)
+    return json_file_response(spec_path)
 
 
 @bp.post('/login')
@@ -229,22 +367,32 @@ def login():
 @bp.post('/start-bot')
 def start_bot():
     BOT_STATE['running'] = True
+    EVENT_BUS.publish('bot_state', dict(BOT_STATE))
     return jsonify({'running': True})
 
 
 @bp.post('/stop-bot')
 def stop_bot():
     BOT_STATE['running'] = False
+    EVENT_BUS.publish('bot_state', dict(BOT_STATE))
     return jsonify({'running': False})
 
 
+@bp.get('/trades/export')
+def export_trades():
+    """Stream all trades as NDJSON, JSON or CSV."""
+    return stream_export(SessionLocal, Trade, request.args, converters=TRADE_CONVERTERS)
+
+
 @bp.get('/open-trades')
 def get_open_trades():
     session = SessionLocal()
-    trades = session.query(Trade).order_by(Trade.timestamp.desc()).all()
-    data = [t.to_dict() for t in trades]
-    session.close()
-    return jsonify(data)
+    try:
+        data, cursor = paginate(session, Trade, request.args, TRADE_SORTS, '-timestamp',
+                                converters=TRADE_CONVERTERS)
+    finally:
+        session.close()
+    return page_response(data, cursor)
 
 
 @bp.get('/chart-data')
@@ -0,0 +1,146 @@
+"""Keyset pagination and field projection for the list endpoints.
+
+List endpoints return a JSON list of at most ``limit`` rows.  When more
+rows are available the ``X-Next-Cursor`` response header carries an
+opaque cursor; passing it back as ``?cursor=`` returns the next page.
+Requests without ``limit`` or ``cursor`` still receive every row.
+Pages are selected with ``WHERE (sort, id) < (last sort, last id)``
+rather than ``OFFSET``, so every page costs the same however deep it is.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import jsonify
+from sqlalchemy import and_, or_, select
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class PaginationError(ValueError):
+    """Raised for invalid ``limit``, ``cursor``, ``sort`` or ``fields`` values."""
+
+
+def _encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str, sort: str, column) -> Tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, row_id = json.loads(raw)
+        if value is not None and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        row_id = int(row_id)
+    except (ValueError, TypeError, NotImplementedError):
+        raise PaginationError('invalid cursor')
+    if cursor_sort != sort:
+        raise PaginationError('cursor does not match sort order')
+    return value, row_id
+
+
+def _after(column, id_column, descending: bool, value, row_id: int):
+    """Condition selecting rows after ``(value, row_id)`` in the given order.
+
+    NULL sort values order first ascending and last descending, as in SQLite.
+    """
+    if descending:
+        if value is None:
+            return and_(column.is_(None), id_column < row_id)
+        return or_(column < value, and_(column == value, id_column < row_id), column.is_(None))
+    if value is None:
+        return or_(column.isnot(None), and_(column.is_(None), id_column > row_id))
+    return or_(column > value, and_(column == value, id_column > row_id))
+
+
+def _serialize(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def parse_fields(table, value: Optional[str]) -> List[str]:
+    """Return the requested ``fields=`` projection, or every column."""
+    if not value:
+        return [c.name for c in table.columns]
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in table.c]
+    if unknown:
+        raise PaginationError(f"unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def row_to_dict(row, fields: Sequence[str], converters: Optional[Dict[str, Callable]] = None) -> Dict[str, Any]:
+    """Serialize the ``fields`` of a Core row mapping for JSON output."""
+    item = {}
+    for name in fields:
+        value = row[name]
+        convert = converters.get(name) if converters else None
+        item[name] = convert(value) if convert and value is not None else _serialize(value)
+    return item
+
+
+def paginate(session, model, args, sorts: Sequence[str], default_sort: str,
+             filters: Iterable = (), converters: Optional[Dict[str, Callable]] = None):
+    """Return a ``(rows, next_cursor)`` page of ``model`` as plain dicts.
+
+    ``args`` are the request arguments: ``limit`` (at most 1000; without
+    ``limit`` and ``cursor`` every row is returned, otherwise the default
+    is 100), ``cursor``, ``sort`` (one of ``sorts``, prefixed with ``-`` for
+    descending) and ``fields``, a comma separated column projection.
+    Rows are read as Core rows; no ORM objects are built.
+    """
+    table = model.__table__
+    if 'limit' in args or args.get('cursor'):
+        try:
+            limit = int(args.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            raise PaginationError('limit must be an integer')
+        limit = max(1, min(limit, MAX_LIMIT))
+    else:
+        limit = None  # unpaginated, as before pagination was added
+
+    sort = args.get('sort', default_sort)
+    if sort.lstrip('-') not in sorts:
+        raise PaginationError(f"sort must be one of: {', '.join(sorts)} (prefix - for descending)")
+    descending = sort.startswith('-')
+    sort_column = table.c[sort.lstrip('-')]
+    id_column = table.c.id
+
+    fields = parse_fields(table, args.get('fields'))
+    # the cursor needs the sort key and id even when they are not returned
+    selected = list(dict.fromkeys(fields + [sort_column.name, 'id']))
+
+    stmt = select(*(table.c[name] for name in selected)).where(*filters)
+    if args.get('cursor'):
+        value, row_id = _decode_cursor(args['cursor'], sort, sort_column)
+        stmt = stmt.where(_after(sort_column, id_column, descending, value, row_id))
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), id_column.asc())
+    if limit is not None:
+        # one extra row tells whether there is a next page
+        stmt = stmt.limit(limit + 1)
+    rows = session.execute(stmt).mappings().all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(sort, last[sort_column.name], last['id'])
+    data = [row_to_dict(row, fields, converters) for row in rows]
+    return data, next_cursor
+
+
+def page_response(data: List[Dict[str, Any]], next_cursor: Optional[str]):
+    """JSON list response with the next page cursor in a header."""
+    resp = jsonify(data)
+    if next_cursor:
+        resp.headers[CURSOR_HEADER] = next_cursor
+    return resp
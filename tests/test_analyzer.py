@@ -0,0 +1,189 @@
+import time
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from cherokee.analyzer import token_analyzer
+from cherokee.analyzer.cache import TokenDetailsCache
+from cherokee.analyzer.rate_limit import TokenBucket
+from cherokee.analyzer.token_analyzer import TokenAnalyzer
+
+
+@pytest_asyncio.fixture
+async def explorer(monkeypatch):
+    calls = []
+
+    async def tokeninfo(request):
+        calls.append(request.query["contractaddress"])
+        return web.json_response({"status": "1", "result": [{"tokenName": "Fake", "symbol": "FAKE"}]})
+
+    app = web.Application()
+    app.router.add_get("/api", tokeninfo)
+    server = TestServer(app)
+    await server.start_server()
+    base = str(server.make_url("")).rstrip("/")
+    monkeypatch.setitem(token_analyzer.EXPLORER_URLS, "ethereum", base)
+    yield calls
+    await server.close()
+
+
+def test_token_bucket_queues_excess_requests():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    delay = bucket.reserve()
+    assert 0.05 < delay <= 0.1
+    # a second queued caller waits for the following slot
+    assert bucket.reserve() > delay
+
+
+@pytest.mark.asyncio
+async def test_fetch_reuses_pooled_session(explorer, tmp_path):
+    cache = TokenDetailsCache(tmp_path / "cache.db")
+    analyzer = TokenAnalyzer(None, etherscan_api_key="k", rate_limit=1000, cache=cache)
+    first = await analyzer.fetch_token_details("0x1", "ethereum")
+    client = analyzer._client
+    await analyzer.fetch_token_details("0x2", "ethereum")
+    assert analyzer._client is client
+    assert first["result"][0]["symbol"] == "FAKE"
+    assert explorer == ["0x1", "0x2"]
+    await analyzer.close()
+    assert client.closed
+
+
+@pytest.mark.asyncio
+async def test_fetch_is_rate_limited(explorer, tmp_path):
+    cache = TokenDetailsCache(tmp_path / "cache.db")
+    analyzer = TokenAnalyzer(None, etherscan_api_key="limited", rate_limit=20, cache=cache)
+    start = time.monotonic()
+    for i in range(25):
+        await analyzer.fetch_token_details(hex(i), "ethereum")
+    # 20 request burst, the remaining 5 are paced at 20/s
+    assert time.monotonic() - start >= 0.2
+    await analyzer.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_served_from_persistent_cache(explorer, tmp_path):
+    path = tmp_path / "cache.db"
+    analyzer = TokenAnalyzer(None, rate_limit=1000, cache=TokenDetailsCache(path))
+    await analyzer.fetch_token_details("0xAbC", "ethereum")
+    await analyzer.fetch_token_details("0xabc", "ethereum")
+    await analyzer.close()
+    analyzer.cache.close()
+    assert explorer == ["0xAbC"]
+
+    # a fresh cache on the same file survives a restart
+    restarted = TokenAnalyzer(None, rate_limit=1000, cache=TokenDetailsCache(path))
+    data = await restarted.fetch_token_details("0xabc", "ethereum")
+    assert data["result"][0]["tokenName"] == "Fake"
+    assert explorer == ["0xAbC"]
+    await restarted.close()
+
+
+def test_cache_negative_ttl_and_lru_eviction(tmp_path):
+    cache = TokenDetailsCache(tmp_path / "cache.db", ttl=60, negative_ttl=0, max_entries=2)
+    cache.set("ethereum", "0xmissing", {"status": "0", "message": "NOTOK", "result": []})
+    assert cache.get("ethereum", "0xmissing") is None
+
+    ok = {"status": "1", "result": [{"tokenName": "A"}]}
+    for address in ("0x1", "0x2", "0x3"):
+        cache.set("ethereum", address, ok)
+    cache._memory.clear()
+    cache.get("ethereum", "0x1")
+    cache.evict()
+    cache._memory.clear()
+    assert cache.get("ethereum", "0x1") == ok
+    assert cache.get("ethereum", "0x2") is None
+    assert cache.get("ethereum", "0x3") == ok
+
+
+def test_cache_reads_do_not_write(tmp_path):
+    cache = TokenDetailsCache(tmp_path / "cache.db", ttl=60)
+    ok = {"status": "1", "result": [{"tokenName": "A"}]}
+    cache.set("ethereum", "0x1", ok)
+    cache._memory.clear()
+    conn = cache._connect()
+    before = conn.total_changes
+    for _ in range(10):
+        cache._memory.clear()
+        assert cache.get("ethereum", "0x1") == ok
+    assert conn.total_changes == before and not conn.in_transaction
+    # the access time is written with the next write
+    read_at = cache._touched[("ethereum", "0x1")]
+    cache.set("ethereum", "0x2", ok)
+    (accessed_at,) = conn.execute(
+        "SELECT accessed_at FROM token_details WHERE address = '0x1'").fetchone()
+    assert accessed_at == read_at
+
+
+@pytest.mark.asyncio
+async def test_tiered_analysis_only_escalates_uncertain_tokens(monkeypatch, tmp_path):
+    payloads = {
+        "0xempty": {"status": "0", "message": "No data found", "result": []},
+        "0xnotok": {"status": "0", "message": "NOTOK", "result": "Invalid API Key"},
+        "0xnotok-empty": {"status": "0", "message": "NOTOK", "result": []},
+        "0xhtml": "<html>502 Bad Gateway</html>",
+        "0xfound": {"status": "1", "result": [{"tokenName": "Fake", "symbol": "FAKE"}]},
+    }
+    llm_calls = []
+
+    async def fake_fetch(self, address, chain):
+        return payloads[address]
+
+    async def fake_eval(token_info):
+        llm_calls.append(token_info["address"])
+        return {"score": 0.4, "reasoning": "llm"}
+
+    monkeypatch.setattr(TokenAnalyzer, "fetch_token_details", fake_fetch)
+    monkeypatch.setattr(token_analyzer, "evaluate_risk", fake_eval)
+    analyzer = TokenAnalyzer(None, cache=TokenDetailsCache(tmp_path / "cache.db"), tiered=True)
+
+    empty = await analyzer.analyze("0xempty")
+    assert empty["risk_level"] == "Critical"
+    assert llm_calls == []
+    # explorer failures are not scored as "no data"
+    for address in ("0xnotok", "0xnotok-empty", "0xhtml"):
+        with pytest.raises(token_analyzer.ExplorerError):
+            await analyzer.analyze(address)
+    assert llm_calls == []
+
+    found = await analyzer.analyze("0xfound")
+    assert found["llm_reasoning"] == "llm"
+    assert llm_calls == ["0xfound"]
+
+    # narrowing the band lets the heuristic decide on its own
+    analyzer.uncertain_high = analyzer.risk_engine.score(payloads["0xfound"])[0]
+    local = await analyzer.analyze("0xfound")
+    assert local["risk_level"] == analyzer.risk_engine._to_level(local["risk_score"])
+    assert llm_calls == ["0xfound"]
+    assert analyzer.tier_counts == {"no_data": 1, "heuristic": 1, "llm": 1}
+
+
+def test_risk_engine_scores_batches_from_features():
+    from cherokee.analyzer.risk_engine import RiskEngine
+
+    engine = RiskEngine()
+    established = {"status": "1", "result": [{
+        "tokenName": "Big", "holdersCount": "25000", "totalSupply": "1000000",
+        "blueCheckmark": "true", "ageDays": 400, "liquidityUSD": 5_000_000,
+        "website": "https://big.example", "twitter": "big", "telegram": "big",
+    }]}
+    bare = {"status": "1", "result": [{"tokenName": "New", "symbol": "NEW"}]}
+    scores, levels = engine.score_batch([established, bare, {}])
+    assert scores.shape == (3,)
+    assert levels == ["Low", "High", "Critical"]
+    assert scores[0] < scores[1] < scores[2] == 1.0
+    assert engine.score(bare) == (scores[1], "High")
+    assert [engine._to_level(s) for s in scores] == levels
+    edges = [0.0, 0.29, 0.3, 0.59, 0.6, 0.89, 0.9, 1.0]
+    assert [engine._to_level(s) for s in edges] == engine.to_levels(edges) == [
+        "Low", "Low", "Medium", "Medium", "High", "High", "Critical", "Critical"]
+
+    # weights are configurable; without holder weight the score rises
+    lighter = RiskEngine(weights={"verified": 0.15})
+    assert lighter.score_batch([established])[0][0] > scores[0]
+    with pytest.raises(ValueError):
+        RiskEngine(weights={"moon": 1.0})
@@ -1,4 +1,6 @@
 import asyncio
+import base64
+import json
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import pytest
@@ -25,8 +27,7 @@ def client(tmp_path, monkeypatch):
     monkeypatch.setattr(api_module, "SessionLocal", Session, raising=False)
     monkeypatch.setattr(trading_module, "SessionLocal", Session, raising=False)
     database.init_db()
-    app = create_app()
-    app.config["TESTING"] = True
+    app = create_app(testing=True)
     return app.test_client()
 
 
@@ -180,3 +181,97 @@ def test_reanalyze_endpoint(client, monkeypatch):
     assert updated.risk_level == "High"
     assert updated.llm_reasoning == "new"
     session.close()
+
+
+def test_token_list_keyset_pagination(client):
+    from datetime import datetime, timedelta
+
+    session = database.SessionLocal()
+    base = datetime(2024, 1, 1)
+    for i in range(7):
+        # pairs of identical timestamps exercise the id tie-breaker
+        session.add(Token(address=f"0x{i}", chain="eth", name=f"T{i}", symbol="T",
+                          risk_score=0.95, risk_level="Critical",
+                          detected_at=base + timedelta(minutes=i // 2)))
+    session.commit()
+    session.close()
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/api/high-risk?limit=3&fields=address,risk_level"
+        resp = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert resp.status_code == 200
+        page = resp.get_json()
+        assert all(set(row) == {"address", "risk_level"} for row in page)
+        seen.extend(row["address"] for row in page)
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == ["0x6", "0x5", "0x4", "0x3", "0x2", "0x1", "0x0"]
+
+    resp = client.get("/api/tokens?sort=id&limit=2")
+    assert [row["id"] for row in resp.get_json()] == [1, 2]
+    assert resp.get_json()[0]["detected_at"] == "2024-01-01T00:00:00"
+
+    assert client.get("/api/tokens?fields=address,secret").status_code == 400
+    assert client.get("/api/tokens?sort=name").status_code == 400
+    assert client.get("/api/tokens?cursor=bogus").status_code == 400
+    next_cursor = client.get("/api/tokens?limit=1").headers["X-Next-Cursor"]
+    assert client.get(f"/api/tokens?sort=-detected_at&cursor={next_cursor}").status_code == 400
+    bad_id = base64.urlsafe_b64encode(json.dumps(["id", 1, "x"]).encode()).decode()
+    assert client.get(f"/api/tokens?sort=id&cursor={bad_id}").status_code == 400
+
+    # without limit or cursor the list is not truncated
+    resp = client.get("/api/tokens", headers={"Origin": "http://localhost:3000"})
+    assert len(resp.get_json()) == 7
+    assert "X-Next-Cursor" not in resp.headers
+    assert "X-Next-Cursor" in resp.headers["Access-Control-Expose-Headers"]
+
+
+def test_trade_list_pages_newest_first(client):
+    session = database.SessionLocal()
+    for i in range(3):
+        session.add(Trade(token_address=f"0x{i}", action="BUY", quantity=1, price=1.0, is_live=0))
+    session.commit()
+    session.close()
+
+    resp = client.get("/api/trades?limit=2")
+    page = resp.get_json()
+    assert [t["token_address"] for t in page] == ["0x2", "0x1"]
+    assert page[0]["is_live"] is False
+    resp = client.get(f"/api/trades?limit=2&cursor={resp.headers['X-Next-Cursor']}")
+    assert [t["token_address"] for t in resp.get_json()] == ["0x0"]
+    assert "X-Next-Cursor" not in resp.headers
+
+
+def test_streaming_exports(client):
+    import csv
+    import io
+    import json
+
+    database.upsert_tokens([
+        {"address": hex(i), "name": f"Token {i}", "symbol": "T", "risk_level": "Low"}
+        for i in range(2500)
+    ])
+
+    resp = client.get("/api/tokens/export?fields=id,address")
+    assert resp.is_streamed
+    assert resp.mimetype == "application/x-ndjson"
+    lines = resp.get_data(as_text=True).splitlines()
+    assert len(lines) == 2500
+    assert json.loads(lines[0]) == {"id": 1, "address": "0x0"}
+
+    data = client.get("/api/tokens/export?format=json&q=token").get_json()
+    assert len(data) == 2500 and data[-1]["address"] == hex(2499)
+
+    session = database.SessionLocal()
+    session.add(Trade(token_address="0x1", action="BUY", quantity=1, price=2.5, is_live=0))
+    session.commit()
+    session.close()
+    resp = client.get("/api/trades/export?format=csv&fields=token_address,price")
+    assert resp.headers["Content-Disposition"] == "attachment; filename=trades.csv"
+    assert list(csv.DictReader(io.StringIO(resp.get_data(as_text=True)))) == [
+        {"token_address": "0x1", "price": "2.5"}
+    ]
+    assert client.get("/api/trades/export?format=xml").status_code == 400
@@ -0,0 +1,121 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from cherokee import database
+from cherokee.events import EVENT_BUS, EventBus, format_sse
+from cherokee.scanner.publisher import EventPublisher
+
+
+def test_event_bus_replays_after_last_event_id():
+    bus = EventBus(replay_size=3)
+    ids = [bus.publish("token", {"address": hex(i)}) for i in range(5)]
+    replay, subscriber = bus.subscribe(last_id=ids[2])
+    assert [e["data"]["address"] for e in replay] == ["0x3", "0x4"]
+    # older than the buffer: bounded replay of what is left
+    replay, _ = bus.subscribe(last_id=0)
+    assert [e["id"] for e in replay] == ids[2:]
+    assert bus.subscribe()[0] == []
+    bus.publish("bot_state", {"running": True})
+    event = subscriber.get_nowait()
+    assert format_sse(event) == f'id: {event["id"]}\nevent: bot_state\ndata: {{"running": true}}\n\n'
+
+
+def test_slow_subscriber_is_disconnected(monkeypatch):
+    from cherokee import events
+
+    monkeypatch.setattr(events, "SUBSCRIBER_QUEUE_SIZE", 2)
+    bus = EventBus()
+    stream = bus.stream()
+    assert next(stream).startswith("retry:")
+    for i in range(4):
+        bus.publish("trade", {"n": i})
+    chunks = list(stream)
+    assert len(chunks) == 1 and chunks[0].startswith("id: ")
+    assert bus.stats()["dropped_subscribers"] == 1
+    assert bus.stats()["subscribers"] == 0
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from cherokee.web import api as api_module
+    from cherokee.web import create_app
+
+    engine = create_engine(f"sqlite:///{tmp_path}/events.db")
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", Session)
+    monkeypatch.setattr(api_module, "SessionLocal", Session)
+    monkeypatch.setattr(api_module, "EVENTS_TOKEN", "s3cret")
+    monkeypatch.setenv("CHEROKEE_AUTO_SAMPLE", "0")
+    return create_app(testing=True).test_client()
+
+
+def _read_events(resp, count):
+    chunks = []
+    for chunk in resp.response:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith("id: "):
+            chunks.append(chunk)
+        if len(chunks) == count:
+            break
+    resp.close()
+    return chunks
+
+
+def test_api_fans_out_published_events(client):
+    last_id = EVENT_BUS.publish("token", {"address": "0xbefore"})
+    resp = client.post("/api/events/publish", headers={"X-Events-Token": "s3cret"}, json=[
+        {"type": "token", "data": {"address": "0xnew", "risk_level": "Low"}},
+        {"type": "unknown", "data": {}},
+    ])
+    assert resp.get_json() == {"published": 1}
+    client.post("/api/start-bot")
+
+    resp = client.get(f"/api/events?last_event_id={last_id}", buffered=False)
+    assert resp.mimetype == "text/event-stream"
+    chunks = _read_events(resp, 2)
+    assert "event: token" in chunks[0] and "0xnew" in chunks[0]
+    assert 'event: bot_state\ndata: {"running": true}' in chunks[1]
+
+
+
+def test_publish_requires_the_shared_token(client, monkeypatch):
+    from cherokee.web import api as api_module
+
+    # behind a local reverse proxy every client comes from 127.0.0.1
+    assert client.post("/api/events/publish", json=[]).status_code == 403
+    resp = client.post("/api/events/publish", json=[], headers={"X-Events-Token": "wrong"})
+    assert resp.status_code == 403
+    resp = client.post("/api/events/publish", json=[], headers={"X-Events-Token": "s3cret"},
+                       environ_base={"REMOTE_ADDR": "10.0.0.2"})
+    assert resp.get_json() == {"published": 0}
+    monkeypatch.setattr(api_module, "EVENTS_TOKEN", "")
+    resp = client.post("/api/events/publish", json=[], headers={"X-Events-Token": ""})
+    assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_scanner_publisher_batches_events():
+    batches = []
+
+    async def publish(request):
+        assert request.headers["X-Events-Token"] == "s3cret"
+        batches.append(await request.json())
+        return web.json_response({"published": len(batches[-1])})
+
+    app = web.Application()
+    app.router.add_post("/api/events/publish", publish)
+    server = TestServer(app)
+    await server.start_server()
+    publisher = EventPublisher(url=str(server.make_url("/api/events/publish")), batch_size=2, interval=60,
+                               token="s3cret")
+    publisher.start()
+    for i in range(3):
+        publisher.publish("token", {"address": hex(i)})
+    await publisher.stop()
+    await server.close()
+    assert [len(b) for b in batches] == [2, 1]
+    assert publisher.stats() == {"sent": 3, "failed": 0, "pending": 0}
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from cherokee import database, health
+from cherokee.health import HealthProber, Target
+from cherokee.web import create_app
+
+
+def failing():
+    raise ConnectionError("refused")
+
+
+def test_probe_records_status_latency_and_errors():
+    prober = HealthProber([
+        Target("scanner", lambda: True),
+        Target("llm", failing),
+        Target("explorer", lambda: False),
+    ])
+    assert prober.status("scanner") == "unknown"
+    prober.probe_due()
+    snap = prober.snapshot()
+    assert snap["scanner"]["status"] == "ok"
+    assert snap["scanner"]["last_ok_at"] == snap["scanner"]["checked_at"]
+    assert snap["scanner"]["latency_ms"] >= 0
+    assert snap["llm"] == {**snap["llm"], "status": "down", "last_ok_at": None,
+                           "error": "ConnectionError: refused"}
+    assert snap["explorer"]["error"] == "unhealthy"
+    assert prober.status("missing") == "unknown"
+
+
+def test_probe_due_respects_intervals_and_bounds_history(monkeypatch):
+    monkeypatch.setattr(health, "LATENCY_HISTORY", 3)
+    calls = {"fast": 0, "slow": 0}
+
+    def counter(name):
+        def check():
+            calls[name] += 1
+        return check
+
+    prober = HealthProber([Target("fast", counter("fast"), 0), Target("slow", counter("slow"), 60)])
+    for _ in range(5):
+        prober.probe_due()
+    assert calls == {"fast": 5, "slow": 1}
+    assert len(prober.snapshot()["fast"]["history"]) == 3
+
+
+def test_prober_thread_runs_checks():
+    calls = []
+    prober = HealthProber([Target("scanner", lambda: calls.append(1), 0.01)])
+    prober.start()
+    try:
+        deadline = time.monotonic() + 2
+        while len(calls) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        prober.stop()
+    assert len(calls) >= 3
+    assert prober.status("scanner") == "ok"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/health.db")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setenv("CHEROKEE_AUTO_SAMPLE", "0")
+    app = create_app(testing=True)
+    return app.test_client()
+
+
+def test_service_status_answers_from_memory(client, monkeypatch):
+    def slow():
+        time.sleep(5)
+
+    prober = HealthProber([Target("scanner", slow)])
+    monkeypatch.setattr(health, "_PROBER", prober)
+    start = time.perf_counter()
+    data = client.get("/api/service-status").get_json()
+    assert time.perf_counter() - start < 1
+    assert data["backend"] == "ok"
+    # not probed yet is reported as such, not as down
+    assert data["scanner"] == "unknown"
+    assert data["services"]["scanner"]["status"] == "unknown"
+
+    prober.targets[0].check = lambda: True
+    prober.probe_due()
+    data = client.get("/api/service-status").get_json()
+    assert data["scanner"] == "ok"
+    assert len(data["services"]["scanner"]["history"]) == 1
+
+
+def test_create_app_starts_prober_outside_tests(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/app.db")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setenv("CHEROKEE_AUTO_SAMPLE", "0")
+    monkeypatch.setattr(health, "_PROBER", None)
+    monkeypatch.setattr(health, "default_targets", lambda: [Target("scanner", lambda: True, 60)])
+    create_app(testing=True)
+    assert health._PROBER is None
+    create_app()
+    prober = health._PROBER
+    try:
+        deadline = time.monotonic() + 2
+        while prober.status("scanner") == "unknown" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert prober.status("scanner") == "ok"
+    finally:
+        prober.stop()
+
+
+def test_default_targets(monkeypatch):
+    assert [t.name for t in health.default_targets()] == ["scanner"]
+    monkeypatch.setattr(health, "HEALTH_PROBE_EXTERNAL", True)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk")
+    monkeypatch.setenv("ETHERSCAN_API_KEY", "k")
+    monkeypatch.delenv("BSC_SCAN_API_KEY", raising=False)
+    assert [t.name for t in health.default_targets()] == ["scanner", "openai", "explorer_ethereum"]
@@ -13,8 +13,7 @@ def client(tmp_path, monkeypatch):
     monkeypatch.setattr(database, "engine", engine)
     monkeypatch.setattr(database, "SessionLocal", Session)
     monkeypatch.setenv("CHEROKEE_AUTO_SAMPLE", "0")
-    app = create_app()
-    app.config["TESTING"] = True
+    app = create_app(testing=True)
     return app.test_client()
 
 
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import pytest
+
+from cherokee.listeners import BaseListener, ListenerSupervisor, create_listeners
+
+
+def test_create_listeners_from_config(tmp_path):
+    queue = asyncio.Queue()
+    listeners = create_listeners(queue, [
+        {"type": "synthetic", "interval": 1},
+        {"type": "file", "name": "replay-a", "path": str(tmp_path / "a.jsonl")},
+        {"type": "http", "port": 0},
+    ])
+    assert [l.name for l in listeners] == ["synthetic", "replay-a", "http"]
+    assert listeners[0].interval == 1
+    with pytest.raises(ValueError):
+        create_listeners(queue, [{"type": "carrier-pigeon"}])
+    with pytest.raises(ValueError):
+        create_listeners(queue, [{"type": "synthetic"}, {"type": "synthetic"}])
+
+
+@pytest.mark.asyncio
+async def test_supervisor_fans_in_and_isolates_crashes(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text("\n".join(json.dumps({"address": hex(i), "chain": "bsc"}) for i in range(3)) + "\nnot json\n")
+
+    class Crashing(BaseListener):
+        async def start(self):
+            await self.emit({"address": "0xcrash"})
+            raise RuntimeError("feed down")
+
+    queue = asyncio.Queue()
+    file_listener, = create_listeners(queue, [{"type": "file", "path": str(path), "follow": False}])
+    crashing = Crashing(queue, name="flaky")
+    supervisor = ListenerSupervisor([file_listener, crashing])
+    task = asyncio.create_task(supervisor.run())
+    await asyncio.sleep(0.05)
+
+    events = [queue.get_nowait() for _ in range(queue.qsize())]
+    from_file = [e for e in events if e["source"] == "file"]
+    assert [e["address"] for e in from_file] == ["0x0", "0x1", "0x2"]
+    assert all(e["chain"] == "bsc" and "detected_at" in e for e in from_file)
+
+    stats = supervisor.stats()
+    assert stats["file"]["events"] == 3
+    assert stats["flaky"]["restarts"] == 1
+    assert "feed down" in stats["flaky"]["last_error"]
+    # the crashing source is retried while the finished file source stays stopped
+    assert not task.done()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_supervisor_resets_backoff_after_a_healthy_run():
+    delays = []
+
+    class Flaky(BaseListener):
+        calls = 0
+
+        async def start(self):
+            self.calls += 1
+            if self.calls > 1:
+                delays.append(supervisor.backoff["flaky"])
+            if self.calls == 6:
+                await asyncio.Event().wait()
+            if self.calls == 5:
+                await asyncio.sleep(0.06)
+            raise RuntimeError("feed down")
+
+    supervisor = ListenerSupervisor([Flaky(asyncio.Queue(), name="flaky")],
+                                    max_backoff=0.04, min_backoff=0.01)
+    task = asyncio.create_task(supervisor.run())
+    for _ in range(100):
+        if len(delays) == 5:
+            break
+        await asyncio.sleep(0.02)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert delays == [0.01, 0.02, 0.04, 0.04, 0.01]
+
+
+@pytest.mark.asyncio
+async def test_listener_rate_is_not_capped():
+    listener = BaseListener(asyncio.Queue())
+    for i in range(3000):
+        await listener.emit({"address": hex(i)})
+    # a deque of the last 1000 events capped this at 16.7/s
+    assert listener.rate() == 50
+
+
+def _write_replay(path, gaps):
+    lines, ts = [], 1_700_000_000.0
+    for i, gap in enumerate(gaps):
+        ts += gap
+        lines.append(json.dumps({"timestamp": ts, "address": hex(i), "chain": "ethereum"}))
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.mark.asyncio
+async def test_replay_listener_honours_speed(tmp_path):
+    import time
+
+    path = tmp_path / "recorded.jsonl"
+    _write_replay(path, [0, 1.0, 1.0])
+
+    queue = asyncio.Queue()
+    fast, = create_listeners(queue, [{"type": "replay", "path": str(path), "speed": 0}])
+    start = time.monotonic()
+    await fast.start()
+    assert time.monotonic() - start < 0.1
+    events = [queue.get_nowait() for _ in range(3)]
+    assert [e["address"] for e in events] == ["0x0", "0x1", "0x2"]
+    assert events[1]["recorded_at"] - events[0]["recorded_at"] == 1.0
+    assert all(e["source"] == "replay" for e in events)
+
+    paced, = create_listeners(queue, [{"type": "replay", "path": str(path), "speed": 20}])
+    start = time.monotonic()
+    await paced.start()
+    # two recorded one second gaps replayed 20x faster
+    assert 0.09 <= time.monotonic() - start < 0.5
@@ -0,0 +1,153 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cherokee.analyzer import llm_risk
+
+
+class FakeCompletions:
+    def __init__(self, content="0.2\nlooks fine"):
+        self.calls = 0
+        self.content = content
+
+    async def create(self, model, messages):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    fake = FakeCompletions()
+    client = SimpleNamespace(api_key="test", chat=SimpleNamespace(completions=fake))
+    monkeypatch.setattr(llm_risk, "client", client)
+    monkeypatch.setattr(llm_risk, "_results", llm_risk.TTLCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(llm_risk, "_inflight", {})
+    return fake
+
+
+TOKEN = {"address": "0xAbC", "name": "Fake", "symbol": "FAKE", "chain": "ethereum"}
+
+
+@pytest.mark.asyncio
+async def test_evaluate_risk_memoizes_results(completions):
+    first = await llm_risk.evaluate_risk(TOKEN)
+    # same token with a differently cased address and key order
+    second = await llm_risk.evaluate_risk({**dict(reversed(TOKEN.items())), "address": "0xabc"})
+    assert first == second == {"score": 0.2, "reasoning": "looks fine"}
+    assert completions.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_evaluate_risk_coalesces_concurrent_calls(completions):
+    results = await asyncio.gather(*(llm_risk.evaluate_risk(TOKEN) for _ in range(5)))
+    assert all(r["score"] == 0.2 for r in results)
+    assert completions.calls == 1
+    assert llm_risk._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_evaluate_risk_cancelled_caller_does_not_abort_others(completions):
+    leader = asyncio.create_task(llm_risk.evaluate_risk(TOKEN))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(llm_risk.evaluate_risk(TOKEN))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert (await follower)["score"] == 0.2
+    assert completions.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_unparseable_reply_is_not_memoized(completions):
+    completions.content = "I cannot rate this token"
+    first = await llm_risk.evaluate_risk(TOKEN)
+    assert first == {"score": 0.5, "reasoning": "I cannot rate this token"}
+    assert len(llm_risk._results) == 0
+    completions.content = "0.7\nrisky"
+    assert (await llm_risk.evaluate_risk(TOKEN))["score"] == 0.7
+    assert completions.calls == 2
+
+
+class FakeBatchCompletions(FakeCompletions):
+    def __init__(self, batch_content):
+        super().__init__()
+        self.batch_content = batch_content
+        self.batch_calls = 0
+
+    async def create(self, model, messages, response_format=None):
+        if response_format is None:
+            return await super().create(model, messages)
+        self.batch_calls += 1
+        message = SimpleNamespace(content=self.batch_content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _use(monkeypatch, fake):
+    client = SimpleNamespace(api_key="test", chat=SimpleNamespace(completions=fake))
+    monkeypatch.setattr(llm_risk, "client", client)
+    monkeypatch.setattr(llm_risk, "_results", llm_risk.TTLCache(maxsize=10, ttl=60))
+    monkeypatch.setattr(llm_risk, "_inflight", {})
+
+
+@pytest.mark.asyncio
+async def test_batch_scores_and_falls_back_per_item(monkeypatch):
+    content = '{"results": [{"id": 0, "score": 0.9, "reasoning": "rug"}, {"id": 1, "score": "n/a"}]}'
+    fake = FakeBatchCompletions(content)
+    _use(monkeypatch, fake)
+    tokens = [dict(TOKEN, address=hex(i)) for i in range(3)]
+    results = await llm_risk.evaluate_risk_batch(tokens)
+    assert results[0] == {"score": 0.9, "reasoning": "rug"}
+    # malformed and missing entries are re-scored individually
+    assert results[1]["score"] == results[2]["score"] == 0.2
+    assert fake.batch_calls == 1
+    assert fake.calls == 2
+
+    # batch results are memoized for single lookups
+    assert (await llm_risk.evaluate_risk(tokens[0]))["score"] == 0.9
+    assert fake.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_risk_batcher_groups_concurrent_submissions(monkeypatch):
+    content = '{"results": [' + ", ".join(
+        f'{{"id": {i}, "score": 0.1, "reasoning": "ok"}}' for i in range(4)
+    ) + "]}"
+    fake = FakeBatchCompletions(content)
+    _use(monkeypatch, fake)
+    batcher = llm_risk.RiskBatcher(max_batch=4, window=10)
+    tokens = [dict(TOKEN, address=hex(i)) for i in range(4)]
+    results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(t) for t in tokens)), 1)
+    assert [r["score"] for r in results] == [0.1] * 4
+    assert batcher.batches == 1
+    assert fake.batch_calls == 1
+
+    # a partial batch is flushed when the window elapses
+    batcher.window = 0.01
+    result = await asyncio.wait_for(batcher.submit(dict(TOKEN, address="0xnew")), 1)
+    assert result["score"] == 0.2
+    assert batcher.batches == 2
+
+
+@pytest.mark.asyncio
+async def test_scanner_workers_fill_llm_batches(monkeypatch):
+    from cherokee.run_scanner import worker_count
+    from cherokee.scanner.workers import WorkerPool
+
+    assert worker_count(batch_size=1, workers=4) == 4
+    assert worker_count(batch_size=8, workers=4) == 16
+    content = '{"results": [' + ", ".join(
+        f'{{"id": {i}, "score": 0.1, "reasoning": "ok"}}' for i in range(8)
+    ) + "]}"
+    fake = FakeBatchCompletions(content)
+    _use(monkeypatch, fake)
+    batcher = llm_risk.RiskBatcher(max_batch=8, window=10)
+    queue = asyncio.Queue()
+    for i in range(16):
+        queue.put_nowait(dict(TOKEN, address=hex(i)))
+    pool = WorkerPool(queue, batcher.submit, size=worker_count(batch_size=8, workers=4))
+    pool.start()
+    await asyncio.wait_for(pool.stop(), 1)
+    assert pool.processed == 16
+    assert batcher.batches == fake.batch_calls == 2
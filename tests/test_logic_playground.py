@@ -19,8 +19,7 @@ def client(tmp_path, monkeypatch):
     monkeypatch.setattr(api_module, "SessionLocal", Session, raising=False)
     monkeypatch.setattr(logic_api, "SessionLocal", Session, raising=False)
     database.init_db()
-    app = create_app()
-    app.config["TESTING"] = True
+    app = create_app(testing=True)
     return app.test_client()
 
 
@@ -0,0 +1,163 @@
+import io
+import json
+import os
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from cherokee import database, logtail
+from cherokee.logtail import LineFilter, follow, tail
+from cherokee.web import create_app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/logs.db")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setenv("CHEROKEE_AUTO_SAMPLE", "0")
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    app = create_app(testing=True)
+    return app.test_client()
+
+
+def test_tail_reads_only_the_end(tmp_path, monkeypatch):
+    path = tmp_path / "big.log"
+    with open(path, "w") as f:
+        for i in range(200000):
+            f.write(f"2024-01-01 INFO line {i}\n")
+
+    class CountingFile(io.FileIO):
+        read_bytes = 0
+
+        def read(self, size=-1):
+            data = super().read(size)
+            CountingFile.read_bytes += len(data)
+            return data
+
+    monkeypatch.setattr(logtail, "open", CountingFile, raising=False)
+    lines, cursor = tail(str(path), 5)
+    assert lines == [f"2024-01-01 INFO line {i}\n" for i in range(199995, 200000)]
+    assert cursor.endswith(f":{os.path.getsize(path)}")
+    assert CountingFile.read_bytes <= 2 * logtail.BLOCK_SIZE
+
+
+def test_tail_small_file_and_partial_last_line(tmp_path):
+    path = tmp_path / "a.log"
+    path.write_text("one\ntwo\nthree")
+    assert tail(str(path), 10)[0] == ["one\n", "two\n", "three"]
+    assert tail(str(path), 0)[0] == []
+    path.write_text("")
+    assert tail(str(path), 10)[0] == []
+
+
+def test_tail_matches_a_naive_reader(tmp_path, monkeypatch):
+    monkeypatch.setattr(logtail, "BLOCK_SIZE", 16)
+    rng = random.Random(7)
+    path = tmp_path / "random.log"
+    for _ in range(500):
+        lines = ["x" * rng.randint(0, 40) for _ in range(rng.randint(0, 6))]
+        text = "\n".join(lines) + rng.choice(["", "\n"])
+        path.write_text(text)
+        count = rng.randint(1, 8)
+        expected = [line + "\n" for line in text.split("\n")[:-1]]
+        if text.split("\n")[-1]:
+            expected.append(text.split("\n")[-1])
+        assert tail(str(path), count)[0] == expected[-count:], (text, count)
+
+
+def test_tail_filters_level_and_text_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(logtail, "BLOCK_SIZE", 64)
+    path = tmp_path / "app.log"
+    path.write_text(
+        "12:00 ERROR boom\n"
+        "Traceback (most recent call last):\n"
+        '  File "x.py", line 1, in <module>\n'
+        "ValueError: bad\n"
+        + "12:01 INFO fine\n" * 20
+        + "12:02 WARNING slow request\n"
+        "12:03 DEBUG detail\n"
+    )
+    lines, _ = tail(str(path), 50, LineFilter("warning"))
+    assert lines == [
+        "12:00 ERROR boom\n",
+        "Traceback (most recent call last):\n",
+        '  File "x.py", line 1, in <module>\n',
+        "ValueError: bad\n",
+        "12:02 WARNING slow request\n",
+    ]
+    lines, _ = tail(str(path), 50, LineFilter("error", "valueerror"))
+    assert lines == ["ValueError: bad\n"]
+    with pytest.raises(ValueError):
+        LineFilter("loud")
+
+
+def test_follow_returns_new_complete_lines(tmp_path):
+    path = tmp_path / "f.log"
+    path.write_text("old\n")
+    _, cursor = tail(str(path), 10)
+    assert follow(str(path), cursor) == ([], cursor)
+    with open(path, "a") as f:
+        f.write("new 1\nnew 2\npart")
+    lines, cursor = follow(str(path), cursor)
+    assert lines == ["new 1\n", "new 2\n"]
+    with open(path, "a") as f:
+        f.write("ial\n")
+    lines, cursor = follow(str(path), cursor, LineFilter(text="PART"))
+    assert lines == ["partial\n"]
+    assert cursor.endswith(f":{os.path.getsize(path)}")
+
+
+def test_follow_detects_rotation_and_truncation(tmp_path):
+    path = tmp_path / "r.log"
+    path.write_text("a\nb\n")
+    _, cursor = tail(str(path), 10)
+    os.rename(path, tmp_path / "r.log.1")
+    path.write_text("fresh\n")
+    lines, cursor = follow(str(path), cursor)
+    assert lines == ["fresh\n"]
+    with open(path, "w") as f:
+        f.write("x\n")
+    assert follow(str(path), cursor)[0] == ["x\n"]
+
+
+def test_logs_endpoint(client, tmp_path):
+    log = tmp_path / "logs" / "scanner.log"
+    log.write_text("".join(f"10:00 INFO scan {i}\n" for i in range(100)) + "10:01 ERROR failed\n")
+    resp = client.get("/api/logs?lines=3")
+    data = resp.get_json()
+    assert data["file"] == "scanner"
+    assert data["lines"] == ["10:00 INFO scan 98\n", "10:00 INFO scan 99\n", "10:01 ERROR failed\n"]
+    assert client.get("/api/logs?level=error").get_json()["lines"] == ["10:01 ERROR failed\n"]
+
+    with open(log, "a") as f:
+        f.write("10:02 INFO later\n")
+    resp = client.get(f"/api/logs?cursor={data['cursor']}")
+    assert resp.get_json()["lines"] == ["10:02 INFO later\n"]
+
+    assert client.get("/api/logs?file=../secrets").status_code == 400
+    assert client.get("/api/logs?level=loud").status_code == 400
+    assert client.get("/api/logs?cursor=nope").status_code == 400
+    assert client.get("/api/logs?file=server").status_code == 404
+
+
+def test_logs_stream(client, tmp_path):
+    log = tmp_path / "logs" / "server.log"
+    log.write_text("first\n")
+    _, cursor = tail(str(log), 10)
+    with open(log, "a") as f:
+        f.write("second\n")
+    resp = client.get("/api/logs?file=server&stream=1", headers={"Last-Event-ID": cursor})
+    assert resp.mimetype == "text/event-stream"
+    body = resp.response
+    assert next(body).decode() == "retry: 3000\n\n"
+    event = next(body).decode()
+    resp.close()
+    fields = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+    assert fields["event"] == "lines"
+    payload = json.loads(fields["data"])
+    assert payload["lines"] == ["second\n"]
+    assert fields["id"] == payload["cursor"]
@@ -0,0 +1,55 @@
+import pytest
+
+from cherokee import metrics
+
+
+@pytest.fixture
+def registry():
+    return metrics.Registry()
+
+
+def test_counter_and_gauge_exposition(registry):
+    errors = metrics.Counter("llm_errors_total", "LLM errors.", ["code"], registry=registry)
+    depth = metrics.Gauge("queue_depth", "Queue depth.", registry=registry)
+    errors.inc(code="rate_limit_exceeded")
+    errors.inc(2, code="network_error")
+    depth.set_function(lambda: 7)
+    text = registry.render()
+    assert "# TYPE llm_errors_total counter" in text
+    assert 'llm_errors_total{code="rate_limit_exceeded"} 1' in text
+    assert 'llm_errors_total{code="network_error"} 2' in text
+    assert "queue_depth 7" in text
+    with pytest.raises(ValueError):
+        errors.inc(stage="x")
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    latency = metrics.Histogram("latency_seconds", "Latency.", ["stage"], buckets=(0.1, 1), registry=registry)
+    for value in (0.05, 0.5, 5):
+        latency.observe(value, stage="fetch")
+    text = registry.render()
+    assert 'latency_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="fetch",le="1"} 2' in text
+    assert 'latency_seconds_bucket{stage="fetch",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="fetch"} 3' in text
+    assert 'latency_seconds_sum{stage="fetch"} 5.55' in text
+
+
+@pytest.mark.asyncio
+async def test_scanner_serves_metrics(unused_tcp_port):
+    import aiohttp
+
+    from cherokee.run_scanner import start_health_server
+
+    metrics.STAGE_LATENCY.observe(0.2, stage="explorer_fetch")
+    runner = await start_health_server(port=unused_tcp_port)
+    try:
+        async with aiohttp.ClientSession() as client:
+            async with client.get(f"http://127.0.0.1:{unused_tcp_port}/metrics") as resp:
+                assert resp.status == 200
+                assert resp.headers["Content-Type"].startswith("text/plain")
+                body = await resp.text()
+    finally:
+        await runner.cleanup()
+    assert 'cherokee_stage_latency_seconds_count{stage="explorer_fetch"}' in body
+    assert "# TYPE cherokee_paper_trades_total counter" in body
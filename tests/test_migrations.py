@@ -0,0 +1,113 @@
+import re
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from cherokee import database
+from cherokee.migrations import MIGRATIONS, applied_versions, run_migrations
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/migrate.db")
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", Session)
+    return engine
+
+
+def test_migrations_run_once(db):
+    database.init_db()
+    with db.connect() as conn:
+        assert applied_versions(conn) == [m[0] for m in MIGRATIONS]
+    assert run_migrations(db) == []
+
+
+def test_concurrent_runners_apply_each_migration_once(db):
+    with db.begin() as conn:
+        conn.execute(text("CREATE TABLE things (id INTEGER PRIMARY KEY)"))
+    calls = []
+
+    def add_column(conn):
+        calls.append(threading.current_thread().name)
+        time.sleep(0.2)
+        # no existence check: a second runner would fail with "duplicate column"
+        conn.execute(text("ALTER TABLE things ADD COLUMN extra TEXT"))
+
+    migrations = [(1, "add things.extra", add_column)]
+    barrier = threading.Barrier(2)
+    results, errors = [], []
+
+    def runner():
+        barrier.wait()
+        try:
+            results.append(run_migrations(db, migrations))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=runner) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert sorted(results) == [[], [1]]
+    assert len(calls) == 1
+    with db.connect() as conn:
+        assert applied_versions(conn) == [1]
+
+
+def test_migrations_upgrade_an_old_database(db):
+    with db.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE tokens (id INTEGER PRIMARY KEY, address VARCHAR UNIQUE, chain VARCHAR, "
+            "name VARCHAR, symbol VARCHAR, risk_score FLOAT, risk_level VARCHAR, detected_at DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO tokens (address, name) VALUES ('0xold', 'Old Token')"))
+    database.init_db()
+    assert "llm_reasoning" in [c["name"] for c in inspect(db).get_columns("tokens")]
+    with db.connect() as conn:
+        indexes = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    assert {
+        "ix_tokens_detected_at", "ix_tokens_risk_level_detected_at", "ix_tokens_address_lower",
+        "ix_trades_timestamp", "ix_trades_token_address_timestamp",
+    } <= indexes
+
+
+def test_hot_queries_use_indexes(db, monkeypatch):
+    from cherokee.web import api as api_module
+    from cherokee.web import create_app
+
+    monkeypatch.setattr(api_module, "SessionLocal", database.SessionLocal)
+    monkeypatch.setenv("CHEROKEE_AUTO_SAMPLE", "0")
+    client = create_app(testing=True).test_client()
+    database.upsert_tokens([
+        {"address": hex(i), "name": f"T{i}", "risk_level": "High", "risk_score": 0.9}
+        for i in range(5)
+    ])
+
+    statements = []
+
+    @event.listens_for(db, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "sqlite_master" not in statement:
+            statements.append((statement, parameters))
+
+    first = client.get("/api/high-risk?limit=2")
+    client.get(f"/api/high-risk?limit=2&cursor={first.headers['X-Next-Cursor']}")
+    first = client.get("/api/tokens?limit=2&sort=-risk_score")
+    client.get(f"/api/tokens?limit=2&sort=-risk_score&cursor={first.headers['X-Next-Cursor']}")
+    client.get("/api/trades?limit=2")
+    client.get("/api/open-trades?limit=2")
+    client.get("/api/tokens/0x1")
+    event.remove(db, "before_cursor_execute", capture)
+    assert len(statements) >= 7
+
+    with db.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            full_scans = [row[-1] for row in plan if re.fullmatch(r"SCAN (tokens|trades)", row[-1])]
+            assert not full_scans, f"{statement} falls back to a full scan: {plan}"
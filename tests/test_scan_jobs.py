@@ -0,0 +1,175 @@
+import asyncio
+import json
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from cherokee import database, scan_jobs
+from cherokee.analyzer.token_analyzer import TokenAnalyzer
+from cherokee.models import Token
+from cherokee.scan_jobs import ScanJobManager
+from cherokee.web import create_app
+
+
+class FakeAnalyzer:
+    def __init__(self, delay=0.05, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.running = 0
+        self.max_running = 0
+        self.closed = False
+
+    async def analyze(self, address, chain="ethereum"):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if address in self.fail:
+            raise RuntimeError("explorer unavailable")
+        return {"address": address, "chain": chain, "name": "T", "symbol": "T",
+                "risk_score": 0.9, "risk_level": "High", "llm_reasoning": "scanned"}
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/jobs.db")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    database.init_db()
+    return database
+
+
+@pytest.fixture
+def make_manager():
+    managers = []
+
+    def make(**kwargs):
+        manager = ScanJobManager(**kwargs)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.stop()
+
+
+def wait_for(batch, timeout=10):
+    deadline = time.monotonic() + timeout
+    while len(batch.finished) < len(batch.jobs):
+        assert time.monotonic() < deadline, "jobs did not finish"
+        time.sleep(0.01)
+
+
+def test_batch_runs_concurrently_and_writes_results(db, make_manager):
+    analyzer = FakeAnalyzer(delay=0.05)
+    published = []
+    manager = make_manager(analyzer_factory=lambda: analyzer, concurrency=20,
+                           on_result=published.append)
+    start = time.monotonic()
+    batch = manager.submit((f"0x{i}", "ethereum") for i in range(200))
+    wait_for(batch)
+    # 200 sequential analyses would take 10s
+    assert time.monotonic() - start < 5
+    assert analyzer.max_running == 20
+    assert batch.to_dict(include_jobs=False) == {
+        "id": batch.id, "total": 200, "queued": 0, "running": 0, "done": 200, "failed": 0}
+    assert len(published) == 200
+    session = db.SessionLocal()
+    assert session.query(Token).filter_by(llm_reasoning="scanned").count() == 200
+    session.close()
+    manager.stop()
+    assert analyzer.closed
+
+
+def test_failed_jobs_report_their_error(db, make_manager):
+    manager = make_manager(analyzer_factory=lambda: FakeAnalyzer(delay=0, fail={"0xbad"}))
+    batch = manager.submit([("0xbad", "ethereum"), ("0xgood", "bsc")])
+    wait_for(batch)
+    bad, good = batch.jobs
+    assert manager.get_job(bad.id).to_dict()["status"] == "failed"
+    assert bad.error == "RuntimeError: explorer unavailable"
+    with pytest.raises(RuntimeError):
+        bad.wait(1)
+    assert good.wait(1)["chain"] == "bsc"
+    assert good.status == "done"
+    assert manager.get_job("missing") is None
+
+
+def test_stream_yields_each_job_then_summary(db, make_manager):
+    manager = make_manager(analyzer_factory=lambda: FakeAnalyzer(delay=0.01))
+    batch = manager.submit([("0xa", "ethereum"), ("0xb", "ethereum")])
+    events = [e for e in manager.stream(batch) if e.startswith("id:")]
+    kinds = [e.split("\n")[1] for e in events]
+    assert kinds == ["event: job", "event: job", "event: done"]
+    summary = json.loads(events[-1].split("data: ", 1)[1])
+    assert summary["done"] == 2
+
+
+def test_history_forgets_oldest_finished_jobs(db, make_manager):
+    manager = make_manager(analyzer_factory=lambda: FakeAnalyzer(delay=0), history=2)
+    first = manager.submit([("0x1", "ethereum"), ("0x2", "ethereum")])
+    wait_for(first)
+    second = manager.submit([("0x3", "ethereum")])
+    wait_for(second)
+    assert manager.get_job(first.jobs[0].id) is None
+    assert manager.get_job(second.jobs[0].id) is not None
+    assert manager.get_batch(first.id) is not None
+
+
+@pytest.fixture
+def client(db, tmp_path, monkeypatch, make_manager):
+    monkeypatch.setenv("CHEROKEE_AUTO_SAMPLE", "0")
+
+    async def fake_analyze(self, address, chain="ethereum"):
+        return await FakeAnalyzer(delay=0.01).analyze(address, chain)
+
+    monkeypatch.setattr(TokenAnalyzer, "analyze", fake_analyze)
+    monkeypatch.setattr(scan_jobs, "_MANAGER", make_manager())
+    app = create_app(testing=True)
+    return app.test_client()
+
+
+def test_scan_jobs_endpoints(client):
+    resp = client.post("/api/scan/jobs", json={"addresses": [f"0x{i}" for i in range(50)]})
+    assert resp.status_code == 202
+    data = resp.get_json()
+    assert len(data["jobs"]) == 50
+
+    deadline = time.monotonic() + 10
+    while True:
+        batch = client.get(f"/api/scan/batches/{data['batch']}").get_json()
+        if batch["done"] == 50 or time.monotonic() > deadline:
+            break
+        time.sleep(0.02)
+    assert batch["done"] == 50
+    job = client.get(f"/api/scan/jobs/{data['jobs'][0]['id']}").get_json()
+    assert job["status"] == "done"
+    assert job["result"]["risk_level"] == "High"
+
+    resp = client.get(f"/api/scan/batches/{data['batch']}?stream=1")
+    assert resp.mimetype == "text/event-stream"
+    assert resp.get_data(as_text=True).count("event: job") == 50
+
+    single = client.post("/api/scan/jobs", json={"address": "0xabc", "chain": "bsc"}).get_json()
+    assert [j["address"] for j in single["jobs"]] == ["0xabc"]
+
+    assert client.post("/api/scan/jobs", json={}).status_code == 400
+    assert client.post("/api/scan/jobs", json={"addresses": ["0x1", ""]}).status_code == 400
+    assert client.get("/api/scan/jobs/missing").status_code == 404
+    assert client.get("/api/scan/batches/missing").status_code == 404
+
+
+def test_scan_waits_for_its_job(client):
+    resp = client.post("/api/scan", json={"address": "0xdef"})
+    assert resp.status_code == 200
+    assert resp.get_json()["llm_reasoning"] == "scanned"
+    session = database.SessionLocal()
+    assert session.query(Token).filter_by(address="0xdef").one().risk_level == "High"
+    session.close()
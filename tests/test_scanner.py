@@ -0,0 +1,427 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from cherokee import database
+from cherokee.models import Token
+from cherokee.scanner.workers import WorkerPool
+from cherokee.scanner.writer import TokenWriter
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_processes_concurrently():
+    queue = asyncio.Queue(maxsize=10)
+    active = 0
+    peak = 0
+
+    async def handler(token_info):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    pool = WorkerPool(queue, handler, size=4)
+    pool.start()
+    for i in range(8):
+        await queue.put({"address": hex(i), "chain": "ethereum"})
+    await pool.stop()
+    assert pool.processed == 8
+    assert peak == 4
+    assert not pool.running
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_backpressure_and_failures():
+    queue = asyncio.Queue(maxsize=1)
+    release = asyncio.Event()
+
+    async def handler(token_info):
+        await release.wait()
+        if token_info["address"] == "bad":
+            raise RuntimeError("boom")
+
+    pool = WorkerPool(queue, handler, size=1)
+    pool.start()
+    await queue.put({"address": "bad", "chain": "ethereum"})
+    await asyncio.sleep(0)  # worker picks up the first token
+    await queue.put({"address": "0x1", "chain": "ethereum"})
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(queue.put({"address": "0x2", "chain": "ethereum"}), 0.05)
+    release.set()
+    await pool.stop()
+    assert pool.failed == 1
+    assert pool.processed == 1
+
+
+@pytest.fixture
+def scanner_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/scanner.db")
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", Session)
+    database.init_db()
+    return Session
+
+
+def _result(address, level="Low", reasoning="ok"):
+    return {
+        "address": address, "chain": "ethereum", "name": "T", "symbol": "T",
+        "risk_score": 0.1, "risk_level": level, "llm_reasoning": reasoning,
+    }
+
+
+@pytest.mark.asyncio
+async def test_token_writer_batches_upserts(scanner_db):
+    writer = TokenWriter(batch_size=10, max_delay=0.05)
+    writer.start()
+    await asyncio.gather(*(writer.submit(_result(hex(i))) for i in range(25)))
+    assert writer.written == 25
+    assert writer.batches == 3
+
+    await writer.submit(_result("0x1", level="High", reasoning="updated"))
+    await writer.stop()
+
+    session = scanner_db()
+    assert session.query(Token).count() == 25
+    token = session.query(Token).filter_by(address="0x1").one()
+    assert token.risk_level == "High"
+    assert token.llm_reasoning == "updated"
+    assert token.detected_at is not None
+    session.close()
+
+
+def test_upsert_tokens_keeps_last_duplicate(scanner_db):
+    assert database.upsert_tokens([_result("0xa", "Low"), _result("0xa", "Critical")]) == 1
+    session = scanner_db()
+    assert session.query(Token).filter_by(address="0xa").one().risk_level == "Critical"
+    session.close()
+
+
+def test_seen_filter_skips_recent_duplicates(monkeypatch):
+    from cherokee.scanner import dedup
+
+    now = [1000.0]
+    monkeypatch.setattr(dedup.time, "time", lambda: now[0])
+    seen = dedup.SeenFilter(interval=60)
+    assert seen.warm([("0xOld", 900.0), ("0xwarm", 990.0)]) == 1
+    assert seen.seen("0xWARM") is True
+    assert seen.seen("0xold") is False
+    assert seen.seen("0xold") is True
+    now[0] += 61
+    assert seen.seen("0xold") is False
+    assert seen.stats()["hits"] == 2
+    assert seen.stats()["misses"] == 2
+
+
+def test_seen_filter_bloom_mode(monkeypatch):
+    from cherokee.scanner import dedup
+
+    now = [1000.0]
+    monkeypatch.setattr(dedup.time, "time", lambda: now[0])
+    seen = dedup.SeenFilter(interval=60, bloom=True, capacity=1000)
+    addresses = [hex(i) for i in range(500)]
+    assert not any(seen.seen(a) for a in addresses)
+    assert all(seen.seen(a) for a in addresses)
+    # survives one rotation, forgotten after two
+    now[0] += 61
+    assert seen.seen(addresses[0]) is True
+    now[0] += 61
+    assert seen.seen(addresses[1]) is False
+
+    # forget works despite Bloom filters being unable to delete
+    seen.seen("0xfailed")
+    seen.forget("0xFAILED")
+    assert seen.seen("0xfailed") is False
+    assert seen.seen("0xfailed") is True
+    seen.forget("0xfailed")
+    now[0] += 121
+    # every generation that held the address is gone, so is the exception
+    seen.seen("0xother")
+    assert seen.stats()["forgotten"] == 0
+
+
+def test_recent_tokens_warms_from_database(scanner_db):
+    from cherokee.scanner.dedup import recent_tokens
+
+    database.upsert_tokens([_result("0xfresh")])
+    assert [address for address, _ in recent_tokens(60)] == ["0xfresh"]
+
+
+def _event(address, age, now, **extra):
+    return {"address": address, "chain": "ethereum", "detected_at": now - age, **extra}
+
+
+@pytest.mark.asyncio
+async def test_priority_scheduler_serves_freshest_first():
+    from cherokee.scanner.scheduler import PriorityScheduler
+
+    now = time.time()
+    queue = PriorityScheduler(deadline=60, source_priority={"vip": 20})
+    await queue.put(_event("0xold", 30, now))
+    await queue.put(_event("0xnew", 1, now))
+    await queue.put(_event("0xvip", 15, now, source="vip"))
+    order = [(await queue.get())["address"] for _ in range(3)]
+    assert order == ["0xvip", "0xnew", "0xold"]
+
+
+@pytest.mark.asyncio
+async def test_priority_scheduler_sheds_stale_events():
+    from cherokee.scanner.scheduler import PriorityScheduler
+
+    now = time.time()
+    queue = PriorityScheduler(maxsize=2, deadline=60, shed_on_full=True)
+    await queue.put(_event("0xstale", 120, now))
+    await queue.put(_event("0xfresh", 1, now))
+    # over capacity: the stalest event is evicted to the backfill lane
+    await queue.put(_event("0xfresher", 0, now))
+    assert queue.shed["evicted"] == 1
+    assert [(await queue.get())["address"] for _ in range(3)] == ["0xfresher", "0xfresh", "0xstale"]
+
+    dropping = PriorityScheduler(deadline=60, stale_policy="drop")
+    await dropping.put(_event("0xstale", 120, now))
+    await dropping.put(_event("0xfresh", 1, now))
+    assert (await dropping.get())["address"] == "0xfresh"
+    dropping.task_done()
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(dropping.get(), 0.05)
+    assert dropping.shed["stale"] == dropping.shed["dropped"] == 1
+    # dropped events count as done so the pool can drain on shutdown
+    await asyncio.wait_for(dropping.join(), 0.1)
+
+
+def test_priority_scheduler_evicts_lowest_priority_with_bounded_heaps():
+    import random
+
+    from cherokee.scanner.scheduler import PriorityScheduler
+
+    rng = random.Random(7)
+    now = time.time()
+    queue = PriorityScheduler(maxsize=50, deadline=3600, shed_on_full=True, backfill_size=0)
+    expected = {}
+    for i in range(5000):
+        age = rng.uniform(0, 100)
+        queue.put_nowait(_event(hex(i), age, now))
+        expected[hex(i)] = now - age
+        if len(expected) > 50:
+            # the reference: drop the stalest queued event
+            del expected[min(expected, key=expected.get)]
+        if rng.random() < 0.3:
+            item = queue.get_nowait()
+            assert item["detected_at"] == max(expected.values())
+            del expected[item["address"]]
+    assert queue.qsize() == len(expected)
+    assert len(queue._heap) + len(queue._lowest) <= 4 * queue.qsize() + 64 + 2
+
+
+@pytest.mark.asyncio
+async def test_priority_scheduler_backpressure_without_shedding():
+    from cherokee.scanner.scheduler import PriorityScheduler
+
+    # backpressure is the default
+    queue = PriorityScheduler(maxsize=1)
+    await queue.put({"address": "0x1", "chain": "ethereum"})
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(queue.put({"address": "0x2", "chain": "ethereum"}), 0.05)
+
+
+def test_work_journal_redelivers_unacked_items(tmp_path):
+    from cherokee.scanner.journal import WorkJournal
+
+    path = tmp_path / "queue.db"
+    journal = WorkJournal(path, ack_batch_size=1)
+    first = journal.enqueue({"address": "0x1", "chain": "ethereum"})
+    journal.enqueue({"address": "0x2", "chain": "bsc"})
+    journal.ack(first)
+    # simulated crash: the connection is never closed
+    restarted = WorkJournal(path)
+    pending = restarted.pending()
+    assert [item["address"] for item in pending] == ["0x2"]
+    restarted.ack(pending[0]["_qid"])
+    restarted.close()
+    assert WorkJournal(path).pending() == []
+
+
+@pytest.mark.asyncio
+async def test_work_journal_writes_enqueues_once_per_tick(tmp_path):
+    from cherokee.scanner.journal import WorkJournal
+
+    path = tmp_path / "queue.db"
+    journal = WorkJournal(path)
+    commits = journal._conn.total_changes
+    ids = [journal.enqueue({"address": hex(i), "chain": "ethereum"}) for i in range(100)]
+    assert journal._conn.total_changes == commits and WorkJournal(path).pending() == []
+    await asyncio.sleep(0)
+    assert [item["_qid"] for item in WorkJournal(path).pending()] == ids
+    # ids are not reused after the rows are compacted away
+    for qid in ids:
+        journal.ack(qid)
+    journal.flush()
+    journal.compact()
+    journal.close()
+    assert WorkJournal(path).enqueue({"address": "0xnext"}) == ids[-1] + 1
+
+
+def test_work_journal_compacts_acked_rows(tmp_path):
+    from cherokee.scanner.journal import WorkJournal
+
+    journal = WorkJournal(tmp_path / "queue.db", ack_batch_size=1000)
+    ids = [journal.enqueue({"address": hex(i), "chain": "ethereum"}) for i in range(2000)]
+    for qid in ids[:1500]:
+        journal.ack(qid)
+    journal.flush()
+    assert journal.compact() == 1500
+    assert len(journal.pending()) == 500
+
+
+@pytest.mark.asyncio
+async def test_durable_scheduler_acks_processed_and_dropped_events(tmp_path):
+    from cherokee.scanner.journal import WorkJournal
+    from cherokee.scanner.scheduler import PriorityScheduler
+
+    path = tmp_path / "queue.db"
+    now = time.time()
+    queue = PriorityScheduler(deadline=60, stale_policy="drop", journal=WorkJournal(path))
+    handled = []
+
+    async def handler(token_info):
+        handled.append(token_info["address"])
+
+    await queue.put(_event("0xstale", 120, now))
+    await queue.put(_event("0xfresh", 1, now))
+    await queue.put(_event("0xlater", 2, now))
+    pool = WorkerPool(queue, handler, size=1)
+    pool.start()
+    await pool.stop()
+    queue.journal.flush()
+    assert handled == ["0xfresh", "0xlater"]
+    assert WorkJournal(path).pending() == []
+
+    crashed = PriorityScheduler(journal=WorkJournal(path))
+    await crashed.put(_event("0xlost", 1, now))
+    # enqueues are written at the end of the loop tick
+    await asyncio.sleep(0)
+    recovering = PriorityScheduler(journal=WorkJournal(path))
+    assert await recovering.recover() == 1
+    item = await recovering.get()
+    assert item["address"] == "0xlost"
+    recovering.ack(item)
+    recovering.journal.close()
+    assert WorkJournal(path).pending() == []
+
+
+@pytest.mark.asyncio
+async def test_cancelled_and_failed_tokens_are_not_acked(tmp_path):
+    from cherokee.scanner.journal import WorkJournal
+    from cherokee.scanner.scheduler import PriorityScheduler
+
+    path = tmp_path / "queue.db"
+    now = time.time()
+    queue = PriorityScheduler(journal=WorkJournal(path, ack_batch_size=1))
+    started = asyncio.Event()
+
+    async def handler(token_info):
+        if token_info["address"] == "0xbad":
+            raise RuntimeError("explorer down")
+        started.set()
+        await asyncio.sleep(10)
+
+    await queue.put(_event("0xbad", 2, now))
+    await queue.put(_event("0xslow", 1, now))
+    pool = WorkerPool(queue, handler, size=2)
+    pool.start()
+    await asyncio.wait_for(started.wait(), 1)
+    await asyncio.sleep(0.01)
+    # the drain times out and cancels the worker mid-handle
+    await pool.stop(timeout=0.01)
+    assert pool.failed == 1 and pool.processed == 0
+
+    recovering = PriorityScheduler(journal=WorkJournal(path))
+    assert await recovering.recover() == 1
+    assert (await recovering.get())["address"] == "0xslow"
+    dead = recovering.journal.dead_letters()
+    assert [(d["item"]["address"], d["error"]) for d in dead] == [("0xbad", "RuntimeError: explorer down")]
+
+
+def test_replay_uses_unwarmed_filter_and_never_sheds(monkeypatch):
+    from cherokee import run_scanner
+
+    monkeypatch.setattr(run_scanner, "recent_tokens", lambda interval: [("0xrecent", time.time())])
+    live = run_scanner.parse_args([])
+    replay = run_scanner.parse_args(["--replay", "events.jsonl", "--speed", "0"])
+    assert run_scanner.make_seen_filter(live).seen("0xrecent")
+    assert not run_scanner.make_seen_filter(replay).seen("0xrecent")
+
+    scheduler = run_scanner.make_scheduler(replay)
+    assert not scheduler.shed_on_full
+    assert scheduler.maxsize == run_scanner.DEFAULT_QUEUE_SIZE
+    assert scheduler.deadline == float("inf")
+    for i in range(scheduler.maxsize - 1):
+        scheduler.put_nowait({"address": hex(i), "chain": "ethereum"})
+    scheduler.put_nowait({"address": "0xlast", "chain": "ethereum"})
+    assert scheduler.full()
+    assert scheduler.shed["evicted"] == 0
+
+
+def test_replay_has_its_own_database_and_no_side_effects(monkeypatch, tmp_path):
+    from cherokee import run_scanner
+
+    replay = run_scanner.parse_args(["--replay", "events.jsonl"])
+    assert replay.replay_db != database.DATABASE_URL
+    assert run_scanner.make_trader_and_publisher(replay) == (None, None)
+    with pytest.raises(SystemExit):
+        run_scanner.parse_args(["--replay", "events.jsonl", "--replay-db", database.DATABASE_URL])
+
+    monkeypatch.setattr(database, "engine", database.engine)
+    monkeypatch.setattr(database.SessionLocal, "kw", dict(database.SessionLocal.kw))
+    run_scanner.use_database(f"sqlite:///{tmp_path}/replay.db")
+    assert str(tmp_path) in str(database.engine.url)
+    assert database.SessionLocal().get_bind() is database.engine
+
+
+@pytest.mark.asyncio
+async def test_pipeline_records_throughput_and_latency():
+    from cherokee.scanner.dedup import SeenFilter
+    from cherokee.scanner.pipeline import ScannerPipeline
+
+    class FakeAnalyzer:
+        async def analyze(self, address, chain):
+            return _result(address, level="High")
+
+    class FakeWriter:
+        def __init__(self):
+            self.rows = []
+
+        async def submit(self, result):
+            self.rows.append(result)
+
+    writer = FakeWriter()
+    pipeline = ScannerPipeline(FakeAnalyzer(), trader=None, writer=writer, seen=SeenFilter(interval=60))
+    now = time.time()
+    for i in range(4):
+        await pipeline.process({"address": hex(i), "chain": "ethereum", "detected_at": now - 2})
+    await pipeline.process({"address": "0x0", "chain": "ethereum", "detected_at": now})
+
+    summary = pipeline.stats.summary()
+    assert len(writer.rows) == 4
+    assert summary["completed"] == 4
+    assert summary["skipped"] == 1
+    assert summary["throughput_per_s"] > 0
+    assert 2 <= summary["latency_s"]["p50"] < 3
+
+
+def test_recent_rate_is_not_capped_by_history():
+    from cherokee.scanner.stats import PipelineStats
+
+    stats = PipelineStats(window=100, rate_window=60)
+    start = 1_000_000.0
+    # 600 events per second for a minute, far more than the latency history keeps
+    for i in range(60 * 600):
+        stats.record({}, now=start + i / 600)
+    assert stats.recent_rate(now=start + 59.9) == pytest.approx(600)
+    # buckets older than the window no longer count
+    assert stats.recent_rate(now=start + 89.5) == pytest.approx(30 * 600 / 60)
+    assert stats.recent_rate(now=start + 200) == 0
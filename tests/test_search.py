@@ -0,0 +1,144 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from cherokee import database
+from cherokee.models import Token
+from cherokee.search import (
+    fts_enabled, rebuild_search_index, search_tokens, token_filter, trigram_enabled,
+)
+
+
+@pytest.fixture
+def search_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/search.db")
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", Session)
+    return engine, Session
+
+
+def _add(Session, **tokens):
+    session = Session()
+    for address, (name, symbol) in tokens.items():
+        session.add(Token(address=address, chain="eth", name=name, symbol=symbol,
+                          risk_score=0.5, risk_level="Medium"))
+    session.commit()
+    session.close()
+
+
+def test_search_index_follows_inserts_and_updates(search_db):
+    engine, Session = search_db
+    database.init_db()
+    assert fts_enabled()
+    _add(Session, **{"0xAbC1": ("Pepe Moon", "PEPE"), "0xdef2": ("Moonshot", "MOON")})
+    database.upsert_tokens([{"address": "0xdef2", "name": "Doge Rocket", "symbol": "DGR"}])
+
+    session = Session()
+    assert [t["address"] for t in search_tokens(session, "moo")] == ["0xAbC1"]
+    assert [t["symbol"] for t in search_tokens(session, "rocket")] == ["DGR"]
+    # address prefixes are case-insensitive and come first
+    results = search_tokens(session, "0xabc")
+    assert results[0]["address"] == "0xAbC1" and results[0]["rank"] == 0.0
+    assert search_tokens(session, "  ") == []
+    session.close()
+
+
+def test_search_results_are_ranked(search_db):
+    engine, Session = search_db
+    database.init_db()
+    _add(Session, **{"0x1": ("Feeder Token", "FDR"), "0x2": ("Feed", "FEED")})
+    session = Session()
+    assert [t["address"] for t in search_tokens(session, "feed")] == ["0x2", "0x1"]
+    session.close()
+
+
+def test_existing_rows_are_indexed_and_rebuilt(search_db):
+    engine, Session = search_db
+    database.Base.metadata.create_all(bind=engine)
+    _add(Session, **{"0x1": ("Legacy", "OLD")})
+    database.init_db()
+    session = Session()
+    assert [t["name"] for t in search_tokens(session, "legacy")] == ["Legacy"]
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO tokens_fts(tokens_fts) VALUES ('delete-all')"))
+        conn.execute(text("INSERT INTO tokens_trigram(tokens_trigram) VALUES ('delete-all')"))
+    assert search_tokens(session, "legacy") == []
+    rebuild_search_index()
+    assert [t["name"] for t in search_tokens(session, "legacy")] == ["Legacy"]
+    session.close()
+
+
+def test_substring_queries_use_the_trigram_index(search_db):
+    engine, Session = search_db
+    database.init_db()
+    assert trigram_enabled()
+    _add(Session, **{"0xAbC123dEf": ("Pepe Moon", "PEPE"), "0x999": ("Dogecoin", "DOGE")})
+    session = Session()
+    # middle of an address, with and without letters
+    assert [t["address"] for t in search_tokens(session, "123de")] == ["0xAbC123dEf"]
+    assert [t["address"] for t in search_tokens(session, "c123")] == ["0xAbC123dEf"]
+    # fragment from the middle of a name or symbol
+    assert [t["address"] for t in search_tokens(session, "ecoi")] == ["0x999"]
+    assert [t["address"] for t in search_tokens(session, "oge")] == ["0x999"]
+    # too short for trigrams
+    assert search_tokens(session, "og") == []
+    # 0x input is an address prefix only
+    assert [t["address"] for t in search_tokens(session, "0x9")] == ["0x999"]
+    assert search_tokens(session, "0x123") == []
+    session.close()
+
+    ids = lambda q: [t.id for t in Session().query(Token).filter(token_filter(q)).order_by(Token.id)]
+    assert ids("ecoi") == ids("doge") == [2]
+    assert ids("0xabc123def") == [1]
+
+
+def test_search_queries_do_not_scan_tokens(search_db):
+    engine, Session = search_db
+    database.init_db()
+    _add(Session, **{hex(i): (f"Token {i}", f"T{i}") for i in range(50)})
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "sqlite_master" not in statement:
+            statements.append((statement, parameters))
+
+    session = Session()
+    for q in ("0xabc123def0000000000000000000000000000000", "pepf", "oken", "token"):
+        search_tokens(session, q)
+        session.query(Token).filter(token_filter(q)).order_by(Token.id.desc()).limit(20).all()
+    session.close()
+    event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            assert not [row for row in plan if row[-1] == "SCAN tokens"], f"{statement}: {plan}"
+
+
+def test_address_prefix_uses_expression_index(search_db):
+    engine, _ = search_db
+    database.init_db()
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM tokens WHERE lower(address) >= '0xab' "
+            "AND lower(address) < '0xac'")))
+    assert "ix_tokens_address_lower" in plan
+
+
+def test_search_endpoints(search_db, monkeypatch):
+    from cherokee.web import api as api_module
+    from cherokee.web import create_app
+
+    engine, Session = search_db
+    monkeypatch.setattr(api_module, "SessionLocal", Session)
+    monkeypatch.setenv("CHEROKEE_AUTO_SAMPLE", "0")
+    client = create_app(testing=True).test_client()
+    _add(Session, **{"0x1": ("Alpha Dog", "ALP"), "0x2": ("Beta", "BET")})
+    resp = client.get("/api/tokens/search?q=alp")
+    assert [t["address"] for t in resp.get_json()] == ["0x1"]
+    resp = client.get("/api/tokens?q=dog&fields=address")
+    assert resp.get_json() == [{"address": "0x1"}]
+    resp = client.get("/api/tokens?q=lpha&fields=address")
+    assert resp.get_json() == [{"address": "0x1"}]
@@ -0,0 +1,97 @@
+import asyncio
+import queue
+
+import pytest
+
+from cherokee.scanner.sharding import (
+    InboxListener, RestartPolicy, ShardRouter, merge_metrics, shard_for,
+)
+
+
+def test_shard_for_is_stable_and_balanced():
+    assert shard_for("0xABC", 4) == shard_for("0xabc", 4)
+    counts = [0] * 4
+    for i in range(4000):
+        counts[shard_for(hex(i), 4)] += 1
+    assert all(800 < c < 1200 for c in counts)
+
+
+@pytest.mark.asyncio
+async def test_router_sends_each_address_to_one_shard():
+    inboxes = [queue.Queue(), queue.Queue(), queue.Queue()]
+    router = ShardRouter(inboxes)
+    for i in range(30):
+        await router.put({"address": hex(i), "chain": "ethereum"})
+    await router.put({"address": hex(7).upper().replace("X", "x"), "chain": "ethereum"})
+    assert sum(router.routed) == 31
+    for index, inbox in enumerate(inboxes):
+        while not inbox.empty():
+            assert shard_for(inbox.get_nowait()["address"], 3) == index
+
+
+@pytest.mark.asyncio
+async def test_router_gives_up_on_a_full_inbox_of_a_gone_shard(monkeypatch):
+    from cherokee.scanner import sharding
+
+    monkeypatch.setattr(sharding, "ROUTER_PUT_TIMEOUT", 0.05)
+    inbox = queue.Queue(maxsize=1)
+    inbox.put({"address": "0xfull"})
+    gone = False
+    router = ShardRouter([inbox], available=lambda index: not gone)
+    put = asyncio.create_task(router.put({"address": "0x1"}))
+    await asyncio.sleep(0.1)
+    assert not put.done()
+    gone = True
+    await asyncio.wait_for(put, 1)
+    assert router.routed == [0] and router.dropped == [1]
+    # no executor thread is left blocked on the inbox
+    assert inbox.qsize() == 1
+
+
+@pytest.mark.asyncio
+async def test_inbox_listener_stops_on_sentinel():
+    inbox = queue.Queue()
+    inbox.put({"address": "0x1", "chain": "bsc", "source": "http", "detected_at": 1.0})
+    inbox.put(None)
+    local = asyncio.Queue()
+    await asyncio.wait_for(InboxListener(local, inbox).start(), 2)
+    assert local.get_nowait()["source"] == "http"
+
+
+def test_restart_policy_backs_off_and_gives_up():
+    policy = RestartPolicy(max_restarts=3, delay=1, max_delay=3, stable_after=100)
+    policy.started(0, 0)
+    assert [policy.next_delay(0, 1) for _ in range(3)] == [1, 2, 3]
+    assert policy.next_delay(0, 1) is None
+    # other shards keep their own count
+    policy.started(1, 0)
+    assert policy.next_delay(1, 1) == 1
+    # a shard that stayed up long enough starts over
+    policy.started(0, 10)
+    assert policy.next_delay(0, 200) == 1
+
+
+def test_merge_metrics_adds_shard_label():
+    shard_text = (
+        "# HELP depth Queue depth.\n# TYPE depth gauge\ndepth 3\n"
+        "# HELP errors LLM errors.\n# TYPE errors counter\nerrors{code=\"network_error\"} 2\n"
+    )
+    merged = merge_metrics({0: shard_text, 1: shard_text.replace("3", "5")})
+    lines = merged.splitlines()
+    assert lines.count("# TYPE depth gauge") == 1
+    assert 'depth{shard="0"} 3' in lines
+    assert 'depth{shard="1"} 5' in lines
+    assert 'errors{shard="1",code="network_error"} 2' in lines
+    # samples of one family stay contiguous
+    assert lines.index('depth{shard="1"} 5') == lines.index('depth{shard="0"} 3') + 1
+
+
+def test_file_sqlite_engine_uses_wal(tmp_path):
+    from sqlalchemy import text
+
+    from cherokee.database import make_engine
+
+    engine = make_engine(f"sqlite:///{tmp_path}/shared.db")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    engine.dispose()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from cherokee import tracing
+from cherokee.scanner.pipeline import ScannerPipeline
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_PATH", str(path))
+    monkeypatch.setattr(tracing, "_exporter", None)
+    monkeypatch.setattr(tracing, "_export_path", None)
+    yield path
+    exporter = tracing._exporter
+    if exporter is not None:
+        for handler in list(exporter.handlers):
+            exporter.removeHandler(handler)
+            handler.close()
+
+
+class FakeAnalyzer:
+    async def analyze(self, address, chain):
+        with tracing.span("fetch_token_details", chain=chain):
+            await asyncio.sleep(0.01 if address == "0xslow" else 0)
+        return {"address": address, "chain": chain, "risk_level": "Low"}
+
+
+class FakeWriter:
+    async def submit(self, result):
+        pass
+
+
+class FakeTrader:
+    async def buy(self, token_address, quantity, price, reasoning=""):
+        with tracing.span("paper_trade", action="buy"):
+            return True
+
+
+@pytest.mark.asyncio
+async def test_sampled_pipeline_exports_spans(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    pipeline = ScannerPipeline(FakeAnalyzer(), FakeTrader(), FakeWriter())
+    await asyncio.gather(*(
+        pipeline.process({"address": address, "chain": "bsc", "source": "http"})
+        for address in ("0xfast", "0xslow")
+    ))
+    lines = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    assert len(lines) == 2
+    # concurrent tokens keep their spans apart
+    for trace in lines:
+        assert [s["name"] for s in trace["spans"]] == ["fetch_token_details", "db_upsert", "paper_trade"]
+    slowest = tracing.slowest_traces(limit=1)
+    assert slowest[0]["attrs"] == {"address": "0xslow", "chain": "bsc", "source": "http"}
+    assert slowest[0]["spans"][0]["duration_ms"] >= 10
+    assert tracing.slowest_traces(since=60) and not tracing.slowest_traces(since=1e-9)
+
+
+@pytest.mark.asyncio
+async def test_unsampled_tokens_are_not_traced(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    pipeline = ScannerPipeline(FakeAnalyzer(), FakeTrader(), FakeWriter())
+    await pipeline.process({"address": "0x1", "chain": "ethereum"})
+    assert tracing.current_trace() is None
+    assert tracing.span("db_upsert") is tracing.start_trace("token")
+    assert not trace_file.exists()
+
+
+def test_shards_write_their_own_files_and_are_merged(trace_file, monkeypatch):
+    tracing.set_shard(2)
+    tracing.export({"trace_id": "shard", "start": time.time(), "duration_ms": 50})
+    assert (trace_file.parent / "traces-shard2.jsonl").exists()
+    assert not trace_file.exists()
+    trace_file.write_text("\n".join(json.dumps({"trace_id": str(i), "start": time.time(), "duration_ms": i})
+                                     for i in range(100)) + "\n")
+    (trace_file.parent / "traces.jsonl.1").write_text(
+        json.dumps({"trace_id": "rotated", "start": time.time(), "duration_ms": 75}) + "\n")
+    slowest = tracing.slowest_traces(limit=3)
+    assert [t["trace_id"] for t in slowest] == ["99", "98", "97"]
+    assert [t["trace_id"] for t in tracing.slowest_traces(limit=30)][24:27] == ["75", "rotated", "74"]
+    assert "shard" in [t["trace_id"] for t in tracing.slowest_traces(limit=60)]
+
+
+def test_slowest_traces_endpoint(trace_file, tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from cherokee import database
+    from cherokee.web import create_app
+
+    engine = create_engine(f"sqlite:///{tmp_path}/traces.db")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setenv("CHEROKEE_AUTO_SAMPLE", "0")
+    now = time.time()
+    trace_file.write_text("".join(
+        json.dumps({"trace_id": str(ms), "start": now, "duration_ms": ms, "spans": []}) + "\n"
+        for ms in (5, 40000, 120)
+    ) + '{"trace_id": "partial')
+    client = create_app(testing=True).test_client()
+    resp = client.get("/api/traces/slowest?limit=2")
+    assert [t["duration_ms"] for t in resp.get_json()] == [40000, 120]
@@ -19,8 +19,7 @@ def client(tmp_path, monkeypatch):
     monkeypatch.setattr(api_module, "SessionLocal", Session, raising=False)
     monkeypatch.setattr(trading_module, "SessionLocal", Session, raising=False)
     database.init_db()
-    app = create_app()
-    app.config["TESTING"] = True
+    app = create_app(testing=True)
     return app.test_client()
 
 
@@ -49,3 +48,49 @@ def test_open_trades_empty(client):
     resp = client.get("/api/open-trades")
     assert resp.status_code == 200
     assert resp.get_json() == []
+
+
+def test_ui_spec_conditional_get_and_gzip(client):
+    import gzip
+    import json
+
+    resp = client.get("/api/ui-spec")
+    etag = resp.headers["ETag"]
+    assert resp.headers["Vary"] == "Accept-Encoding"
+    assert client.get("/api/ui-spec", headers={"If-None-Match": etag}).status_code == 304
+
+    zipped = client.get("/api/ui-spec", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.headers["ETag"] != etag
+    assert json.loads(gzip.decompress(zipped.data)) == resp.get_json()
+    # either representation's ETag revalidates
+    not_modified = client.get("/api/ui-spec", headers={"If-None-Match": zipped.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert client.get("/api/scalper/spec", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_json_file_cache_follows_mtime(tmp_path):
+    import os
+
+    from flask import Flask
+
+    from cherokee.response_cache import RESPONSE_CACHE, json_file_response
+
+    spec = tmp_path / "spec.json"
+    spec.write_text('{"version": 1}')
+    app = Flask(__name__)
+    with app.test_request_context():
+        first = json_file_response(spec)
+        assert first.get_json() == {"version": 1}
+        spec.write_text('{"version": 2}')
+        stat = spec.stat()
+        os.utime(spec, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        second = json_file_response(spec)
+    assert second.get_json() == {"version": 2}
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+    calls = []
+    with app.test_request_context():
+        for _ in range(3):
+            RESPONSE_CACHE.response("counter", 7, lambda: calls.append(1) or {"n": len(calls)})
+    assert calls == [1]